@@ -0,0 +1,618 @@
+"""
+Local stand-in for the Google REST APIs (and the Anthropic Messages API) used by
+the LifeOps backend, for benchmarks and load tests.
+
+Point the backend at it with:
+    GOOGLE_API_ENDPOINT=http://127.0.0.1:9100
+    GOOGLE_TOKEN_URI=http://127.0.0.1:9100/token
+    EVAL_ENGINE=sdk ANTHROPIC_BASE_URL=http://127.0.0.1:9100 ANTHROPIC_API_KEY=bench
+
+With GOOGLE_API_ENDPOINT set, googleapiclient drops each API's servicePath, so
+Calendar/Drive paths start at the resource (/calendars, /files) while Tasks,
+Sheets and Docs keep their version prefix (/tasks/v1, /v4, /v1).
+
+Latency and errors are injected per request and can be changed at runtime:
+    POST /_fake/config {"latency_ms": 80, "jitter_ms": 20, "error_rate": 0.05,
+                        "error_status": 503, "eval_latency_ms": 1500,
+                        "changes_lag_ms": 0}
+    GET  /_fake/stats   -> upstream call counts per path
+"""
+
+import asyncio
+import json
+import operator
+import os
+import random
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+CONFIG = {
+    "latency_ms": float(os.getenv("FAKE_LATENCY_MS", 80)),
+    "jitter_ms": float(os.getenv("FAKE_JITTER_MS", 20)),
+    "error_rate": float(os.getenv("FAKE_ERROR_RATE", 0)),
+    "error_status": int(os.getenv("FAKE_ERROR_STATUS", 503)),
+    "eval_latency_ms": float(os.getenv("FAKE_EVAL_LATENCY_MS", 1500)),
+    # Delay before a Drive write shows up in changes.list, like the real feed's lag
+    "changes_lag_ms": float(os.getenv("FAKE_CHANGES_LAG_MS", 0)),
+}
+
+app = FastAPI(title="Fake Google APIs")
+calls: Counter = Counter()
+
+
+# ============ Fixture Data ============
+
+random.seed(7)
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _rfc3339(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+EVENTS = [
+    {
+        "id": f"evt{i}",
+        "status": "confirmed",
+        "summary": f"일정 {i}",
+        "updated": _rfc3339(NOW - timedelta(days=1)),
+        "start": {"dateTime": _rfc3339(NOW + timedelta(hours=6 * (i - 90)))},
+        "end": {"dateTime": _rfc3339(NOW + timedelta(hours=6 * (i - 90) + 1))},
+    }
+    for i in range(360)
+]
+
+TASK_LISTS = [{"id": f"list-{i}", "title": f"할 일 {i}", "updated": _rfc3339(NOW)} for i in range(3)]
+TASKS = {
+    tl["id"]: [
+        {
+            "id": f"{tl['id']}-task{j}",
+            "title": f"작업 {j}",
+            "status": "completed" if j % 3 == 0 else "needsAction",
+            "updated": _rfc3339(NOW - timedelta(hours=j)),
+            "due": _rfc3339(NOW + timedelta(days=j % 14)),
+        }
+        for j in range(60)
+    ]
+    for tl in TASK_LISTS
+}
+
+SHEET_HEADER = ["날짜", "회사", "직무", "상태", "지역", "연봉", "경력", "메모"]
+SHEET_ROWS = [SHEET_HEADER] + [
+    [
+        (NOW - timedelta(days=r)).strftime("%Y-%m-%d"),
+        f"회사{r % 40}",
+        random.choice(["백엔드", "프론트엔드", "전산직", "데이터"]),
+        random.choice(["지원", "서류합격", "면접", "불합격", "합격"]),
+        random.choice(["광주", "전남", "서울"]),
+        str(3000 + (r * 37) % 2500),
+        str(r % 5),
+        "메모 " * (r % 4),
+    ]
+    for r in range(1, 500)
+]
+
+DRIVE_FILES = [
+    {
+        "id": f"file{i}",
+        "name": f"문서 {i}",
+        "mimeType": random.choice([
+            "application/vnd.google-apps.document",
+            "application/vnd.google-apps.spreadsheet",
+            "application/pdf",
+        ]),
+        "modifiedTime": _rfc3339(NOW - timedelta(hours=i)),
+        "createdTime": _rfc3339(NOW - timedelta(days=i % 40, minutes=i)),
+        "webViewLink": f"https://example.invalid/file{i}",
+        "parents": [("root", "folder-a", "folder-b")[i % 3]],
+        "trashed": i % 25 == 0,
+        "starred": i % 7 == 0,
+    }
+    for i in range(300)
+] + [
+    {
+        "id": folder_id,
+        "name": name,
+        "mimeType": "application/vnd.google-apps.folder",
+        "modifiedTime": _rfc3339(NOW - timedelta(days=3)),
+        "createdTime": _rfc3339(NOW - timedelta(days=30)),
+        "webViewLink": f"https://example.invalid/{folder_id}",
+        "parents": ["root"],
+        "trashed": False,
+        "starred": False,
+    }
+    for folder_id, name in [("folder-a", "LifeOps"), ("folder-b", "보관함")]
+]
+
+
+# File ids in the order they changed; a changes page token is an offset into it
+DRIVE_CHANGES: list = []
+
+# Bumped by batchUpdate, like Drive's file version and the Docs revisionId
+DOC_VERSIONS: Counter = Counter()
+
+
+def _document(document_id: str) -> dict:
+    content = [
+        {
+            "startIndex": 1 + i * 40,
+            "endIndex": 1 + (i + 1) * 40,
+            "paragraph": {"elements": [{"textRun": {"content": f"문단 {i} " + "내용 " * 10 + "\n"}}]},
+        }
+        for i in range(200)
+    ]
+    revision = f"rev-{DOC_VERSIONS[document_id] + 1}"
+    return {"documentId": document_id, "title": "벤치마크 문서", "revisionId": revision, "body": {"content": content}}
+
+
+# ============ Latency / Error Injection ============
+
+
+def _google_error(status: int) -> JSONResponse:
+    headers = {"Retry-After": "1"} if status == 429 else {}
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"code": status, "message": "Injected failure", "status": "UNAVAILABLE"}},
+        headers=headers,
+    )
+
+
+@app.middleware("http")
+async def inject(request: Request, call_next):
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+    calls[f"{request.method} {request.url.path}"] += 1
+
+    if not request.url.path.startswith("/v1/messages"):
+        delay = CONFIG["latency_ms"] + random.uniform(-1, 1) * CONFIG["jitter_ms"]
+        await asyncio.sleep(max(delay, 0) / 1000)
+        if CONFIG["error_rate"] and random.random() < CONFIG["error_rate"]:
+            return _google_error(CONFIG["error_status"])
+    return await call_next(request)
+
+
+@app.post("/_fake/config")
+async def set_config(body: dict):
+    CONFIG.update({k: type(CONFIG[k])(v) for k, v in body.items() if k in CONFIG})
+    return CONFIG
+
+
+@app.get("/_fake/stats")
+async def stats():
+    return {"calls": dict(calls), "total": sum(calls.values())}
+
+
+@app.post("/_fake/reset")
+async def reset():
+    calls.clear()
+    return {"ok": True}
+
+
+# ============ OAuth ============
+
+
+@app.post("/token")
+async def token():
+    # Answers both code exchanges and refreshes
+    return {
+        "access_token": f"fake-{uuid.uuid4().hex}",
+        "refresh_token": "fake-refresh",
+        "expires_in": 3600,
+        "token_type": "Bearer",
+    }
+
+
+@app.get("/oauth2/v2/userinfo")
+async def userinfo():
+    return {"id": "1", "email": "bench@example.invalid"}
+
+
+# ============ Calendar ============
+
+
+@app.get("/calendars/{calendar_id}/events")
+async def list_events(
+    calendar_id: str,
+    timeMin: str = None,
+    timeMax: str = None,
+    maxResults: int = 250,
+    syncToken: str = None,
+    pageToken: str = None,
+):
+    if syncToken:
+        # Nothing changes between syncs
+        return {"items": [], "nextSyncToken": syncToken}
+    items = EVENTS
+    if timeMin:
+        items = [e for e in items if e["end"]["dateTime"] >= timeMin]
+    if timeMax:
+        items = [e for e in items if e["start"]["dateTime"] < timeMax]
+    start = int(pageToken or 0)
+    page = items[start:start + maxResults]
+    result = {"items": page}
+    if start + maxResults < len(items):
+        result["nextPageToken"] = str(start + maxResults)
+    else:
+        result["nextSyncToken"] = "sync-1"
+    return result
+
+
+@app.post("/calendars/{calendar_id}/events")
+async def insert_event(calendar_id: str, body: dict):
+    return {**body, "id": uuid.uuid4().hex, "status": "confirmed", "updated": _rfc3339(datetime.now(timezone.utc))}
+
+
+@app.patch("/calendars/{calendar_id}/events/{event_id}")
+async def patch_event(calendar_id: str, event_id: str, body: dict):
+    return {**body, "id": event_id, "status": "confirmed"}
+
+
+@app.delete("/calendars/{calendar_id}/events/{event_id}")
+async def delete_event(calendar_id: str, event_id: str):
+    return Response(status_code=204)
+
+
+# ============ Tasks ============
+
+
+@app.get("/tasks/v1/users/@me/lists")
+async def list_task_lists():
+    return {"items": TASK_LISTS}
+
+
+@app.get("/tasks/v1/lists/{tasklist}/tasks")
+async def list_tasks(tasklist: str, maxResults: int = 100, updatedMin: str = None, pageToken: str = None):
+    items = TASKS.get(tasklist, [])
+    if updatedMin:
+        items = [t for t in items if t["updated"] > updatedMin]
+    start = int(pageToken or 0)
+    result = {"items": items[start:start + maxResults]}
+    if start + maxResults < len(items):
+        result["nextPageToken"] = str(start + maxResults)
+    return result
+
+
+@app.post("/tasks/v1/lists/{tasklist}/tasks")
+async def insert_task(tasklist: str, body: dict):
+    return {**body, "id": uuid.uuid4().hex, "status": "needsAction", "updated": _rfc3339(datetime.now(timezone.utc))}
+
+
+@app.patch("/tasks/v1/lists/{tasklist}/tasks/{task_id}")
+async def patch_task(tasklist: str, task_id: str, body: dict):
+    return {**body, "id": task_id, "updated": _rfc3339(datetime.now(timezone.utc))}
+
+
+@app.delete("/tasks/v1/lists/{tasklist}/tasks/{task_id}")
+async def delete_task(tasklist: str, task_id: str):
+    return Response(status_code=204)
+
+
+# ============ Sheets ============
+
+
+@app.post("/v4/spreadsheets")
+async def create_spreadsheet(body: dict):
+    spreadsheet_id = f"sheet-{uuid.uuid4().hex[:8]}"
+    title = body.get("properties", {}).get("title", "Untitled spreadsheet")
+    DRIVE_FILES.append({
+        "id": spreadsheet_id,
+        "name": title,
+        "mimeType": "application/vnd.google-apps.spreadsheet",
+        "modifiedTime": _rfc3339(datetime.now(timezone.utc)),
+        "webViewLink": f"https://example.invalid/{spreadsheet_id}",
+        "parents": ["root"],
+    })
+    _record_change(spreadsheet_id)
+    return {
+        "spreadsheetId": spreadsheet_id,
+        "properties": {"title": title},
+        "sheets": body.get("sheets", [{"properties": {"sheetId": 0, "title": "Sheet1"}}]),
+        "spreadsheetUrl": f"https://example.invalid/{spreadsheet_id}",
+    }
+
+
+@app.get("/v4/spreadsheets/{spreadsheet_id}")
+async def get_spreadsheet(spreadsheet_id: str):
+    return {"spreadsheetId": spreadsheet_id, "sheets": [{"properties": {"sheetId": 0, "title": "Sheet1"}}]}
+
+
+@app.get("/v4/spreadsheets/{spreadsheet_id}/values:batchGet")
+async def batch_get_values(spreadsheet_id: str, request: Request):
+    ranges = request.query_params.getlist("ranges")
+    return {
+        "spreadsheetId": spreadsheet_id,
+        "valueRanges": [{"range": r, "majorDimension": "ROWS", "values": SHEET_ROWS} for r in ranges],
+    }
+
+
+@app.get("/v4/spreadsheets/{spreadsheet_id}/values/{range}")
+async def get_values(spreadsheet_id: str, range: str):
+    return {"range": range, "majorDimension": "ROWS", "values": SHEET_ROWS}
+
+
+@app.put("/v4/spreadsheets/{spreadsheet_id}/values/{range}")
+async def update_values(spreadsheet_id: str, range: str, body: dict):
+    rows = body.get("values", [])
+    return {"spreadsheetId": spreadsheet_id, "updatedRange": range, "updatedRows": len(rows)}
+
+
+@app.post("/v4/spreadsheets/{spreadsheet_id}/values/{range}:append")
+async def append_values(spreadsheet_id: str, range: str, body: dict):
+    rows = body.get("values", [])
+    return {"spreadsheetId": spreadsheet_id, "updates": {"updatedRange": range, "updatedRows": len(rows)}}
+
+
+@app.post("/v4/spreadsheets/{spreadsheet_id}/values:batchUpdate")
+async def batch_update_values(spreadsheet_id: str, body: dict):
+    data = body.get("data", [])
+    return {"spreadsheetId": spreadsheet_id, "totalUpdatedRows": sum(len(d.get("values", [])) for d in data)}
+
+
+# ============ Drive ============
+
+
+# A small evaluator for the Drive `q` language (and/or/not, parentheses and
+# the common terms), written independently of the backend's local index so
+# the two can be checked against each other.
+
+_Q_TOKEN = re.compile(r"\s*(?:'((?:[^'\\]|\\.)*)'|(!=|<=|>=|=|<|>|\(|\))|(\w+))")
+_Q_COMPARE = {
+    "=": operator.eq, "!=": operator.ne, "<": operator.lt,
+    "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+
+
+def _drive_datetime(value: str) -> datetime:
+    if len(value) == 10:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class DriveQuery:
+    def __init__(self, q: str):
+        self.tokens = []
+        q = q.strip()
+        pos = 0
+        while pos < len(q):
+            match = _Q_TOKEN.match(q, pos)
+            if not match:
+                raise ValueError(f"Invalid query near {q[pos:]!r}")
+            literal, symbol, word = match.groups()
+            if literal is not None:
+                self.tokens.append(("str", re.sub(r"\\(.)", r"\1", literal)))
+            elif symbol is not None:
+                self.tokens.append(("sym", symbol))
+            else:
+                self.tokens.append(("word", word))
+            pos = match.end()
+        self.pos = 0
+        self.matches = self._or() if self.tokens else (lambda file: True)
+        if self.pos != len(self.tokens):
+            raise ValueError("Invalid query")
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _take(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _keyword(self, word: str) -> bool:
+        kind, value = self._peek()
+        if kind == "word" and value.lower() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def _or(self):
+        terms = [self._and()]
+        while self._keyword("or"):
+            terms.append(self._and())
+        return lambda file: any(term(file) for term in terms)
+
+    def _and(self):
+        terms = [self._not()]
+        while self._keyword("and"):
+            terms.append(self._not())
+        return lambda file: all(term(file) for term in terms)
+
+    def _not(self):
+        if self._keyword("not"):
+            inner = self._not()
+            return lambda file: not inner(file)
+        if self._peek() == ("sym", "("):
+            self._take()
+            inner = self._or()
+            if self._take() != ("sym", ")"):
+                raise ValueError("Unbalanced parentheses")
+            return inner
+        return self._term()
+
+    def _term(self):
+        (kind, first), (_, op), (_, value) = self._take(), self._take(), self._take()
+        if kind == "str" and op == "in" and value == "parents":
+            return lambda file: first in file.get("parents", [])
+        if first == "name" and op == "contains":
+            # Drive matches the start of the name's words, ignoring case
+            pattern = re.compile(r"(?:^|[\W_])" + re.escape(value), re.IGNORECASE)
+            return lambda file: bool(pattern.search(file.get("name", "")))
+        compare = _Q_COMPARE.get(op)
+        if compare is None:
+            raise ValueError(f"Unsupported operator {op!r}")
+        if first in ("name", "mimeType"):
+            return lambda file: compare(file.get(first), value)
+        if first in ("trashed", "starred"):
+            return lambda file: compare(bool(file.get(first)), value == "true")
+        if first in ("modifiedTime", "createdTime"):
+            bound = _drive_datetime(value)
+            return lambda file: compare(_drive_datetime(file[first]), bound)
+        raise ValueError(f"Unsupported term {first!r}")
+
+
+def _drive_sort(files: list, order_by: str) -> list:
+    keys = {
+        "name": lambda file: file.get("name", "").casefold(),
+        "modifiedTime": lambda file: _drive_datetime(file["modifiedTime"]),
+        "createdTime": lambda file: _drive_datetime(file["createdTime"]),
+        "folder": lambda file: file.get("mimeType") != "application/vnd.google-apps.folder",
+    }
+    for clause in reversed([c.split() for c in order_by.split(",") if c.strip()]):
+        files = sorted(files, key=keys[clause[0]], reverse=clause[1:] == ["desc"])
+    return files
+
+
+def _drive_fields(files: list, fields: str) -> list:
+    match = re.search(r"files\(([^)]*)\)", fields or "")
+    if not match:
+        return files
+    names = [name.strip() for name in match.group(1).split(",")]
+    return [{name: file[name] for name in names if name in file} for file in files]
+
+
+@app.get("/files")
+async def list_files(pageSize: int = 100, pageToken: str = None, q: str = None, orderBy: str = None, fields: str = None):
+    try:
+        matches = [file for file in DRIVE_FILES if DriveQuery(q or "").matches(file)]
+        if orderBy:
+            matches = _drive_sort(matches, orderBy)
+    except (ValueError, KeyError) as e:
+        return JSONResponse(status_code=400, content={"error": {"code": 400, "message": str(e), "status": "INVALID_ARGUMENT"}})
+    start = int(pageToken or 0)
+    result = {"files": _drive_fields(matches[start:start + pageSize], fields)}
+    if start + pageSize < len(matches):
+        result["nextPageToken"] = str(start + pageSize)
+    return result
+
+
+@app.get("/files/{file_id}")
+async def get_file(file_id: str):
+    found = next((f for f in DRIVE_FILES if f["id"] == file_id), {"id": file_id, "name": file_id})
+    return {**found, "version": str(DOC_VERSIONS[file_id] + 1), "modifiedTime": _rfc3339(NOW)}
+
+
+def _record_change(file_id: str):
+    lag = CONFIG["changes_lag_ms"] / 1000
+    if lag > 0:
+        asyncio.get_running_loop().call_later(lag, DRIVE_CHANGES.append, file_id)
+    else:
+        DRIVE_CHANGES.append(file_id)
+
+
+@app.post("/files")
+async def create_file(body: dict):
+    file = {
+        "id": f"file-{uuid.uuid4().hex[:8]}",
+        "mimeType": "application/octet-stream",
+        "parents": ["root"],
+        **body,
+        "modifiedTime": _rfc3339(datetime.now(timezone.utc)),
+        "webViewLink": "https://example.invalid/new",
+    }
+    DRIVE_FILES.append(file)
+    _record_change(file["id"])
+    return file
+
+
+@app.patch("/files/{file_id}")
+async def update_file(file_id: str, body: dict):
+    file = next((f for f in DRIVE_FILES if f["id"] == file_id), None)
+    if file is None:
+        return _google_error(404)
+    file.update(body, modifiedTime=_rfc3339(datetime.now(timezone.utc)))
+    _record_change(file_id)
+    return file
+
+
+@app.delete("/files/{file_id}")
+async def delete_file(file_id: str):
+    DRIVE_FILES[:] = [f for f in DRIVE_FILES if f["id"] != file_id]
+    _record_change(file_id)
+    return Response(status_code=204)
+
+
+@app.get("/changes/startPageToken")
+async def get_start_page_token():
+    return {"startPageToken": str(len(DRIVE_CHANGES))}
+
+
+@app.get("/changes")
+async def list_changes(pageToken: str, pageSize: int = 100):
+    start = int(pageToken)
+    files = {f["id"]: f for f in DRIVE_FILES}
+    changes = [
+        {"fileId": file_id, "removed": file_id not in files, **({"file": files[file_id]} if file_id in files else {})}
+        for file_id in DRIVE_CHANGES[start:start + pageSize]
+    ]
+    if start + pageSize < len(DRIVE_CHANGES):
+        return {"changes": changes, "nextPageToken": str(start + pageSize)}
+    return {"changes": changes, "newStartPageToken": str(len(DRIVE_CHANGES))}
+
+
+# ============ Docs ============
+
+
+@app.get("/v1/documents/{document_id}")
+async def get_document(document_id: str):
+    return _document(document_id)
+
+
+@app.post("/v1/documents/{document_id}:batchUpdate")
+async def batch_update_document(document_id: str, body: dict):
+    DOC_VERSIONS[document_id] += 1
+    return {"documentId": document_id, "replies": [{} for _ in body.get("requests", [])]}
+
+
+# ============ Anthropic Messages (stub for EVAL_ENGINE=sdk) ============
+
+EVALUATION = {
+    "overallScore": 72,
+    "categories": [
+        {"name": name, "score": 70, "analysis": "벤치마크용 분석입니다.", "suggestion": "벤치마크용 제안입니다."}
+        for name in ("구직활동", "스펙/자격증", "일상관리", "재테크")
+    ],
+    "strengths": ["꾸준함", "기록", "계획"],
+    "improvements": ["지원 수", "운동", "저축"],
+    "actionItems": ["이력서 수정", "자격증 접수", "가계부 정리"],
+}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/v1/messages/count_tokens")
+async def count_tokens(body: dict):
+    # Roughly what the real tokenizer gives for Korean text
+    system = body.get("system") or ""
+    text = system if isinstance(system, str) else "".join(block.get("text", "") for block in system)
+    return {"input_tokens": len(text) // 2 + 10}
+
+
+@app.post("/v1/messages")
+async def messages(body: dict):
+    text = json.dumps(EVALUATION, ensure_ascii=False)
+    chunks = [text[i:i + 40] for i in range(0, len(text), 40)]
+    delay = CONFIG["eval_latency_ms"] / 1000 / max(len(chunks), 1)
+    usage = {"input_tokens": 200, "output_tokens": 1, "cache_read_input_tokens": 900, "cache_creation_input_tokens": 0}
+
+    async def stream():
+        yield _sse("message_start", {"type": "message_start", "message": {
+            "id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": body.get("model"),
+            "content": [], "stop_reason": None, "stop_sequence": None, "usage": usage,
+        }})
+        yield _sse("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        for chunk in chunks:
+            await asyncio.sleep(delay)
+            yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}})
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _sse("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": len(chunks) * 10}})
+        yield _sse("message_stop", {"type": "message_stop"})
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
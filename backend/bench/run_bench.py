@@ -0,0 +1,442 @@
+"""
+Load-test the LifeOps backend against the local fake Google server.
+
+Starts bench/fake_google.py and the real app (uvicorn main:app) as subprocesses,
+then drives each scenario at a fixed concurrency for a fixed duration and reports
+throughput, p50/p95/p99 latency, event loop lag (from /metrics) and upstream
+calls per request. Results are written to bench/results/ as JSON; pass
+--compare to diff against an earlier run. The drive_search scenario first checks
+the Drive index's answers against the fake's (a mismatch fails the run).
+
+    cd backend
+    python -m bench.run_bench                          # all scenarios
+    python -m bench.run_bench -s tasks,report_pdf -c 32 -d 20
+    python -m bench.run_bench --latency-ms 150 --error-rate 0.02
+    python -m bench.run_bench --app-env SYNC_ENABLED=false --label no-sync
+    python -m bench.run_bench --compare bench/results/<earlier>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import count
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+
+NOW = datetime.now(timezone.utc)
+SPREADSHEET = "bench-sheet"
+
+REPORT_SUMMARY = {
+    "goals": [{"category": "취업", "goal": "공공기관 전산직 합격", "deadline": "2026-12"}] * 4,
+    "jobSearch": {"totalApplied": 12, "inProgress": 3, "offers": 1},
+    "spec": {"passed": 2, "registered": 1, "notStarted": 2, "items": [
+        {"name": "정보처리기사", "status": "passed"}, {"name": "SQLD", "status": "registered"},
+    ]},
+    "routine": {"percentage": 76, "taskCompleted": 19, "taskTotal": 25},
+    "finance": {"netAsset": "1,200만원", "monthlySaving": "80만원"},
+    "roadmap": [{"month": f"{m}월", "items": ["지원서 작성", "코딩 테스트 준비"]} for m in range(1, 7)],
+}
+
+_seq = count()
+
+
+def _unique_summary() -> dict:
+    # Distinct per request so the render / evaluation caches don't answer it
+    return {**REPORT_SUMMARY, "benchSeq": next(_seq)}
+
+
+async def _report_pdf(client: httpx.AsyncClient) -> httpx.Response:
+    prepared = await client.post("/api/report/prepare", json={"summary": _unique_summary()})
+    if prepared.status_code != 200:
+        return prepared
+    return await client.get(f"/api/report/pdf/{prepared.json()['token']}")
+
+
+def _get(path: str, **params):
+    return lambda client: client.get(path, params=params or None)
+
+
+def _post(path: str, body, **params):
+    return lambda client: client.post(path, json=body() if callable(body) else body, params=params or None)
+
+
+SCENARIOS = {
+    "calendar_events": _get(
+        "/api/calendar/events",
+        time_min=(NOW - timedelta(days=7)).isoformat(),
+        time_max=(NOW + timedelta(days=30)).isoformat(),
+    ),
+    "task_lists": _get("/api/tasks/lists"),
+    "tasks": _get("/api/tasks/list-0"),
+    "sheet_values": _get(f"/api/sheets/{SPREADSHEET}/values/Sheet1!A1:H500"),
+    "sheet_query": _post(f"/api/sheets/{SPREADSHEET}/query", {
+        "range": "Sheet1!A1:H500",
+        "where": [{"column": "지역", "op": "eq", "value": "광주"}],
+        "group_by": ["상태"],
+        "aggregates": [{"fn": "count"}, {"column": "연봉", "fn": "avg"}],
+    }),
+    "drive_files": _get("/api/drive/files"),
+    # A different name each time, so only the local Drive index can avoid an upstream call
+    "drive_search": lambda client: client.get("/api/drive/files", params={
+        "q": f"name contains '문서 {next(_seq) % 400}' and trashed = false",
+        "fields": "files(id,name)",
+    }),
+    "document": _get("/api/docs/bench-doc"),
+    "document_text": _get("/api/docs/bench-doc/text", format="markdown"),
+    "document_edit": _post("/api/docs/bench-doc/batchUpdate", {
+        "requests": [{"insertText": {"location": {"index": 1}, "text": "편집 "}}],
+    }),
+    "dashboard": _post("/api/dashboard", {"parts": [
+        {"name": "events", "type": "calendar_events", "params": {
+            "time_min": (NOW - timedelta(days=1)).isoformat(),
+            "time_max": (NOW + timedelta(days=7)).isoformat(),
+        }},
+        {"name": "lists", "type": "task_lists"},
+        {"name": "tasks", "type": "all_tasks"},
+        {"name": "sheet", "type": "sheet_values", "params": {
+            "spreadsheet_id": SPREADSHEET, "range": "Sheet1!A1:H100",
+        }},
+        {"name": "files", "type": "drive_files"},
+    ]}),
+    "task_create": _post("/api/tasks/list-1", {"title": "벤치마크 작업"}),
+    "report_pdf": _report_pdf,
+    "evaluate": _post("/api/evaluate", lambda: {"summary": _unique_summary()}, refresh="true"),
+}
+
+
+# ============ Processes ============
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url: str, proc: subprocess.Popen, timeout: float = 30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(args, workdir: str):
+    fake_port, app_port = _free_port(), _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+
+    env = {
+        **os.environ,
+        "GOOGLE_API_ENDPOINT": fake_url,
+        "GOOGLE_TOKEN_URI": f"{fake_url}/token",
+        "TOKEN_PATH": os.path.join(workdir, "tokens.json"),
+        "GOOGLE_CLIENT_ID": "bench",
+        "GOOGLE_CLIENT_SECRET": "bench",
+        # The fake token endpoint is plain http
+        "OAUTHLIB_INSECURE_TRANSPORT": "1",
+        "STATE_DB_PATH": os.path.join(workdir, "state.db"),
+        "SHEETS_JOURNAL_PATH": os.path.join(workdir, "sheets-journal.jsonl"),
+        "EVAL_ENGINE": "sdk",
+        "ANTHROPIC_BASE_URL": fake_url,
+        "ANTHROPIC_API_KEY": "bench",
+        # Samples loop lag into /metrics; stalls over this are logged with a stack
+        "LOOP_LAG_THRESHOLD_MS": str(args.stall_ms),
+    }
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+
+    log = open(os.path.join(workdir, "app.log"), "w")
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench.fake_google:app", "--port", str(fake_port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        _wait_until_up(f"{fake_url}/_fake/stats", fake)
+        _wait_until_up(f"http://127.0.0.1:{app_port}/health", app)
+    except Exception:
+        stop_servers([fake, app])
+        raise
+    httpx.post(f"{fake_url}/_fake/config", json={
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "error_rate": args.error_rate,
+        "error_status": args.error_status,
+        "eval_latency_ms": args.eval_latency_ms,
+    })
+    return f"http://127.0.0.1:{app_port}", fake_url, [fake, app]
+
+
+def sign_in(app_url: str) -> dict:
+    """Log in through the OAuth callback (the fake token endpoint accepts any code)"""
+    response = httpx.get(f"{app_url}/auth/callback", params={"code": "bench"})
+    cookies = dict(response.cookies)
+    if not cookies:
+        raise RuntimeError(f"Sign-in failed: {response.headers.get('location')}")
+    return cookies
+
+
+# files.list queries checked against the fake's own evaluation of the same
+# call, with whether the app's Drive index should answer them (or Drive)
+DRIVE_CHECKS = [
+    ({"q": "name contains '문서 1' and trashed = false"}, "HIT"),
+    ({"q": "'folder-a' in parents and mimeType != 'application/pdf'", "orderBy": "name"}, "HIT"),
+    ({"q": "starred = true and createdTime < '2030-01-01'", "orderBy": "createdTime desc,name"}, "HIT"),
+    ({"q": f"modifiedTime > '{(NOW - timedelta(days=5)).strftime('%Y-%m-%dT%H:%M:%SZ')}' and trashed = false",
+      "orderBy": "modifiedTime"}, "HIT"),
+    ({"q": "mimeType = 'application/vnd.google-apps.folder'", "orderBy": "folder,name desc"}, "HIT"),
+    ({"q": "(starred = true or trashed = true) and not name contains '문서 2'"}, "MISS"),
+    ({"q": "'root' in parents"}, "MISS"),
+]
+# What /api/drive/files asks Drive for by default
+DRIVE_CHECK_FIELDS = "files(id,name,mimeType,modifiedTime,webViewLink,parents)"
+
+
+def check_drive_index(app_url: str, fake_url: str, cookies: dict) -> int:
+    """Compare index answers with the fake's; returns the number of mismatches"""
+    with httpx.Client(base_url=app_url, cookies=cookies, timeout=30) as client:
+        deadline = time.time() + 30
+        while client.get("/api/drive/files").headers.get("X-Drive-Index") != "HIT":
+            if time.time() > deadline:
+                print("[Bench] Drive index was not seeded within 30s")
+                return len(DRIVE_CHECKS)
+            time.sleep(0.2)
+        mismatches = 0
+        for check, source in DRIVE_CHECKS:
+            order_by = check.get("orderBy", "modifiedTime desc")
+            response = client.get("/api/drive/files", params={"q": check["q"], "order_by": order_by, "page_size": 1000})
+            expected = httpx.get(f"{fake_url}/files", params={
+                "q": check["q"], "orderBy": order_by, "pageSize": 1000, "fields": DRIVE_CHECK_FIELDS,
+            }).json()["files"]
+            got = response.json() if response.status_code == 200 else response.text
+            if response.headers.get("X-Drive-Index") != source or got != expected:
+                mismatches += 1
+                print(f"[Bench] Drive index mismatch ({response.headers.get('X-Drive-Index')}) for {check}")
+    print(f"[Bench] Drive index: {len(DRIVE_CHECKS) - mismatches}/{len(DRIVE_CHECKS)} queries match Drive")
+    return mismatches
+
+
+def stop_servers(procs: list):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# ============ Measurement ============
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+_LAG_LINE = re.compile(r'^lifeops_event_loop_lag_seconds_(bucket|sum|count)(?:\{le="([^"]+)"\})? (\S+)$')
+
+
+async def loop_lag_snapshot(client: httpx.AsyncClient) -> dict:
+    text = (await client.get("/metrics")).text
+    snapshot = {"buckets": {}, "sum": 0.0, "count": 0.0}
+    for line in text.splitlines():
+        match = _LAG_LINE.match(line)
+        if not match:
+            continue
+        kind, le, value = match.groups()
+        if kind == "bucket":
+            snapshot["buckets"][le] = float(value)
+        else:
+            snapshot[kind] = float(value)
+    return snapshot
+
+
+def loop_lag_delta(before: dict, after: dict) -> dict:
+    samples = after["count"] - before["count"]
+    if samples <= 0:
+        return {"mean_ms": None, "p99_ms": None, "samples": 0}
+    p99 = None
+    for le, cumulative in after["buckets"].items():
+        if cumulative - before["buckets"].get(le, 0) >= 0.99 * samples:
+            p99 = None if le == "+Inf" else float(le) * 1000
+            break
+    return {
+        "mean_ms": round((after["sum"] - before["sum"]) / samples * 1000, 2),
+        "p99_ms": p99,  # upper bound of the histogram bucket
+        "samples": int(samples),
+    }
+
+
+async def run_scenario(name: str, app_url: str, fake_url: str, cookies: dict, concurrency: int, duration: float) -> dict:
+    send = SCENARIOS[name]
+    latencies, statuses = [], {}
+    limits = httpx.Limits(max_connections=concurrency + 2, max_keepalive_connections=concurrency + 2)
+    async with httpx.AsyncClient(base_url=app_url, cookies=cookies, timeout=120, limits=limits) as client, \
+            httpx.AsyncClient(base_url=fake_url) as fake:
+        await send(client)  # warm-up, not measured
+        await fake.post("/_fake/reset")
+        lag_before = await loop_lag_snapshot(client)
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = (await send(client)).status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        lag = loop_lag_delta(lag_before, await loop_lag_snapshot(client))
+        upstream = (await fake.get("/_fake/stats")).json()["total"]
+
+    latencies.sort()
+    requests = len(latencies)
+    errors = sum(n for status, n in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0,
+        "loop_lag": lag,
+        "upstream_calls_per_request": round(upstream / requests, 2) if requests else None,
+    }
+
+
+# ============ Reporting ============
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results: dict):
+    print(f"\n{'scenario':<16} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7} {'lag':>7} {'up/req':>7}")
+    for name, r in results.items():
+        lag = r["loop_lag"]["mean_ms"]
+        print(
+            f"{name:<16} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['errors']:>7} {'-' if lag is None else f'{lag:.1f}':>7} "
+            f"{'-' if r['upstream_calls_per_request'] is None else r['upstream_calls_per_request']:>7}"
+        )
+    print("(latencies in ms; lag = mean event loop lag in ms; up/req = fake Google calls per request)")
+
+
+def compare(results: dict, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {os.path.basename(baseline_path)} ({baseline.get('label')}, {baseline.get('revision')}):")
+    regressions = 0
+    for name, r in results.items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            continue
+        notes = []
+        for key, higher_is_worse in (("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("throughput_rps", False)):
+            if not old[key]:
+                continue
+            change = (r[key] - old[key]) / old[key]
+            worse = change > threshold if higher_is_worse else change < -threshold
+            regressions += worse
+            notes.append(f"{key} {old[key]:.1f}->{r[key]:.1f} ({change:+.0%}){' REGRESSION' if worse else ''}")
+        print(f"  {name:<16} " + ", ".join(notes))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-d", "--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--latency-ms", type=float, default=80, help="fake Google latency")
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake Google calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--eval-latency-ms", type=float, default=1500, help="stubbed evaluation duration")
+    parser.add_argument("--stall-ms", type=int, default=250, help="log loop stalls longer than this")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE", help="extra app env")
+    parser.add_argument("--label", default="", help="name stored with the results")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (have: {', '.join(SCENARIOS)})")
+
+    workdir = tempfile.mkdtemp(prefix="lifeops-bench-")
+    app_url, fake_url, procs = start_servers(args, workdir)
+    results = {}
+    index_mismatches = 0
+    try:
+        cookies = sign_in(app_url)
+        if "drive_search" in names:
+            index_mismatches = check_drive_index(app_url, fake_url, cookies)
+        for name in names:
+            print(f"[Bench] {name}: {args.concurrency} clients for {args.duration:.0f}s")
+            results[name] = asyncio.run(run_scenario(name, app_url, fake_url, cookies, args.concurrency, args.duration))
+    finally:
+        stop_servers(procs)
+    print(f"[Bench] App log: {os.path.join(workdir, 'app.log')}")
+
+    print_table(results)
+    revision = _git_revision()
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_path = os.path.join(RESULTS_DIR, f"{stamp}-{revision}{'-' + args.label if args.label else ''}.json")
+    with open(out_path, "w") as f:
+        json.dump({
+            "label": args.label,
+            "revision": revision,
+            "timestamp": datetime.now().isoformat(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("compare", "scenarios")},
+            "scenarios": results,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"[Bench] Results: {out_path}")
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) or index_mismatches else 0
+    return 1 if index_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
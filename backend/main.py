@@ -4,13 +4,35 @@ LifeOps Backend - Google OAuth with refresh token support
 
 import os
 import json
-from datetime import datetime
-from typing import Optional
-from contextlib import asynccontextmanager
+import codecs
+import fcntl
+import contextvars
+import cProfile
+import functools
+import hashlib
+import heapq
+import inspect
+import io
+import marshal
+import mmap
+import multiprocessing
+import pstats
+import queue
+import random
+import re
+import secrets
+import sqlite3
+import struct
+import tempfile
+from datetime import datetime, timezone, timedelta
+from typing import Any, Optional
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qs
 
 from fastapi import FastAPI, HTTPException, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, JSONResponse, Response
+from fastapi.responses import RedirectResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -18,10 +40,22 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request as GoogleRequest
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+import google_auth_httplib2
+import httplib2
 
 import asyncio
 import subprocess
+import anthropic
 import shutil
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter as _TallyCounter, OrderedDict
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 load_dotenv()
 
@@ -29,8 +63,94 @@ load_dotenv()
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
+# Legacy single-account token file; migrated into the account table on startup
 TOKEN_PATH = os.getenv("TOKEN_PATH", "./tokens.json")
+# Session cookie mapping a browser to its Google account
+SESSION_COOKIE = os.getenv("SESSION_COOKIE", "lifeops_session")
+SESSION_TTL = int(os.getenv("SESSION_TTL", 180 * 24 * 3600))
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "false").lower() == "true"
+SESSION_COOKIE_SAMESITE = os.getenv("SESSION_COOKIE_SAMESITE", "lax")
+# Live Credentials objects kept in memory (LRU over accounts)
+ACCOUNT_CACHE_SIZE = int(os.getenv("ACCOUNT_CACHE_SIZE", 32))
 PORT = int(os.getenv("PORT", 8000))
+# Override Google endpoints (e.g. the local fake server in bench/); empty uses Google
+GOOGLE_API_ENDPOINT = os.getenv("GOOGLE_API_ENDPOINT", "")
+GOOGLE_TOKEN_URI = os.getenv("GOOGLE_TOKEN_URI", "https://oauth2.googleapis.com/token")
+# Max concurrent blocking Google API calls (googleapiclient is synchronous)
+GOOGLE_MAX_WORKERS = int(os.getenv("GOOGLE_MAX_WORKERS", 16))
+# Per-API request rate ceiling toward Google (req/s); GOOGLE_RATE_LIMITS overrides
+# per API, e.g. "sheets=1,drive=8". The limiter slows down on 429 and recovers.
+GOOGLE_RATE_LIMIT = float(os.getenv("GOOGLE_RATE_LIMIT", 20))
+GOOGLE_RATE_LIMITS = {
+    api.strip(): float(rate)
+    for api, _, rate in (item.partition("=") for item in os.getenv("GOOGLE_RATE_LIMITS", "").split(","))
+    if api.strip() and rate
+}
+# Retries for idempotent calls on 429 / 5xx / connection errors (jittered exponential backoff)
+GOOGLE_MAX_RETRIES = int(os.getenv("GOOGLE_MAX_RETRIES", 3))
+GOOGLE_RETRY_BASE = float(os.getenv("GOOGLE_RETRY_BASE", 0.5))
+GOOGLE_RETRY_MAX = float(os.getenv("GOOGLE_RETRY_MAX", 30))
+# Renew the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 300))
+# Read-through cache for the GET proxies (0 disables)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 512))
+# Serve calendar events / tasks from an incrementally synced local mirror
+SYNC_ENABLED = os.getenv("SYNC_ENABLED", "true").lower() == "true"
+# Minimum seconds between delta pulls for the same calendar / task list
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL", 15))
+# How far back / ahead the calendar mirror reaches (queries outside go to the API)
+SYNC_PAST_DAYS = int(os.getenv("SYNC_PAST_DAYS", 365))
+SYNC_FUTURE_DAYS = int(os.getenv("SYNC_FUTURE_DAYS", 365))
+# Acknowledge Sheets value writes immediately and flush them in coalesced batches
+SHEETS_WRITE_BEHIND = os.getenv("SHEETS_WRITE_BEHIND", "false").lower() == "true"
+# Seconds to collect writes per spreadsheet before flushing
+SHEETS_WRITE_WINDOW = float(os.getenv("SHEETS_WRITE_WINDOW", 2))
+# Failed flushes in a row before a spreadsheet's queued writes are dead-lettered
+SHEETS_FLUSH_MAX_ATTEMPTS = int(os.getenv("SHEETS_FLUSH_MAX_ATTEMPTS", 5))
+# Merge Docs edits that arrive while a batchUpdate for the same document is in flight
+DOCS_EDIT_MERGE = os.getenv("DOCS_EDIT_MERGE", "true").lower() == "true"
+# Extra seconds to wait for more edits before sending (adds latency to every edit)
+DOCS_EDIT_WINDOW = float(os.getenv("DOCS_EDIT_WINDOW", 0))
+# Answer Drive file listings from a local metadata index kept current with changes.list
+DRIVE_INDEX_ENABLED = os.getenv("DRIVE_INDEX_ENABLED", "true").lower() == "true"
+# Seconds before a query triggers a background changes.list pull
+DRIVE_INDEX_INTERVAL = float(os.getenv("DRIVE_INDEX_INTERVAL", 30))
+# PDF render worker processes (0 renders on the Google thread pool instead)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 2))
+# Rendered PDFs kept by content hash
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", 32))
+# Directory for runtime state (kept out of the source tree)
+STATE_DIR = os.path.expanduser(os.getenv("STATE_DIR") or os.path.join(
+    os.getenv("XDG_STATE_HOME") or "~/.local/state", "lifeops"
+))
+# SQLite file for state shared between worker processes
+STATE_DB_PATH = os.getenv("STATE_DB_PATH") or os.path.join(STATE_DIR, "lifeops-state.db")
+# Journal of write-behind Sheets writes not yet flushed (one file per worker)
+SHEETS_JOURNAL_PATH = os.getenv("SHEETS_JOURNAL_PATH") or os.path.join(STATE_DIR, "sheets-journal.jsonl")
+# Uvicorn worker processes (the same variable uvicorn reads for --workers)
+WORKERS = max(int(os.getenv("WEB_CONCURRENCY", 1)), 1)
+# Directory for cross-process lock files
+LOCK_DIR = os.getenv("LOCK_DIR") or STATE_DB_PATH + ".locks"
+# Prepared report tokens: lifetime and size budget
+REPORT_TTL = int(os.getenv("REPORT_TTL", 600))
+REPORT_MAX_ENTRIES = int(os.getenv("REPORT_MAX_ENTRIES", 200))
+REPORT_MAX_BYTES = int(os.getenv("REPORT_MAX_BYTES", 20 * 1024 * 1024))
+# Cached /api/evaluate results (seconds; 0 disables)
+EVAL_CACHE_TTL = int(os.getenv("EVAL_CACHE_TTL", 6 * 3600))
+# Evaluation job queue: concurrent claude processes, waiting jobs, per-job timeout
+EVAL_MAX_CONCURRENCY = int(os.getenv("EVAL_MAX_CONCURRENCY", 2))
+EVAL_QUEUE_MAX = int(os.getenv("EVAL_QUEUE_MAX", 20))
+EVAL_TIMEOUT = int(os.getenv("EVAL_TIMEOUT", 120))
+# Evaluation engine: "cli" (claude -p subprocess) or "sdk" (Anthropic API, needs ANTHROPIC_API_KEY)
+EVAL_ENGINE = os.getenv("EVAL_ENGINE", "cli")
+EVAL_MODEL = os.getenv("EVAL_MODEL", "claude-sonnet-4-20250514")
+EVAL_MAX_TOKENS = int(os.getenv("EVAL_MAX_TOKENS", 2048))
+ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")
+# Log the event loop's stack when it is blocked longer than this (ms; 0 disables)
+LOOP_LAG_THRESHOLD_MS = int(os.getenv("LOOP_LAG_THRESHOLD_MS", 0))
+# Allow per-request profiling via the X-Profile header or ?__profile= (dev only)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
 
 SCOPES = [
     "openid",
@@ -42,62 +162,186 @@ SCOPES = [
     "https://www.googleapis.com/auth/userinfo.email",
 ]
 
-# In-memory token storage (loaded from file)
-tokens: dict = {}
+# Account whose Google credentials the current request uses (set by AccountMiddleware)
+_current_account: contextvars.ContextVar = contextvars.ContextVar("current_account", default=None)
+# Account that owns Sheets writes journaled before accounts existed
+_default_account: Optional[str] = None
 
+# Live credentials per account (LRU); the account table is the source of truth
+_live_credentials: OrderedDict = OrderedDict()
+_refresh_tasks: dict = {}  # account_id -> asyncio.Task
 
-def load_tokens():
-    """Load tokens from file"""
-    global tokens
-    if os.path.exists(TOKEN_PATH):
-        with open(TOKEN_PATH, "r") as f:
-            tokens = json.load(f)
-    return tokens
 
+def current_account() -> Optional[str]:
+    return _current_account.get()
 
-def save_tokens():
-    """Save tokens to file"""
-    with open(TOKEN_PATH, "w") as f:
-        json.dump(tokens, f, indent=2)
 
+def load_accounts():
+    """Migrate a legacy tokens.json into the account table and pick the default account"""
+    global _default_account
+    # Every worker runs this at startup; only one may migrate the file
+    with file_lock("migrate-tokens"):
+        if os.path.exists(TOKEN_PATH):
+            with open(TOKEN_PATH, "r") as f:
+                legacy = json.load(f)
+            if legacy.get("refresh_token") or legacy.get("access_token"):
+                account_id = account_store.import_legacy(legacy)
+                if account_id:
+                    print(f"[Auth] Migrated {TOKEN_PATH} to account {account_id}")
+            os.replace(TOKEN_PATH, TOKEN_PATH + ".migrated")
+    _default_account = account_store.default_account()
+    return account_store.count()
 
-def get_credentials() -> Optional[Credentials]:
-    """Get valid credentials, refreshing if necessary"""
-    if not tokens:
-        return None
 
+def _credentials_from_account(account: dict) -> Credentials:
+    """Build a Credentials object from an account row"""
     # Parse expiry time
     expiry = None
-    if tokens.get("expiry"):
+    if account.get("expiry"):
         try:
-            expiry = datetime.fromisoformat(tokens["expiry"])
+            expiry = datetime.fromisoformat(account["expiry"])
         except ValueError:
             pass
 
-    creds = Credentials(
-        token=tokens.get("access_token"),
-        refresh_token=tokens.get("refresh_token"),
-        token_uri="https://oauth2.googleapis.com/token",
+    return Credentials(
+        token=account.get("access_token"),
+        refresh_token=account.get("refresh_token"),
+        token_uri=GOOGLE_TOKEN_URI,
         client_id=GOOGLE_CLIENT_ID,
         client_secret=GOOGLE_CLIENT_SECRET,
         scopes=SCOPES,
         expiry=expiry,
     )
 
+
+def _remember_credentials(account_id: str, creds: Credentials):
+    _live_credentials[account_id] = creds
+    _live_credentials.move_to_end(account_id)
+    while len(_live_credentials) > ACCOUNT_CACHE_SIZE:
+        _live_credentials.popitem(last=False)
+
+
+def forget_credentials(account_id: str):
+    _live_credentials.pop(account_id, None)
+
+
+async def load_credentials(account_id: str) -> Optional[Credentials]:
+    """Live credentials for an account, loading them from the account table on a miss"""
+    creds = _live_credentials.get(account_id)
+    if creds is not None:
+        _live_credentials.move_to_end(account_id)
+        return creds
+    account = await run_blocking(account_store.get, account_id)
+    if account is None:
+        return None
+    # Another request may have loaded it meanwhile; keep the first one
+    creds = _live_credentials.get(account_id) or _credentials_from_account(account)
+    _remember_credentials(account_id, creds)
+    return creds
+
+
+def _seconds_until_expiry(creds: Credentials) -> Optional[float]:
+    if creds.expiry is None:
+        return None
+    # google-auth keeps expiry as naive UTC
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return (creds.expiry - now).total_seconds()
+
+
+def _refresh_locked(account_id: str, creds: Credentials):
+    """Refresh under the account's cross-process lock (blocking).
+
+    Returns (credentials, refreshed). Another worker may have refreshed
+    while we waited for the lock; its token is adopted instead of spending
+    a second refresh on the same account.
+    """
+    with file_lock(f"refresh-{hashlib.sha1(account_id.encode()).hexdigest()[:16]}"):
+        account = account_store.get(account_id)
+        if account is None:
+            return None, False
+        if account["access_token"] != creds.token:
+            stored = _credentials_from_account(account)
+            remaining = _seconds_until_expiry(stored)
+            if remaining is not None and remaining > TOKEN_REFRESH_MARGIN:
+                return stored, False
+
+        creds.refresh(GoogleRequest())
+        expiry = creds.expiry.isoformat() if creds.expiry else None
+        if not account_store.update_token(account_id, creds.token, expiry):
+            return None, True
+        return creds, True
+
+
+async def _refresh(account_id: str, creds: Credentials) -> Optional[Credentials]:
+    started = time.perf_counter()
+    try:
+        refreshed, did_refresh = await run_blocking(_refresh_locked, account_id, creds)
+    except Exception as e:
+        token_refresh_duration.observe(time.perf_counter() - started, "error")
+        print(f"[Auth] Token refresh failed for {account_id}: {e}")
+        return None
+    if did_refresh:
+        token_refresh_duration.observe(time.perf_counter() - started, "ok")
+    if refreshed is None:
+        # Logged out while refreshing
+        forget_credentials(account_id)
+        return None
+
+    # Re-logged in while refreshing
+    current = _live_credentials.get(account_id)
+    if current is not None and current is not creds:
+        return current
+    if refreshed is not creds:
+        _remember_credentials(account_id, refreshed)
+    return refreshed
+
+
+async def refresh_credentials(account_id: str) -> Optional[Credentials]:
+    """Refresh one account's credentials; concurrent callers share one refresh"""
+    creds = await load_credentials(account_id)
+    if creds is None or not creds.refresh_token:
+        return None
+
+    task = _refresh_tasks.get(account_id)
+    if task is None or task.done():
+        task = _refresh_tasks[account_id] = asyncio.create_task(_refresh(account_id, creds))
+    # Shield so a cancelled request doesn't abort the refresh other callers wait on
+    return await asyncio.shield(task)
+
+
+async def get_credentials(account_id: Optional[str] = None) -> Optional[Credentials]:
+    """Get valid credentials for the request's account, refreshing if necessary"""
+    account_id = account_id or current_account()
+    if account_id is None:
+        return None
+    creds = await load_credentials(account_id)
+    if creds is None:
+        return None
+
     # Refresh if expired or no expiry set
-    if (creds.expired or expiry is None) and creds.refresh_token:
-        try:
-            creds.refresh(GoogleRequest())
-            tokens["access_token"] = creds.token
-            tokens["expiry"] = creds.expiry.isoformat() if creds.expiry else None
-            save_tokens()
-        except Exception as e:
-            print(f"[Auth] Token refresh failed: {e}")
-            return None
+    if (creds.expired or creds.expiry is None) and creds.refresh_token:
+        return await refresh_credentials(account_id)
 
     return creds
 
 
+async def token_renewal_loop():
+    """Renew live access tokens shortly before they expire, off the request path"""
+    while True:
+        # Wake at least every minute so logins are picked up
+        delay = 60.0
+        for account_id, creds in list(_live_credentials.items()):
+            if not creds.refresh_token:
+                continue
+            remaining = _seconds_until_expiry(creds)
+            due_in = 0 if remaining is None else remaining - TOKEN_REFRESH_MARGIN
+            if due_in > 0:
+                delay = min(delay, due_in)
+            elif await refresh_credentials(account_id) is None:
+                print(f"[Auth] Background renewal failed for {account_id}")
+        await asyncio.sleep(max(delay, 1))
+
+
 def create_oauth_flow(redirect_uri: str) -> Flow:
     """Create OAuth flow"""
     client_config = {
@@ -105,7 +349,7 @@ def create_oauth_flow(redirect_uri: str) -> Flow:
             "client_id": GOOGLE_CLIENT_ID,
             "client_secret": GOOGLE_CLIENT_SECRET,
             "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
+            "token_uri": GOOGLE_TOKEN_URI,
             "redirect_uris": [redirect_uri],
         }
     }
@@ -116,18 +360,2103 @@ def create_oauth_flow(redirect_uri: str) -> Flow:
     )
 
 
+# ============ Metrics ============
+
+# Minimal Prometheus text-format metrics (no client library needed). Metrics are
+# updated from the event loop and from executor threads, hence the locks.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, *label_values):
+        return _Timer(self, label_values)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                bucket_labels = self.labels + ("le",)
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, values + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, values + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {series[-1]}")
+        return lines
+
+
+class _Timer:
+    """Context manager that observes elapsed seconds into a histogram"""
+
+    def __init__(self, histogram: Histogram, label_values: tuple):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+        return False
+
+
+class Gauge:
+    """Value read at scrape time from a callback"""
+
+    def __init__(self, name: str, help: str, read):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> list:
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+METRICS: list = []
+
+
+def register_metric(metric):
+    METRICS.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests_total = register_metric(Counter(
+    "lifeops_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"),
+))
+http_request_duration = register_metric(Histogram(
+    "lifeops_http_request_duration_seconds", "HTTP request latency (until the response body is sent)",
+    ("method", "route"),
+))
+google_requests_total = register_metric(Counter(
+    "lifeops_google_api_requests_total", "Google API calls by API, method and HTTP status",
+    ("api", "method", "status"),
+))
+google_request_duration = register_metric(Histogram(
+    "lifeops_google_api_duration_seconds", "Google API call latency (excluding executor queueing)",
+    ("api", "method", "status"),
+))
+token_refresh_duration = register_metric(Histogram(
+    "lifeops_token_refresh_duration_seconds", "OAuth access token refresh latency", ("outcome",),
+))
+pdf_render_duration = register_metric(Histogram(
+    "lifeops_pdf_render_duration_seconds", "PDF report latency by render cache status", ("cache",),
+))
+evaluation_duration = register_metric(Histogram(
+    "lifeops_evaluation_duration_seconds", "AI evaluation latency by engine and outcome",
+    ("engine", "outcome"), buckets=SLOW_BUCKETS,
+))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route on the scope; label by its
+            # template so /api/tasks/{tasklist_id} is one series, not one per id
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], template)
+            http_requests_total.inc(scope["method"], template, str(status))
+
+
+# ============ Diagnostics ============
+
+event_loop_lag = register_metric(Histogram(
+    "lifeops_event_loop_lag_seconds", "Event loop scheduling delay (only sampled when LOOP_LAG_THRESHOLD_MS is set)",
+))
+
+
+def _format_thread_stack(thread_id: int) -> str:
+    frame = sys._current_frames().get(thread_id)
+    return "".join(traceback.format_stack(frame)) if frame is not None else "(no frame)\n"
+
+
+class LoopLagMonitor:
+    """Detects event loop stalls and logs what the loop thread was running.
+
+    A coroutine on the loop bumps a heartbeat every few milliseconds; a plain
+    thread watches it and, once the loop misses the threshold, prints the loop
+    thread's current stack (the blocking call is still on it at that moment).
+    """
+
+    def __init__(self, threshold_ms: int):
+        self.threshold = threshold_ms / 1000
+        self.interval = max(self.threshold / 4, 0.005)
+        self.stalls = 0
+        self._beat = time.perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+        print(f"[LoopLag] Watching for event loop stalls over {self.threshold * 1000:.0f}ms")
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            event_loop_lag.observe(max(now - expected, 0))
+            self._beat = now
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            stalled = time.perf_counter() - beat
+            if stalled < self.threshold or reported == beat:
+                continue
+            # Report each stall once, while it is still in progress
+            reported = beat
+            self.stalls += 1
+            print(
+                f"[LoopLag] Event loop blocked for {stalled * 1000:.0f}ms+, loop thread stack:\n"
+                + _format_thread_stack(self._loop_thread)
+            )
+
+
+loop_lag_monitor = LoopLagMonitor(LOOP_LAG_THRESHOLD_MS) if LOOP_LAG_THRESHOLD_MS > 0 else None
+
+PROFILE_MODES = ("text", "pstats", "collapsed")
+PROFILE_SAMPLE_INTERVAL = 0.001
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's stack into folded (flame graph) form"""
+
+    def __init__(self, thread_id: int):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.samples = _TallyCounter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(PROFILE_SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        self._done.set()
+        self.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _profile_mode(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower()
+            return mode if mode in PROFILE_MODES else "text"
+    query = scope.get("query_string", b"")
+    if b"__profile" in query:
+        mode = parse_qs(query.decode("latin-1")).get("__profile", ["text"])[0].lower()
+        return mode if mode in PROFILE_MODES else "text"
+    return None
+
+
+class ProfilingMiddleware:
+    """Replaces the response with a profile of the request when asked to.
+
+    X-Profile: text|pstats|collapsed (or ?__profile=...). text/pstats come from
+    cProfile (pstats is a marshal dump loadable with pstats/snakeviz); collapsed
+    samples the loop thread's stack for flamegraph.pl / speedscope. Both see
+    everything on the event loop while the request runs, so profile an
+    otherwise idle server. Work on executor threads shows up as waiting.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = _profile_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        started = time.perf_counter()
+        if mode == "collapsed":
+            sampler = _StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                body = sampler.stop().encode("utf-8")
+            media_type = "text/plain; charset=utf-8"
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.disable()
+            profiler.create_stats()
+            if mode == "pstats":
+                body = marshal.dumps(profiler.stats)
+                media_type = "application/octet-stream"
+            else:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(60)
+                body = out.getvalue().encode("utf-8")
+                media_type = "text/plain; charset=utf-8"
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", media_type.encode()),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-mode", mode.encode()),
+                (b"x-profiled-status", str(status).encode()),
+                (b"server-timing", f"total;dur={elapsed_ms:.1f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# ============ Google API Execution ============
+
+# googleapiclient (httplib2) is blocking, so every upstream call runs on this
+# bounded pool instead of the event loop.
+_google_executor = ThreadPoolExecutor(
+    max_workers=GOOGLE_MAX_WORKERS,
+    thread_name_prefix="google-api",
+)
+
+register_metric(Gauge(
+    "lifeops_google_executor_queue_depth", "Blocking calls waiting for a Google API pool thread",
+    lambda: _google_executor._work_queue.qsize(),
+))
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function on the Google API thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _google_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+# Process-wide service objects keyed by (api, version). They are built once from
+# the discovery documents bundled with googleapiclient and carry no credentials;
+# each call binds its own credentials through an AuthorizedHttp.
+GOOGLE_APIS = [
+    ("calendar", "v3"),
+    ("tasks", "v1"),
+    ("sheets", "v4"),
+    ("drive", "v3"),
+    ("docs", "v1"),
+    ("oauth2", "v2"),
+]
+
+_services: dict = {}
+_services_lock = threading.Lock()
+# httplib2.Http is not thread-safe; each pool thread keeps its own connection
+_thread_local = threading.local()
+
+
+def get_service(api: str, version: str):
+    """Get a shared service object, building it on first use"""
+    key = (api, version)
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = build(
+                    api,
+                    version,
+                    http=httplib2.Http(),
+                    static_discovery=True,
+                    cache_discovery=False,
+                    client_options=(
+                        {"api_endpoint": GOOGLE_API_ENDPOINT.rstrip("/") + "/"} if GOOGLE_API_ENDPOINT else None
+                    ),
+                )
+                _services[key] = service
+    return service
+
+
+def warm_services():
+    """Build every service up front so the first request doesn't pay for it"""
+    for api, version in GOOGLE_APIS:
+        get_service(api, version)
+
+
+def _authorized_http(creds: Credentials) -> google_auth_httplib2.AuthorizedHttp:
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = _thread_local.http = httplib2.Http()
+    return google_auth_httplib2.AuthorizedHttp(creds, http=http)
+
+
+def _execute_with(request, creds: Credentials):
+    api, _, method = (getattr(request, "methodId", None) or "unknown.unknown").partition(".")
+    status = "200"
+    started = time.perf_counter()
+    try:
+        return request.execute(http=_authorized_http(creds))
+    except HttpError as e:
+        status = str(e.resp.status)
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        google_request_duration.observe(time.perf_counter() - started, api, method, status)
+        google_requests_total.inc(api, method, status)
+
+
+# ---- Rate limiting / retries ----
+
+# Lower value = served first when an API's bucket is empty
+PRIORITY_INTERACTIVE = 0  # reads a user is waiting on
+PRIORITY_WRITE = 1  # user-initiated writes
+PRIORITY_BACKGROUND = 2  # write-behind flushes, bulk batches
+
+_google_priority: contextvars.ContextVar = contextvars.ContextVar("google_priority", default=None)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+google_retries_total = register_metric(Counter(
+    "lifeops_google_api_retries_total", "Retried Google API calls by API and cause", ("api", "cause"),
+))
+google_throttled_total = register_metric(Counter(
+    "lifeops_google_api_throttled_total", "Rate-limit responses from Google by API", ("api",),
+))
+
+
+@contextmanager
+def google_priority(priority: int):
+    """Run Google calls made inside the block (and tasks it spawns) at this priority"""
+    token = _google_priority.set(priority)
+    try:
+        yield
+    finally:
+        _google_priority.reset(token)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket for one Google API that adapts to the quota it runs into.
+
+    A 429 (or 403 rateLimitExceeded) halves the rate and pauses the bucket for
+    Retry-After; each success creeps the rate back toward the configured
+    ceiling. When callers have to wait, they are served by priority, then FIFO.
+    A caller can take several tokens at once (a batch of requests); one larger
+    than the burst goes out once a full burst is available and leaves the
+    bucket in debt, so the average rate still holds.
+    """
+
+    MIN_RATE = 0.2
+
+    def __init__(self, api: str, rate: float):
+        self.api = api
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(rate * 2, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._waiters: list = []  # heap of (priority, seq, tokens, future)
+        self._seq = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: int, tokens: int = 1):
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiters and now >= self.blocked_until and self.tokens >= min(tokens, self.burst):
+            self.tokens -= tokens
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiters, (priority, self._seq, tokens, future))
+        if self._timer is None:
+            self._dispatch()
+        # A cancelled waiter's future is skipped by _dispatch
+        await future
+
+    def _dispatch(self):
+        self._timer = None
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if now < self.blocked_until:
+                delay = self.blocked_until - now
+                break
+            need = min(tokens, self.burst)
+            if self.tokens < need:
+                delay = (need - self.tokens) / self.rate
+                break
+            heapq.heappop(self._waiters)
+            self.tokens -= tokens
+            future.set_result(None)
+        else:
+            return
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def throttled(self, retry_after: Optional[float]):
+        self.rate = max(self.rate / 2, self.MIN_RATE)
+        self.tokens = min(self.tokens, 0)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        google_throttled_total.inc(self.api)
+        print(f"[RateLimit] {self.api}: throttled, now {self.rate:.2f} req/s, paused {pause:.1f}s")
+        if self._waiters and self._timer is not None:
+            self._timer.cancel()
+            self._dispatch()
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.02)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "tokens": round(self.tokens, 2),
+            "waiting": sum(1 for *_, future in self._waiters if not future.done()),
+            "paused_for": round(max(self.blocked_until - time.monotonic(), 0), 2),
+        }
+
+
+_rate_limiters: dict = {}
+
+
+def rate_limiter(api: str) -> AdaptiveRateLimiter:
+    limiter = _rate_limiters.get(api)
+    if limiter is None:
+        # Quota is per project, so each worker process gets an equal share
+        rate = GOOGLE_RATE_LIMITS.get(api, GOOGLE_RATE_LIMIT) / WORKERS
+        limiter = _rate_limiters[api] = AdaptiveRateLimiter(api, rate)
+    return limiter
+
+
+def _error_reason(e: HttpError) -> Optional[str]:
+    try:
+        return json.loads(e.content)["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def _is_rate_limited(e: HttpError) -> bool:
+    return e.resp.status == 429 or (e.resp.status == 403 and _error_reason(e) in RATE_LIMIT_REASONS)
+
+
+def _is_permanent_error(e: Exception) -> bool:
+    """A Google error that sending the same request again won't fix"""
+    return (
+        isinstance(e, HttpError)
+        and 400 <= e.resp.status < 500
+        and e.resp.status not in (401, 408, 429)
+        and not _is_rate_limited(e)
+    )
+
+
+def _retry_after(e: HttpError) -> Optional[float]:
+    value = e.resp.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            return None
+
+
+def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+    # Full jitter, but never sooner than the server asked for
+    delay = random.uniform(0, min(GOOGLE_RETRY_MAX, GOOGLE_RETRY_BASE * 2 ** attempt))
+    return max(delay, retry_after or 0)
+
+
+def google_error(e: Exception) -> HTTPException:
+    """Map a failed Google call to the HTTPException the proxies return"""
+    if isinstance(e, HTTPException):
+        return e
+    if not isinstance(e, HttpError):
+        return HTTPException(status_code=500, detail=str(e))
+    status = e.resp.status
+    if _is_rate_limited(e):
+        retry_after = _retry_after(e)
+        return HTTPException(
+            status_code=429,
+            detail=f"Google API rate limit exceeded: {e.reason}",
+            headers={"Retry-After": str(max(int(retry_after or 1), 1))},
+        )
+    if status in (400, 401, 403, 404, 409, 410, 412):
+        return HTTPException(status_code=status, detail=e.reason or str(e))
+    if status >= 500:
+        return HTTPException(status_code=502, detail=f"Google API error {status}: {e.reason}")
+    return HTTPException(status_code=500, detail=str(e))
+
+
+async def execute(request, creds: Credentials, idempotent: Optional[bool] = None):
+    """Execute a googleapiclient request with the given credentials, off the event loop.
+
+    Calls pass through the API's rate limiter; idempotent ones (GET/PUT unless
+    told otherwise) are retried on 429, 5xx and connection errors.
+    """
+    api = (getattr(request, "methodId", None) or "unknown").split(".", 1)[0]
+    method = getattr(request, "method", "GET")
+    if idempotent is None:
+        idempotent = method in ("GET", "PUT")
+    priority = _google_priority.get()
+    if priority is None:
+        priority = PRIORITY_INTERACTIVE if method == "GET" else PRIORITY_WRITE
+    limiter = rate_limiter(api)
+
+    attempt = 0
+    while True:
+        await limiter.acquire(priority)
+        try:
+            result = await run_blocking(_execute_with, request, creds)
+            limiter.succeeded()
+            return result
+        except HttpError as e:
+            retry_after = None
+            if _is_rate_limited(e):
+                retry_after = _retry_after(e)
+                limiter.throttled(retry_after)
+            elif e.resp.status not in RETRY_STATUSES:
+                raise
+            if not idempotent or attempt >= GOOGLE_MAX_RETRIES:
+                raise
+            cause = str(e.resp.status)
+        except (ConnectionError, TimeoutError, httplib2.HttpLib2Error) as e:
+            if not idempotent or attempt >= GOOGLE_MAX_RETRIES:
+                raise
+            retry_after = None
+            cause = type(e).__name__
+        attempt += 1
+        google_retries_total.inc(api, cause)
+        await asyncio.sleep(_backoff(attempt, retry_after))
+
+
+# ============ Response Cache ============
+
+# TTL (seconds) per cached route, overridable with CACHE_TTL_<ROUTE>
+CACHE_TTLS = {
+    route: float(os.getenv(f"CACHE_TTL_{route.upper()}", default))
+    for route, default in {
+        "calendar_events": 30,
+        "task_lists": 60,
+        "tasks": 30,
+        "sheet_values": 15,
+        "sheet_batch_get": 15,
+        # Parsed tables for /query; writes to the spreadsheet evict them
+        "sheet_table": 300,
+        "drive_files": 60,
+    }.items()
+}
+
+
+class ResponseCache:
+    """In-process TTL/LRU cache for upstream responses.
+
+    Identical concurrent loads share one upstream call, and entries are
+    tagged (e.g. ("sheets", spreadsheet_id)) so writes can evict exactly
+    the responses they affect. Keys and tags are scoped to the request's
+    account, so accounts never see each other's responses.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, tags, value)
+        self._inflight: dict = {}  # key -> asyncio.Future
+        self._tag_keys: dict = {}  # tag -> set of keys
+        self._tag_generations: dict = {}  # tag -> invalidation count
+        self.evictions = 0
+        self.stats_by_route: dict = {}
+
+    @staticmethod
+    def make_key(route: str, params: dict) -> tuple:
+        return (route, tuple(sorted((k, str(v)) for k, v in params.items() if v is not None)))
+
+    def _count(self, route: str, field: str):
+        stats = self.stats_by_route.setdefault(
+            route, {"hits": 0, "misses": 0, "coalesced": 0}
+        )
+        stats[field] += 1
+
+    async def get_or_load(self, route: str, params: dict, loader, tags: list):
+        """Return a cached value or load it, sharing in-flight loads"""
+        ttl = CACHE_TTLS.get(route, 0)
+        if self.max_entries <= 0 or ttl <= 0:
+            return await loader()
+
+        account = current_account()
+        key = (account,) + self.make_key(route, params)
+        tags = [(account,)] + [(account,) + tuple(tag) for tag in tags]
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(route, "hits")
+                return value
+            self._remove(key)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._count(route, "coalesced")
+            return await asyncio.shield(future)
+
+        self._count(route, "misses")
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generations = [self._tag_generations.get(tag, 0) for tag in tags]
+        try:
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so unobserved failures don't log warnings
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Don't store a response that a write invalidated while loading
+            if generations == [self._tag_generations.get(tag, 0) for tag in tags]:
+                self._store(key, value, ttl, tags)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: tuple, value, ttl: float, tags: list):
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, tags, value)
+        for tag in tags:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def invalidate(self, *tags, account: Optional[str] = None):
+        """Evict the account's entries carrying any of the given tags, in every worker"""
+        if account is None:
+            account = current_account()
+        self._invalidate([(account,) + tuple(tag) for tag in tags])
+        worker_events.publish("cache", account, [list(tag) for tag in tags])
+
+    def _invalidate(self, tags: list):
+        for tag in tags:
+            self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+            for key in list(self._tag_keys.get(tag, ())):
+                self._remove(key)
+
+    def clear(self, account: Optional[str] = None):
+        """Drop one account's entries, or everything"""
+        if account is not None:
+            self._invalidate([(account,)])
+            return
+        for key in list(self._entries):
+            self._remove(key)
+        self._tag_generations.clear()
+
+    def stats(self) -> dict:
+        hits = sum(s["hits"] for s in self.stats_by_route.values())
+        misses = sum(s["misses"] for s in self.stats_by_route.values())
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+            "ttl": CACHE_TTLS,
+            "routes": self.stats_by_route,
+        }
+
+
+response_cache = ResponseCache(CACHE_MAX_ENTRIES)
+
+
+# ============ Incremental Sync ============
+
+
+def _parse_rfc3339(value: str, tz=timezone.utc) -> datetime:
+    """Parse an RFC3339 timestamp or YYYY-MM-DD date into an aware datetime"""
+    if len(value) == 10:
+        return datetime.fromisoformat(value).replace(tzinfo=tz)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _calendar_window() -> tuple:
+    """Time range a calendar mirror synced now would hold"""
+    now = _utc_now()
+    return now - timedelta(days=SYNC_PAST_DAYS), now + timedelta(days=SYNC_FUTURE_DAYS)
+
+
+class CalendarMirror:
+    """Local copy of one calendar's (expanded) events plus its syncToken.
+
+    The full sync is bounded to [window_start, window_end), so recurring
+    events without an end expand into a finite number of instances; later
+    delta pulls can't be bounded (Google rejects timeMin/timeMax with a
+    syncToken) but only changes arrive that way.
+    """
+
+    def __init__(self, calendar_id: str):
+        self.calendar_id = calendar_id
+        self.events: dict = {}
+        self.sync_token: Optional[str] = None
+        self.time_zone = timezone.utc
+        self.window_start: Optional[datetime] = None
+        self.window_end: Optional[datetime] = None
+        self.synced_at = 0.0
+        self.stale = True
+
+    def _bounds(self, event: dict):
+        start, end = event.get("start", {}), event.get("end", {})
+        start_value = start.get("dateTime") or start.get("date")
+        end_value = end.get("dateTime") or end.get("date") or start_value
+        if not start_value:
+            return None
+        return (
+            _parse_rfc3339(start_value, self.time_zone),
+            _parse_rfc3339(end_value, self.time_zone),
+        )
+
+    def covers(self, time_min: Optional[str], time_max: Optional[str]) -> bool:
+        if time_min is None or time_max is None or self.window_start is None:
+            return False
+        return _parse_rfc3339(time_min) >= self.window_start and _parse_rfc3339(time_max) <= self.window_end
+
+    def query(self, time_min: Optional[str], time_max: Optional[str], max_results: int) -> list:
+        """Same semantics as events.list(singleEvents=True, orderBy=startTime)"""
+        lower = _parse_rfc3339(time_min) if time_min else None
+        upper = _parse_rfc3339(time_max) if time_max else None
+        matches = []
+        for event in self.events.values():
+            bounds = self._bounds(event)
+            if bounds is None:
+                continue
+            start, end = bounds
+            # timeMin bounds the end time, timeMax bounds the start time (both exclusive)
+            if lower is not None and end <= lower:
+                continue
+            if upper is not None and start >= upper:
+                continue
+            matches.append((start, event))
+        matches.sort(key=lambda m: m[0])
+        return [event for _, event in matches[:max_results]]
+
+
+class TaskListMirror:
+    """Local copy of one task list, kept current via updatedMin.
+
+    Tasks are returned in the order tasks.list returned them at the full
+    sync; updated tasks keep their place and tasks created since then
+    follow at the end until the next full sync.
+    """
+
+    def __init__(self, tasklist_id: str):
+        self.tasklist_id = tasklist_id
+        self.tasks: dict = {}
+        self.updated_min: Optional[str] = None
+        self.synced_at = 0.0
+        self.stale = True
+
+    def query(self, max_results: Optional[int]) -> list:
+        return list(self.tasks.values())[:max_results]
+
+
+class SyncEngine:
+    """Keeps calendar/task mirrors current with delta pulls.
+
+    The first read of a calendar or task list does a full fetch; later
+    reads pull only changes (Calendar syncToken, Tasks updatedMin) at most
+    once per SYNC_INTERVAL unless a write marked the mirror stale. A 410
+    Gone from Google discards the mirror and triggers a full resync.
+    """
+
+    def __init__(self):
+        self._calendars: dict = {}
+        self._tasklists: dict = {}
+        self._locks: dict = {}
+
+    def _lock(self, key: tuple) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _fresh(mirror) -> bool:
+        return not mirror.stale and time.monotonic() - mirror.synced_at < SYNC_INTERVAL
+
+    def mark_stale(self, kind: str, key: str):
+        """Make the next read of a mirror pull changes, in every worker"""
+        self.mark_stale_many([(kind, key)])
+
+    def mark_stale_many(self, mirrors: list):
+        """mark_stale for several (kind, key) mirrors with one worker event"""
+        account = current_account()
+        for kind, key in mirrors:
+            self._mark_stale(account, kind, key)
+        worker_events.publish("stale", account, [list(mirror) for mirror in mirrors])
+
+    def _mark_stale(self, account: Optional[str], kind: str, key: str):
+        mirrors = self._calendars if kind == "calendar" else self._tasklists
+        mirror = mirrors.get((account, key))
+        if mirror is not None:
+            mirror.stale = True
+
+    def clear(self, account: Optional[str] = None):
+        """Drop one account's mirrors, or all of them"""
+        for mirrors in (self._calendars, self._tasklists):
+            for key in list(mirrors):
+                if account is None or key[0] == account:
+                    del mirrors[key]
+
+    @staticmethod
+    def _drifted(mirror: CalendarMirror, time_min: Optional[str], time_max: Optional[str]) -> bool:
+        """The query falls outside the mirror's window but inside the one a full sync would take now"""
+        if mirror.window_start is None or mirror.covers(time_min, time_max) or None in (time_min, time_max):
+            return False
+        window_start, window_end = _calendar_window()
+        return _parse_rfc3339(time_min) >= window_start and _parse_rfc3339(time_max) <= window_end
+
+    async def calendar(
+        self, calendar_id: str, creds: Credentials, time_min: Optional[str] = None, time_max: Optional[str] = None
+    ) -> CalendarMirror:
+        # Mirrors are per account: two people's "primary" are different calendars
+        key = (current_account(), calendar_id)
+        mirror = self._calendars.get(key)
+        if mirror is not None and self._fresh(mirror) and not self._drifted(mirror, time_min, time_max):
+            return mirror
+        async with self._lock(("calendar",) + key):
+            mirror = self._calendars.setdefault(key, CalendarMirror(calendar_id))
+            if self._drifted(mirror, time_min, time_max):
+                # The window was fixed at the last full sync and time has moved on
+                print(f"[Sync] Calendar {calendar_id}: query outside the synced window, full resync")
+                mirror = self._calendars[key] = CalendarMirror(calendar_id)
+            if self._fresh(mirror):
+                return mirror
+            try:
+                await self._sync_calendar(mirror, creds)
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                print(f"[Sync] Calendar {calendar_id} sync token expired, full resync")
+                mirror = self._calendars[key] = CalendarMirror(calendar_id)
+                await self._sync_calendar(mirror, creds)
+            return mirror
+
+    async def _sync_calendar(self, mirror: CalendarMirror, creds: Credentials):
+        service = get_service("calendar", "v3")
+        full = mirror.sync_token is None
+        params = {"calendarId": mirror.calendar_id, "singleEvents": True, "maxResults": 2500}
+        if full:
+            window_start, window_end = _calendar_window()
+            params["timeMin"] = window_start.isoformat()
+            params["timeMax"] = window_end.isoformat()
+        else:
+            params["syncToken"] = mirror.sync_token
+
+        changed = 0
+        page_token = None
+        while True:
+            result = await execute(service.events().list(pageToken=page_token, **params), creds)
+            for event in result.get("items", []):
+                changed += 1
+                if event.get("status") == "cancelled":
+                    mirror.events.pop(event["id"], None)
+                else:
+                    mirror.events[event["id"]] = event
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+
+        if result.get("timeZone"):
+            try:
+                mirror.time_zone = ZoneInfo(result["timeZone"])
+            except Exception:
+                pass
+        if full:
+            mirror.window_start = window_start
+            mirror.window_end = window_end
+        mirror.sync_token = result.get("nextSyncToken")
+        mirror.synced_at = time.monotonic()
+        mirror.stale = False
+        if full:
+            print(f"[Sync] Calendar {mirror.calendar_id}: full sync, {len(mirror.events)} events")
+        elif changed:
+            print(f"[Sync] Calendar {mirror.calendar_id}: {changed} changes")
+
+    async def tasklist(self, tasklist_id: str, creds: Credentials) -> TaskListMirror:
+        key = (current_account(), tasklist_id)
+        mirror = self._tasklists.get(key)
+        if mirror is not None and self._fresh(mirror):
+            return mirror
+        async with self._lock(("tasks",) + key):
+            mirror = self._tasklists.setdefault(key, TaskListMirror(tasklist_id))
+            if self._fresh(mirror):
+                return mirror
+            try:
+                await self._sync_tasklist(mirror, creds)
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                print(f"[Sync] Task list {tasklist_id} delta rejected, full resync")
+                mirror = self._tasklists[key] = TaskListMirror(tasklist_id)
+                await self._sync_tasklist(mirror, creds)
+            return mirror
+
+    async def _sync_tasklist(self, mirror: TaskListMirror, creds: Credentials):
+        service = get_service("tasks", "v1")
+        full = mirror.updated_min is None
+        # Overlap the previous pull a little to absorb clock skew
+        started = (_utc_now() - timedelta(seconds=60)).isoformat()
+        params = {
+            "tasklist": mirror.tasklist_id,
+            "showCompleted": True,
+            "showHidden": True,
+            "maxResults": 100,
+        }
+        if not full:
+            params["updatedMin"] = mirror.updated_min
+            params["showDeleted"] = True
+
+        changed = 0
+        page_token = None
+        while True:
+            result = await execute(service.tasks().list(pageToken=page_token, **params), creds)
+            for task in result.get("items", []):
+                changed += 1
+                if task.get("deleted"):
+                    mirror.tasks.pop(task["id"], None)
+                else:
+                    mirror.tasks[task["id"]] = task
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+
+        mirror.updated_min = started
+        mirror.synced_at = time.monotonic()
+        mirror.stale = False
+        if full:
+            print(f"[Sync] Task list {mirror.tasklist_id}: full sync, {len(mirror.tasks)} tasks")
+        elif changed:
+            print(f"[Sync] Task list {mirror.tasklist_id}: {changed} changes")
+
+
+sync_engine = SyncEngine()
+
+
+# ============ Streaming Listings ============
+
+
+def _ndjson_line(item) -> bytes:
+    return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def ndjson_response(lines) -> StreamingResponse:
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+def stream_items(items: list) -> StreamingResponse:
+    """Stream an in-memory listing (e.g. from a sync mirror) as NDJSON"""
+    async def lines():
+        for item in items:
+            yield _ndjson_line(item)
+
+    return ndjson_response(lines())
+
+
+async def stream_pages(make_request, items_key: str, creds: Credentials) -> StreamingResponse:
+    """Follow nextPageToken and stream items as NDJSON.
+
+    `make_request(page_token)` builds the list request for a page. The next
+    page is fetched while the current one is being sent, and only those two
+    pages are held in memory. The first page is fetched before the response
+    starts so upstream errors still surface as HTTP errors; later failures
+    are reported as a final {"error": ...} line.
+    """
+    first = await execute(make_request(None), creds)
+
+    async def lines():
+        result = first
+        pending = None
+        try:
+            while True:
+                page_token = result.get("nextPageToken")
+                if page_token:
+                    pending = asyncio.ensure_future(execute(make_request(page_token), creds))
+                for item in result.get(items_key, []):
+                    yield _ndjson_line(item)
+                if pending is None:
+                    break
+                result = await pending
+                pending = None
+        except Exception as e:
+            yield _ndjson_line({"error": str(e)})
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    return ndjson_response(lines())
+
+
+# ============ Sheets Write-Behind ============
+
+_A1_CELL_RE = re.compile(
+    r"^(?:(?P<sheet>'(?:[^']|'')+'|[^!']+)!)?\$?(?P<col>[A-Za-z]{1,3})\$?(?P<row>\d+)"
+    r"(?::\$?[A-Za-z]{1,3}\$?\d+)?$"
+)
+
+
+def _col_to_index(col: str) -> int:
+    index = 0
+    for ch in col.upper():
+        index = index * 26 + (ord(ch) - ord("A") + 1)
+    return index - 1
+
+
+def _index_to_col(index: int) -> str:
+    col = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        col = chr(ord("A") + rem) + col
+    return col
+
+
+def _parse_a1_start(range_: str):
+    """Return (sheet, row, col) of a range's top-left cell, or None if unbounded"""
+    match = _A1_CELL_RE.match(range_.strip())
+    if not match:
+        return None
+    sheet = match.group("sheet") or ""
+    if sheet.startswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+    return sheet, int(match.group("row")) - 1, _col_to_index(match.group("col"))
+
+
+def _a1_range(sheet: str, row: int, col: int, end_row: int, end_col: int) -> str:
+    prefix = "'" + sheet.replace("'", "''") + "'!" if sheet else ""
+    return f"{prefix}{_index_to_col(col)}{row + 1}:{_index_to_col(end_col)}{end_row + 1}"
+
+
+def _merge_cells(cells: dict) -> list:
+    """Turn {(sheet, row, col): value} into a minimal-ish list of ValueRanges.
+
+    Each row is split into runs of adjacent columns, and consecutive rows
+    with the same column span are folded into one rectangle.
+    """
+    runs = []  # (sheet, row, start_col, values)
+    for sheet, row, col in sorted(cells):
+        value = cells[(sheet, row, col)]
+        last = runs[-1] if runs else None
+        if last and last[0] == sheet and last[1] == row and last[2] + len(last[3]) == col:
+            last[3].append(value)
+        else:
+            runs.append((sheet, row, col, [value]))
+
+    blocks = []  # [sheet, first_row, start_col, rows]
+    for sheet, row, col, values in runs:
+        last = blocks[-1] if blocks else None
+        if (
+            last
+            and last[0] == sheet
+            and last[2] == col
+            and last[1] + len(last[3]) == row
+            and len(last[3][0]) == len(values)
+        ):
+            last[3].append(values)
+        else:
+            blocks.append([sheet, row, col, [values]])
+
+    return [
+        {
+            "range": _a1_range(sheet, row, col, row + len(rows) - 1, col + len(rows[0]) - 1),
+            "majorDimension": "ROWS",
+            "values": rows,
+        }
+        for sheet, row, col, rows in blocks
+    ]
+
+
+def _plan_sheet_writes(ops: list) -> list:
+    """Coalesce queued ops into as few API calls as possible, preserving order.
+
+    Consecutive updates with the same valueInputOption become one
+    values.batchUpdate where the last write per cell wins; consecutive
+    appends to the same range with the same options become one append.
+    Ranges that can't be pinned to a start cell are sent as-is, in order.
+    Each call lists the ids of the ops it carries under "ops".
+    """
+    calls = []
+    cells = None  # pending cell grid for the current batchUpdate
+
+    def close_cells():
+        nonlocal cells
+        if cells:
+            calls[-1]["data"].extend(_merge_cells(cells))
+        cells = None
+
+    for op in ops:
+        if op["kind"] == "append":
+            close_cells()
+            key = (op["range"], op["value_input_option"], op["insert_data_option"], op.get("major_dimension", "ROWS"))
+            last = calls[-1] if calls else None
+            if last and last["kind"] == "append" and last["key"] == key:
+                last["values"].extend(op["values"])
+                last["ops"].append(op.get("id"))
+            else:
+                calls.append({"kind": "append", "key": key, "values": list(op["values"]), "ops": [op.get("id")]})
+            continue
+
+        last = calls[-1] if calls else None
+        if not (last and last["kind"] == "update" and last["value_input_option"] == op["value_input_option"]):
+            close_cells()
+            calls.append({"kind": "update", "value_input_option": op["value_input_option"], "data": [], "ops": []})
+        calls[-1]["ops"].append(op.get("id"))
+
+        values = op["values"]
+        if op.get("major_dimension", "ROWS") == "COLUMNS":
+            width = max((len(v) for v in values), default=0)
+            values = [[col[i] if i < len(col) else None for col in values] for i in range(width)]
+
+        start = _parse_a1_start(op["range"])
+        if start is None:
+            close_cells()
+            calls[-1]["data"].append({"range": op["range"], "majorDimension": "ROWS", "values": values})
+            continue
+
+        if cells is None:
+            cells = {}
+        sheet, row0, col0 = start
+        for r, row_values in enumerate(values):
+            for c, value in enumerate(row_values):
+                # null means "leave the cell unchanged" in the Sheets API
+                if value is not None:
+                    cells[(sheet, row0 + r, col0 + c)] = value
+    close_cells()
+    return [call for call in calls if call["kind"] == "append" or call["data"]]
+
+
+class SheetsWriteQueue:
+    """Write-behind queue for Sheets value updates and appends.
+
+    Writes are journaled to disk, acknowledged, and flushed per spreadsheet
+    after SHEETS_WRITE_WINDOW seconds as coalesced batchUpdate/append calls.
+    The journal is replayed on startup so queued writes survive a restart.
+    Queues are per (account, spreadsheet): each flush uses the credentials
+    of the account that queued the writes. Each call's writes leave the
+    queue (and journal) as soon as Google applies them, so a retry after a
+    partial failure resends only the rest. Writes Google rejects outright
+    (a 4xx other than auth or rate limits), and writes still failing after
+    SHEETS_FLUSH_MAX_ATTEMPTS flushes, move to a dead-letter file.
+    """
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        self._pending: dict = {}  # (account_id, spreadsheet_id) -> [op]
+        self._timers: dict = {}  # (account_id, spreadsheet_id) -> asyncio.TimerHandle
+        self._locks: dict = {}
+        self._journal_lock = threading.Lock()
+        self._slot_lock = None  # held while this process owns its journal slot
+        self._failures: dict = {}  # (account_id, spreadsheet_id) -> failed flushes in a row
+        self.flushed_ops = 0
+        self.dropped_ops = 0
+        self.api_calls = 0
+        self.last_error: Optional[str] = None
+
+    def _lock(self, key: tuple) -> asyncio.Lock:
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @property
+    def dead_letter_path(self) -> str:
+        return self.journal_path + ".failed"
+
+    def _append_dead_letters(self, ops: list, error: str):
+        with self._journal_lock:
+            with open(self.dead_letter_path, "a") as f:
+                for op in ops:
+                    f.write(json.dumps({**op, "error": error}, ensure_ascii=False) + "\n")
+
+    def _append_journal(self, op: dict):
+        with self._journal_lock:
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _rewrite_journal(self, ops: list):
+        with self._journal_lock:
+            directory = os.path.dirname(os.path.abspath(self.journal_path))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".jsonl")
+            with os.fdopen(fd, "w") as f:
+                for op in ops:
+                    f.write(json.dumps(op, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+
+    @staticmethod
+    def _read_journal(path: str) -> list:
+        ops = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ops.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return ops
+
+    def _claim_slot(self):
+        """Take the first free journal slot: the configured path, then path.1, path.2, ..."""
+        slot = 0
+        while True:
+            self._slot_lock = try_hold_lock(f"sheets-journal-{slot}")
+            if self._slot_lock is not None:
+                break
+            slot += 1
+        base = self.journal_path
+        self.journal_path = base if slot == 0 else f"{base}.{slot}"
+        return base
+
+    def load_journal(self):
+        """Re-queue writes that were journaled but not flushed before shutdown.
+
+        Each worker process journals to its own slot. Slots whose lock is
+        free belong to a process that exited; their writes are adopted here.
+        """
+        base = self._claim_slot()
+        directory = os.path.dirname(os.path.abspath(base))
+        os.makedirs(directory, exist_ok=True)
+        slot_re = re.compile(re.escape(os.path.basename(base)) + r"(?:\.(\d+))?$")
+        ops, adopted = [], []
+        for name in sorted(os.listdir(directory)):
+            match = slot_re.match(name)
+            if not match:
+                continue
+            path = os.path.join(directory, name)
+            if os.path.abspath(path) != os.path.abspath(self.journal_path):
+                lock = try_hold_lock(f"sheets-journal-{match.group(1) or 0}")
+                if lock is None:
+                    continue  # a live worker's slot
+                adopted.append((path, lock))
+            ops.extend(self._read_journal(path))
+
+        seen = set()
+        count = 0
+        for op in ops:
+            if op.get("id") in seen:
+                continue
+            seen.add(op.get("id"))
+            # Ops journaled before accounts existed belong to the default account
+            account_id = op.setdefault("account", _default_account)
+            self._pending.setdefault((account_id, op["spreadsheet_id"]), []).append(op)
+            count += 1
+        if adopted:
+            self._rewrite_journal([op for pending in self._pending.values() for op in pending])
+            for path, lock in adopted:
+                os.remove(path)
+                lock.close()
+        for key in self._pending:
+            self._schedule(key)
+        return count
+
+    def _schedule(self, key: tuple, delay: Optional[float] = None):
+        if key in self._timers:
+            return
+        if delay is None:
+            delay = SHEETS_WRITE_WINDOW
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(
+            delay, lambda: asyncio.ensure_future(self._flush_from_timer(key))
+        )
+
+    async def _flush_from_timer(self, key: tuple):
+        self._timers.pop(key, None)
+        account_id, spreadsheet_id = key
+        try:
+            await self.flush(spreadsheet_id, account_id)
+        except Exception as e:
+            print(f"[Sheets] Write-behind flush failed for {spreadsheet_id} ({account_id}): {e}")
+            if self._pending.get(key):
+                # Keep the ops queued and retry later, backing off
+                failures = max(self._failures.get(key, 0), 1)
+                self._schedule(key, delay=min(max(SHEETS_WRITE_WINDOW, 30) * 2 ** (failures - 1), 600))
+
+    async def enqueue(self, spreadsheet_id: str, kind: str, range_: str, body: dict, **options) -> dict:
+        account_id = current_account()
+        op = {
+            "id": str(uuid.uuid4()),
+            "account": account_id,
+            "spreadsheet_id": spreadsheet_id,
+            "kind": kind,
+            "range": range_,
+            "values": body.get("values", []),
+            "major_dimension": body.get("majorDimension", "ROWS"),
+            **options,
+        }
+        await run_blocking(self._append_journal, op)
+        key = (account_id, spreadsheet_id)
+        self._pending.setdefault(key, []).append(op)
+        self._schedule(key)
+        return op
+
+    def has_pending(self, spreadsheet_id: str) -> bool:
+        return bool(self._pending.get((current_account(), spreadsheet_id)))
+
+    async def _settle(self, key: tuple, ids: set):
+        """Take sent (or dropped) ops out of the queue and the journal"""
+        remaining = [op for op in self._pending.get(key, []) if op["id"] not in ids]
+        if remaining:
+            self._pending[key] = remaining
+        else:
+            self._pending.pop(key, None)
+        await run_blocking(self._rewrite_journal, [op for ops in self._pending.values() for op in ops])
+
+    async def _drop(self, key: tuple, ops: list, error: Exception):
+        """Move ops Google won't accept to the dead-letter file"""
+        self.dropped_ops += len(ops)
+        self.last_error = f"Dropped {len(ops)} writes to {key[1]}: {error}"
+        print(f"[Sheets] {self.last_error} (kept in {self.dead_letter_path})")
+        await run_blocking(self._append_dead_letters, ops, str(error))
+        await self._settle(key, {op["id"] for op in ops})
+
+    async def flush(self, spreadsheet_id: str, account_id: Optional[str] = None) -> dict:
+        """Send everything one account queued for one spreadsheet"""
+        if account_id is None:
+            account_id = current_account()
+        key = (account_id, spreadsheet_id)
+        async with self._lock(key):
+            ops = self._pending.get(key) or []
+            if not ops:
+                return {"spreadsheetId": spreadsheet_id, "ops": 0, "calls": 0}
+            creds = await get_credentials(account_id)
+            if not creds:
+                raise HTTPException(status_code=401, detail="Not authenticated")
+
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+
+            batch = list(ops)
+            by_id = {op["id"]: op for op in batch}
+            calls = _plan_sheet_writes(batch)
+            values = get_service("sheets", "v4").spreadsheets().values()
+            sent, dropped, error = 0, 0, None
+            for call in calls:
+                if call["kind"] == "update":
+                    request = values.batchUpdate(
+                        spreadsheetId=spreadsheet_id,
+                        body={"valueInputOption": call["value_input_option"], "data": call["data"]},
+                    )
+                else:
+                    range_, value_input_option, insert_data_option, major_dimension = call["key"]
+                    request = values.append(
+                        spreadsheetId=spreadsheet_id,
+                        range=range_,
+                        valueInputOption=value_input_option,
+                        insertDataOption=insert_data_option,
+                        body={"majorDimension": major_dimension, "values": call["values"]},
+                    )
+                try:
+                    # batchUpdate overwrites cells, so it is safe to retry; appends are not
+                    with google_priority(PRIORITY_BACKGROUND):
+                        await execute(request, creds, idempotent=call["kind"] == "update")
+                except Exception as e:
+                    self.last_error = str(e)
+                    if not _is_permanent_error(e):
+                        error = e
+                        break
+                    # Resending won't help; later calls don't depend on this one
+                    await self._drop(key, [by_id[op_id] for op_id in call["ops"]], e)
+                    dropped += len(call["ops"])
+                    continue
+                self.api_calls += 1
+                sent += len(call["ops"])
+                # Applied in Google: a later failure must not send these again
+                await self._settle(key, set(call["ops"]))
+
+            if sent:
+                response_cache.invalidate(("sheets", spreadsheet_id), account=account_id)
+            self.flushed_ops += sent
+            if error is not None:
+                failures = self._failures[key] = self._failures.get(key, 0) + 1
+                if failures >= SHEETS_FLUSH_MAX_ATTEMPTS:
+                    self._failures.pop(key, None)
+                    unsent = [op for op in self._pending.get(key, []) if op["id"] in by_id]
+                    await self._drop(key, unsent, f"gave up after {failures} failed flushes: {error}")
+                raise error
+            self._failures.pop(key, None)
+            # Ops that produced no call (all-null updates) are done too; ops queued meanwhile stay
+            await self._settle(key, set(by_id))
+            print(f"[Sheets] Flushed {sent} writes for {spreadsheet_id} in {len(calls)} calls")
+            return {"spreadsheetId": spreadsheet_id, "ops": len(batch) - dropped, "calls": len(calls), "dropped": dropped}
+
+    async def flush_all(self, account_id: Optional[str] = None) -> list:
+        """Flush one account's queues, or every queue when no account is given"""
+        return [
+            await self.flush(spreadsheet_id, owner)
+            for owner, spreadsheet_id in list(self._pending)
+            if account_id is None or owner == account_id
+        ]
+
+    def stats(self) -> dict:
+        account_id = current_account()
+        return {
+            "enabled": SHEETS_WRITE_BEHIND,
+            "window": SHEETS_WRITE_WINDOW,
+            "pending": {sid: len(ops) for (owner, sid), ops in self._pending.items() if owner == account_id},
+            "pending_total": sum(len(ops) for ops in self._pending.values()),
+            "flushed_ops": self.flushed_ops,
+            "dropped_ops": self.dropped_ops,
+            "api_calls": self.api_calls,
+            "last_error": self.last_error,
+        }
+
+
+sheets_write_queue = SheetsWriteQueue(SHEETS_JOURNAL_PATH)
+
+register_metric(Gauge(
+    "lifeops_sheets_write_queue_pending", "Sheets writes buffered for the next flush",
+    lambda: sum(len(ops) for ops in sheets_write_queue._pending.values()),
+))
+
+
+# ============ Shared State Store ============
+
+
+_sqlite_local = threading.local()
+
+
+def _sqlite_connect(path: str) -> sqlite3.Connection:
+    """Per-thread connection to a state database (WAL, autocommit)"""
+    connections = getattr(_sqlite_local, "connections", None)
+    if connections is None:
+        connections = _sqlite_local.connections = {}
+    db = connections.get(path)
+    if db is None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path, timeout=10, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        connections[path] = db
+    return db
+
+
+class SqliteStore:
+    """Key/value table in the shared SQLite state file.
+
+    Entries expire after `ttl` seconds, and the table is kept within
+    `max_entries` / `max_bytes` by evicting the least recently used rows.
+    SQLite (WAL mode) makes it safe to share between uvicorn worker
+    processes. Methods are blocking; call them through run_blocking.
+    """
+
+    def __init__(self, path: str, table: str, ttl: float, max_entries: int, max_bytes: int):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        with self._connect() as db:
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires ON {table}(expires_at)")
+            db.execute(f"CREATE INDEX IF NOT EXISTS {table}_access ON {table}(last_access)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return _sqlite_connect(self.path)
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None):
+        now = time.time()
+        db = self._connect()
+        db.execute(
+            f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now + (ttl or self.ttl), now),
+        )
+        self.purge()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        db = self._connect()
+        row = db.execute(
+            f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        db.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def pop(self, key: str) -> Optional[str]:
+        """Get and delete atomically (single-use entries)"""
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+            db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return row[0] if row else None
+
+    def delete(self, key: str):
+        self._connect().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def purge(self):
+        """Drop expired rows, then evict LRU rows over the size budget"""
+        db = self._connect()
+        db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        count, total = db.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evict = []
+        for key, size in db.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict.append((key,))
+            count -= 1
+            total -= size
+        db.executemany(f"DELETE FROM {self.table} WHERE key = ?", evict)
+
+    def stats(self) -> dict:
+        count, total = self._connect().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        return {"entries": count, "bytes": total, "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+
+class AccountStore:
+    """Google accounts and their OAuth tokens, one row per account.
+
+    A token refresh updates a single row instead of rewriting a file, and
+    the table is shared by every worker process. Methods are blocking; call
+    them through run_blocking.
+    """
+
+    COLUMNS = ("account_id", "email", "access_token", "refresh_token", "expiry", "is_default", "updated_at")
+
+    def __init__(self, path: str):
+        self.path = path
+        _sqlite_connect(path).execute(
+            "CREATE TABLE IF NOT EXISTS accounts ("
+            "account_id TEXT PRIMARY KEY, email TEXT, access_token TEXT, refresh_token TEXT, "
+            "expiry TEXT, is_default INTEGER NOT NULL DEFAULT 0, updated_at TEXT)"
+        )
+
+    def get(self, account_id: str) -> Optional[dict]:
+        row = _sqlite_connect(self.path).execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM accounts WHERE account_id = ?", (account_id,)
+        ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def save(self, account_id: str, email: str, access_token: str, refresh_token: Optional[str], expiry: Optional[str]):
+        """Insert or replace an account after login; the first account becomes the default"""
+        db = _sqlite_connect(self.path)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            has_default = db.execute("SELECT 1 FROM accounts WHERE is_default = 1 AND account_id != ?", (account_id,)).fetchone()
+            previous = db.execute("SELECT refresh_token FROM accounts WHERE account_id = ?", (account_id,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    account_id,
+                    email,
+                    access_token,
+                    # Google only returns a refresh token on consent; keep the old one otherwise
+                    refresh_token or (previous[0] if previous else None),
+                    expiry,
+                    0 if has_default else 1,
+                    datetime.now().isoformat(),
+                ),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def update_token(self, account_id: str, access_token: str, expiry: Optional[str]) -> bool:
+        cursor = _sqlite_connect(self.path).execute(
+            "UPDATE accounts SET access_token = ?, expiry = ?, updated_at = ? WHERE account_id = ?",
+            (access_token, expiry, datetime.now().isoformat(), account_id),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, account_id: str):
+        _sqlite_connect(self.path).execute("DELETE FROM accounts WHERE account_id = ?", (account_id,))
+
+    def default_account(self) -> Optional[str]:
+        row = _sqlite_connect(self.path).execute("SELECT account_id FROM accounts WHERE is_default = 1").fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        return _sqlite_connect(self.path).execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+    def import_legacy(self, tokens: dict) -> Optional[str]:
+        """Import a tokens.json dict as an account unless it is already present"""
+        account_id = (tokens.get("email") or "default").lower()
+        if self.get(account_id) is not None:
+            return None
+        self.save(account_id, tokens.get("email"), tokens.get("access_token"), tokens.get("refresh_token"), tokens.get("expiry"))
+        return account_id
+
+
+account_store = AccountStore(STATE_DB_PATH)
+
+# Session id -> account id for browsers that logged in
+_sessions = SqliteStore(
+    STATE_DB_PATH,
+    "sessions",
+    ttl=SESSION_TTL,
+    max_entries=10000,
+    max_bytes=10 * 1024 * 1024,
+)
+_session_cache: OrderedDict = OrderedDict()  # session id -> (account id, checked_at)
+SESSION_CACHE_SECONDS = 60
+
+
+async def resolve_session(session_id: str) -> Optional[str]:
+    cached = _session_cache.get(session_id)
+    if cached is not None and time.monotonic() - cached[1] < SESSION_CACHE_SECONDS:
+        return cached[0]
+    account_id = await run_blocking(_sessions.get, session_id)
+    _session_cache[session_id] = (account_id, time.monotonic())
+    _session_cache.move_to_end(session_id)
+    while len(_session_cache) > 1024:
+        _session_cache.popitem(last=False)
+    return account_id
+
+
+def _drop_session(session_id: str):
+    _session_cache.pop(session_id, None)
+    _sessions.pop(session_id)
+
+
+class AccountMiddleware:
+    """Resolves the session cookie to an account for the rest of the request.
+
+    Requests without a cookie, or with one for an unknown session, get no
+    account and so no Google credentials: every browser signs in for itself.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        # Pick up invalidations from other workers before serving anything cached
+        await worker_events.catch_up()
+        session_id = Request(scope).cookies.get(SESSION_COOKIE)
+        account_id = await resolve_session(session_id) if session_id else None
+        token = _current_account.set(account_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_account.reset(token)
+
+
+# ============ Worker Coordination ============
+
+# With WEB_CONCURRENCY > 1 uvicorn runs several processes over the same
+# state file. Work that must happen once (token refresh, migration, journal
+# replay) takes a file lock; in-process caches follow each other through an
+# invalidation log.
+
+_WORKER_ID = str(os.getpid())
+
+
+def _lock_path(name: str) -> str:
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    return os.path.join(LOCK_DIR, f"{name}.lock")
+
+
+@contextmanager
+def file_lock(name: str):
+    """Exclusive lock shared by all worker processes (blocking; use off the event loop)"""
+    with open(_lock_path(name), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def try_hold_lock(name: str):
+    """Take a lock without waiting and keep it while the returned file is open; None if taken"""
+    f = open(_lock_path(name), "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+
+class WorkerEvents:
+    """Invalidation log shared by the worker processes.
+
+    Writes that evict in-process state (response cache tags, stale mirrors,
+    login/logout) append a row; requests pick up rows written by other
+    workers. The newest sequence number is also kept in a small
+    memory-mapped file, so the check is one memory read when nothing changed.
+    Rows are written and read on the thread pool: publishing batches them
+    in a background task, and concurrent requests share one read, started at
+    most once per CATCH_UP_INTERVAL. With a single worker all of this is
+    skipped.
+    """
+
+    RETENTION = 600
+    CATCH_UP_INTERVAL = 0.02
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last_seq = 0
+        self.published = 0
+        self.applied = 0
+        self._counter: Optional[mmap.mmap] = None
+        self._outbox: list = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._reader: Optional[asyncio.Future] = None
+        self._read_at = 0.0
+
+    def start(self):
+        if WORKERS == 1:
+            return
+        db = _sqlite_connect(self.path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS worker_events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, worker TEXT NOT NULL, kind TEXT NOT NULL, "
+            "account TEXT, data TEXT, created_at REAL NOT NULL)"
+        )
+        os.makedirs(LOCK_DIR, exist_ok=True)
+        fd = os.open(os.path.join(LOCK_DIR, "worker-events.seq"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < 8:
+                os.ftruncate(fd, 8)
+            self._counter = mmap.mmap(fd, 8)
+        finally:
+            os.close(fd)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self.last_seq = db.execute("SELECT COALESCE(MAX(seq), 0) FROM worker_events").fetchone()[0]
+            # The state file was replaced; don't let a stale counter force a poll on every request
+            if self._read_counter() > self.last_seq:
+                struct.pack_into("<q", self._counter, 0, self.last_seq)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _read_counter(self) -> int:
+        return struct.unpack_from("<q", self._counter, 0)[0]
+
+    def publish(self, kind: str, account: Optional[str], data=None):
+        """Queue an event for the other workers (written in the background)"""
+        if self._counter is None:
+            return
+        self._outbox.append((kind, account, json.dumps(data)))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._advance(*self._write(self._take_outbox()))
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._flush())
+
+    def _take_outbox(self) -> list:
+        events, self._outbox = self._outbox, []
+        return events
+
+    async def _flush(self):
+        while self._outbox:
+            events = self._take_outbox()
+            try:
+                self._advance(*await run_blocking(self._write, events))
+            except Exception as e:
+                print(f"[Worker] Failed to publish {len(events)} events: {e}")
+
+    async def drain(self):
+        """Wait until queued events are written"""
+        while self._flusher is not None and not self._flusher.done():
+            await self._flusher
+
+    def _write(self, events: list) -> tuple:
+        db = _sqlite_connect(self.path)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            first = last = None
+            for kind, account, data in events:
+                last = db.execute(
+                    "INSERT INTO worker_events (worker, kind, account, data, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (_WORKER_ID, kind, account, data, now),
+                ).lastrowid
+                first = first or last
+            if last // 100 > (first - 1) // 100:
+                db.execute("DELETE FROM worker_events WHERE created_at < ?", (now - self.RETENTION,))
+            # Bumped inside the write transaction, so the counter never goes backwards
+            struct.pack_into("<q", self._counter, 0, last)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self.published += len(events)
+        return first, last
+
+    def _advance(self, first: int, last: int):
+        # Nobody wrote in between: skip reading our own rows back
+        if first == self.last_seq + 1:
+            self.last_seq = last
+
+    async def catch_up(self):
+        """Apply events other workers published since the last read"""
+        if self._counter is None:
+            return
+        # A read already in flight may predate the newest events; follow up once
+        for _ in range(2):
+            if self._read_counter() <= self.last_seq:
+                return
+            if self._reader is None:
+                self._reader = asyncio.ensure_future(self._read())
+            await asyncio.shield(self._reader)
+
+    async def _read(self):
+        try:
+            delay = self._read_at + self.CATCH_UP_INTERVAL - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._read_at = time.monotonic()
+            rows = await run_blocking(self._rows_after, self.last_seq)
+            for seq, worker, kind, account, data in rows:
+                if seq <= self.last_seq:
+                    continue
+                self.last_seq = seq
+                if worker != _WORKER_ID:
+                    self._apply(kind, account, json.loads(data))
+                    self.applied += 1
+        except Exception as e:
+            print(f"[Worker] Failed to read events: {e}")
+        finally:
+            self._reader = None
+
+    def _rows_after(self, seq: int) -> list:
+        return _sqlite_connect(self.path).execute(
+            "SELECT seq, worker, kind, account, data FROM worker_events WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+
+    def _apply(self, kind: str, account: Optional[str], data):
+        if kind == "cache":
+            response_cache._invalidate([(account,) + tuple(tag) for tag in data])
+        elif kind == "stale":
+            for mirror_kind, key in data:
+                sync_engine._mark_stale(account, mirror_kind, key)
+        elif kind == "account":
+            _reset_account(account)
+
+    def stats(self) -> dict:
+        return {"worker": _WORKER_ID, "last_seq": self.last_seq, "published": self.published, "applied": self.applied}
+
+
+worker_events = WorkerEvents(STATE_DB_PATH)
+
+
+def _reset_account(account_id: str):
+    """Drop what this process holds for an account after a login or logout"""
+    forget_credentials(account_id)
+    response_cache.clear(account_id)
+    sync_engine.clear(account_id)
+    for session_id, (owner, _) in list(_session_cache.items()):
+        if owner == account_id:
+            del _session_cache[session_id]
+
+
+async def account_changed(account_id: str):
+    """Reset an account's in-process state in this and every other worker"""
+    _reset_account(account_id)
+    worker_events.publish("account", account_id)
+    # Other workers must see a login/logout before this response goes out
+    await worker_events.drain()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
-    load_tokens()
+    worker_events.start()
+    accounts = load_accounts()
     print(f"[LifeOps] Backend started on port {PORT}")
-    print(f"[LifeOps] Tokens loaded: {'Yes' if tokens else 'No'}")
+    if WORKERS > 1:
+        print(f"[LifeOps] Worker {_WORKER_ID} (one of {WORKERS})")
+    print(f"[LifeOps] Accounts: {accounts} (default: {_default_account or 'none'})")
+    print(f"[LifeOps] Google API workers: {GOOGLE_MAX_WORKERS}")
+    await run_blocking(warm_services)
+    renewal = asyncio.create_task(token_renewal_loop())
+    start_pdf_workers()
+    evaluation_engine.resolve()
+    evaluation_queue.start()
+    if loop_lag_monitor is not None:
+        loop_lag_monitor.start()
+    replayed = sheets_write_queue.load_journal()
+    if replayed:
+        print(f"[LifeOps] Re-queued {replayed} journaled Sheets writes")
     yield
     print("[LifeOps] Backend shutting down")
+    renewal.cancel()
+    if loop_lag_monitor is not None:
+        loop_lag_monitor.stop()
+    await evaluation_queue.stop()
+    try:
+        await sheets_write_queue.flush_all()
+    except Exception as e:
+        print(f"[Sheets] Flush on shutdown failed, writes stay journaled: {e}")
+    await worker_events.drain()
+    stop_pdf_workers()
+    _google_executor.shutdown(wait=False)
 
 
 app = FastAPI(title="LifeOps Backend", lifespan=lifespan)
 
+app.add_middleware(AccountMiddleware)
+app.add_middleware(MetricsMiddleware)
+if PROFILING_ENABLED:
+    # Only installed when enabled, so it costs nothing otherwise
+    app.add_middleware(ProfilingMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -144,13 +2473,15 @@ app.add_middleware(
 @app.get("/auth/status")
 async def auth_status():
     """Check authentication status"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if creds and creds.valid:
+        account = await run_blocking(account_store.get, current_account())
         return {
             "authenticated": True,
-            "email": tokens.get("email"),
-            "expiry": tokens.get("expiry"),
-            "access_token": creds.token,  # For backward compatibility
+            "email": account and account["email"],
+            # Only the session's own account: the frontend calls some Google APIs directly with it
+            "access_token": creds.token,
+            "expiry": creds.expiry.isoformat() if creds.expiry else None,
         }
     return {"authenticated": False}
 
@@ -181,28 +2512,48 @@ async def auth_callback(request: Request, code: str = None, error: str = None):
     try:
         redirect_uri = str(request.url_for("auth_callback"))
         flow = create_oauth_flow(redirect_uri)
-        flow.fetch_token(code=code)
+        await run_blocking(flow.fetch_token, code=code)
 
         creds = flow.credentials
 
         # Get user email
-        service = build("oauth2", "v2", credentials=creds)
-        user_info = service.userinfo().get().execute()
-
-        # Save tokens
-        global tokens
-        tokens = {
-            "access_token": creds.token,
-            "refresh_token": creds.refresh_token,
-            "expiry": creds.expiry.isoformat() if creds.expiry else None,
-            "email": user_info.get("email"),
-            "updated_at": datetime.now().isoformat(),
-        }
-        save_tokens()
-
-        print(f"[Auth] Logged in as {tokens['email']}")
-
-        return RedirectResponse(f"{FRONTEND_URL}?auth_success=true")
+        service = get_service("oauth2", "v2")
+        user_info = await execute(service.userinfo().get(), creds)
+
+        # Save the account and bind this browser to it
+        email = user_info.get("email")
+        if not email:
+            print("[Auth] Google returned no email address for the account")
+            return RedirectResponse(f"{FRONTEND_URL}?auth_error=no_email")
+        account_id = email.lower()
+        await run_blocking(
+            account_store.save,
+            account_id,
+            email,
+            creds.token,
+            creds.refresh_token,
+            creds.expiry.isoformat() if creds.expiry else None,
+        )
+        await account_changed(account_id)
+
+        previous_session = request.cookies.get(SESSION_COOKIE)
+        if previous_session:
+            await run_blocking(_drop_session, previous_session)
+        session_id = secrets.token_urlsafe(32)
+        await run_blocking(_sessions.put, session_id, account_id)
+
+        print(f"[Auth] Logged in as {email}")
+
+        response = RedirectResponse(f"{FRONTEND_URL}?auth_success=true")
+        response.set_cookie(
+            SESSION_COOKIE,
+            session_id,
+            max_age=SESSION_TTL,
+            httponly=True,
+            secure=SESSION_COOKIE_SECURE,
+            samesite=SESSION_COOKIE_SAMESITE,
+        )
+        return response
 
     except Exception as e:
         print(f"[Auth] Callback error: {e}")
@@ -210,12 +2561,19 @@ async def auth_callback(request: Request, code: str = None, error: str = None):
 
 
 @app.post("/auth/logout")
-async def auth_logout():
-    """Clear tokens"""
-    global tokens
-    tokens = {}
-    save_tokens()
-    return {"success": True}
+async def auth_logout(request: Request):
+    """Remove this browser's account and its tokens"""
+    account_id = current_account()
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if session_id:
+        await run_blocking(_drop_session, session_id)
+    if account_id is not None:
+        await run_blocking(account_store.delete, account_id)
+        await run_blocking(drive_index.clear, account_id)
+        await account_changed(account_id)
+    response = JSONResponse({"success": True})
+    response.delete_cookie(SESSION_COOKIE)
+    return response
 
 
 # ============ Google API Proxy ============
@@ -227,64 +2585,135 @@ async def get_calendar_events(
     time_min: str = None,
     time_max: str = None,
     max_results: int = 100,
+    all: bool = False,
 ):
-    """Get calendar events"""
-    creds = get_credentials()
+    """Get calendar events (all=true streams every match as NDJSON)"""
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    try:
-        service = build("calendar", "v3", credentials=creds)
-        events_result = (
-            service.events()
-            .list(
+    async def load():
+        service = get_service("calendar", "v3")
+        events_result = await execute(
+            service.events().list(
                 calendarId=calendar_id,
                 timeMin=time_min,
                 timeMax=time_max,
                 maxResults=max_results,
                 singleEvents=True,
                 orderBy="startTime",
-            )
-            .execute()
+            ),
+            creds,
         )
         return events_result.get("items", [])
+
+    try:
+        if SYNC_ENABLED and time_min is not None and time_max is not None:
+            mirror = await sync_engine.calendar(calendar_id, creds, time_min, time_max)
+            if mirror.covers(time_min, time_max):
+                if all:
+                    return stream_items(mirror.query(time_min, time_max, None))
+                return mirror.query(time_min, time_max, max_results)
+        if all:
+            service = get_service("calendar", "v3")
+            return await stream_pages(
+                lambda page_token: service.events().list(
+                    calendarId=calendar_id,
+                    timeMin=time_min,
+                    timeMax=time_max,
+                    maxResults=2500,
+                    singleEvents=True,
+                    orderBy="startTime",
+                    pageToken=page_token,
+                ),
+                "items",
+                creds,
+            )
+        return await response_cache.get_or_load(
+            "calendar_events",
+            {
+                "calendar_id": calendar_id,
+                "time_min": time_min,
+                "time_max": time_max,
+                "max_results": max_results,
+            },
+            load,
+            tags=[("calendar", calendar_id)],
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.get("/api/tasks/lists")
 async def get_task_lists():
     """Get task lists"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    try:
-        service = build("tasks", "v1", credentials=creds)
-        results = service.tasklists().list().execute()
+    async def load():
+        service = get_service("tasks", "v1")
+        results = await execute(service.tasklists().list(), creds)
         return results.get("items", [])
+
+    try:
+        return await response_cache.get_or_load(
+            "task_lists",
+            {},
+            load,
+            tags=[("tasklists",)],
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.get("/api/tasks/{tasklist_id}")
-async def get_tasks(tasklist_id: str):
-    """Get tasks from a list"""
-    creds = get_credentials()
+async def get_tasks(tasklist_id: str, all: bool = False):
+    """Get tasks from a list (all=true streams every task as NDJSON)"""
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
-    try:
-        service = build("tasks", "v1", credentials=creds)
-        results = service.tasks().list(
-            tasklist=tasklist_id,
-            showCompleted=True,
-            showHidden=True,
-            maxResults=100
-        ).execute()
+    async def load():
+        service = get_service("tasks", "v1")
+        results = await execute(
+            service.tasks().list(
+                tasklist=tasklist_id,
+                showCompleted=True,
+                showHidden=True,
+                maxResults=100
+            ),
+            creds,
+        )
         return results.get("items", [])
+
+    try:
+        if SYNC_ENABLED:
+            mirror = await sync_engine.tasklist(tasklist_id, creds)
+            if all:
+                return stream_items(mirror.query(None))
+            return mirror.query(100)
+        if all:
+            service = get_service("tasks", "v1")
+            return await stream_pages(
+                lambda page_token: service.tasks().list(
+                    tasklist=tasklist_id,
+                    showCompleted=True,
+                    showHidden=True,
+                    maxResults=100,
+                    pageToken=page_token,
+                ),
+                "items",
+                creds,
+            )
+        return await response_cache.get_or_load(
+            "tasks",
+            {"tasklist_id": tasklist_id},
+            load,
+            tags=[("tasks", tasklist_id)],
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 # ============ Calendar CRUD ============
@@ -305,19 +2734,24 @@ class CalendarEventUpdate(BaseModel):
 @app.post("/api/calendar/events")
 async def create_calendar_event(event: CalendarEventCreate, calendar_id: str = "primary"):
     """Create a calendar event"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("calendar", "v3", credentials=creds)
-        result = service.events().insert(
-            calendarId=calendar_id,
-            body=event.model_dump(exclude_none=True)
-        ).execute()
+        service = get_service("calendar", "v3")
+        result = await execute(
+            service.events().insert(
+                calendarId=calendar_id,
+                body=event.model_dump(exclude_none=True)
+            ),
+            creds,
+        )
+        response_cache.invalidate(("calendar", calendar_id))
+        sync_engine.mark_stale("calendar", calendar_id)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.patch("/api/calendar/events/{event_id}")
@@ -327,35 +2761,42 @@ async def update_calendar_event(
     calendar_id: str = "primary"
 ):
     """Update a calendar event"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("calendar", "v3", credentials=creds)
-        result = service.events().patch(
-            calendarId=calendar_id,
-            eventId=event_id,
-            body=event.model_dump(exclude_none=True)
-        ).execute()
+        service = get_service("calendar", "v3")
+        result = await execute(
+            service.events().patch(
+                calendarId=calendar_id,
+                eventId=event_id,
+                body=event.model_dump(exclude_none=True)
+            ),
+            creds,
+        )
+        response_cache.invalidate(("calendar", calendar_id))
+        sync_engine.mark_stale("calendar", calendar_id)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.delete("/api/calendar/events/{event_id}")
 async def delete_calendar_event(event_id: str, calendar_id: str = "primary"):
     """Delete a calendar event"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("calendar", "v3", credentials=creds)
-        service.events().delete(calendarId=calendar_id, eventId=event_id).execute()
+        service = get_service("calendar", "v3")
+        await execute(service.events().delete(calendarId=calendar_id, eventId=event_id), creds)
+        response_cache.invalidate(("calendar", calendar_id))
+        sync_engine.mark_stale("calendar", calendar_id)
         return {"success": True}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 # ============ Tasks CRUD ============
@@ -378,53 +2819,65 @@ class TaskUpdate(BaseModel):
 @app.post("/api/tasks/{tasklist_id}")
 async def create_task(tasklist_id: str, task: TaskCreate):
     """Create a task"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("tasks", "v1", credentials=creds)
-        result = service.tasks().insert(
-            tasklist=tasklist_id,
-            body=task.model_dump(exclude_none=True)
-        ).execute()
+        service = get_service("tasks", "v1")
+        result = await execute(
+            service.tasks().insert(
+                tasklist=tasklist_id,
+                body=task.model_dump(exclude_none=True)
+            ),
+            creds,
+        )
+        response_cache.invalidate(("tasks", tasklist_id))
+        sync_engine.mark_stale("tasks", tasklist_id)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.patch("/api/tasks/{tasklist_id}/{task_id}")
 async def update_task(tasklist_id: str, task_id: str, task: TaskUpdate):
     """Update a task"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("tasks", "v1", credentials=creds)
-        result = service.tasks().patch(
-            tasklist=tasklist_id,
-            task=task_id,
-            body=task.model_dump(exclude_none=True)
-        ).execute()
+        service = get_service("tasks", "v1")
+        result = await execute(
+            service.tasks().patch(
+                tasklist=tasklist_id,
+                task=task_id,
+                body=task.model_dump(exclude_none=True)
+            ),
+            creds,
+        )
+        response_cache.invalidate(("tasks", tasklist_id))
+        sync_engine.mark_stale("tasks", tasklist_id)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.delete("/api/tasks/{tasklist_id}/{task_id}")
 async def delete_task(tasklist_id: str, task_id: str):
     """Delete a task"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("tasks", "v1", credentials=creds)
-        service.tasks().delete(tasklist=tasklist_id, task=task_id).execute()
+        service = get_service("tasks", "v1")
+        await execute(service.tasks().delete(tasklist=tasklist_id, task=task_id), creds)
+        response_cache.invalidate(("tasks", tasklist_id))
+        sync_engine.mark_stale("tasks", tasklist_id)
         return {"success": True}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 # ============ Google Sheets API ============
@@ -433,107 +2886,965 @@ async def delete_task(tasklist_id: str, task_id: str):
 @app.get("/api/sheets/{spreadsheet_id}")
 async def get_spreadsheet(spreadsheet_id: str, fields: str = "sheets.properties.title"):
     """Get spreadsheet metadata"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("sheets", "v4", credentials=creds)
-        result = service.spreadsheets().get(
-            spreadsheetId=spreadsheet_id,
-            fields=fields
-        ).execute()
+        service = get_service("sheets", "v4")
+        result = await execute(
+            service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields=fields
+            ),
+            creds,
+        )
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.post("/api/sheets")
 async def create_spreadsheet(body: dict = Body(...)):
     """Create a new spreadsheet"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("sheets", "v4", credentials=creds)
-        result = service.spreadsheets().create(body=body).execute()
+        service = get_service("sheets", "v4")
+        result = await execute(service.spreadsheets().create(body=body), creds)
+        response_cache.invalidate(("drive",))
+        await drive_index.note_write([{
+            "id": result["spreadsheetId"],
+            "name": result.get("properties", {}).get("title"),
+            "mimeType": "application/vnd.google-apps.spreadsheet",
+            "webViewLink": result.get("spreadsheetUrl"),
+        }])
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.get("/api/sheets/{spreadsheet_id}/values/{range}")
 async def get_sheet_values(spreadsheet_id: str, range: str):
     """Get values from a sheet range"""
-    creds = get_credentials()
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    async def load():
+        service = get_service("sheets", "v4")
+        result = await execute(
+            service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=range
+            ),
+            creds,
+        )
+        return result
+
+    try:
+        # Read-your-writes: send queued writes before reading
+        if sheets_write_queue.has_pending(spreadsheet_id):
+            await sheets_write_queue.flush(spreadsheet_id)
+        return await response_cache.get_or_load(
+            "sheet_values",
+            {"spreadsheet_id": spreadsheet_id, "range": range},
+            load,
+            tags=[("sheets", spreadsheet_id)],
+        )
+    except Exception as e:
+        raise google_error(e)
+
+
+class SheetBatchGetRequest(BaseModel):
+    ranges: list[str]
+    major_dimension: str = "ROWS"
+    value_render_option: str = "FORMATTED_VALUE"
+    columns: Optional[list[int]] = None  # zero-based column indexes to keep (per range)
+    where: Optional[dict[int, str]] = None  # column index -> required cell value
+    skip_empty: bool = False  # drop rows without any non-empty cell
+    header: bool = False  # first row of each range is a header: never filtered out
+
+
+def _project_rows(rows: list, req: SheetBatchGetRequest) -> list:
+    """Apply row filtering and column selection to one range's values"""
+    start = 1 if req.header and rows else 0
+    kept = rows[:start]
+    for row in rows[start:]:
+        if req.skip_empty and not any(cell not in ("", None) for cell in row):
+            continue
+        if req.where and any(
+            (row[col] if col < len(row) else "") != value for col, value in req.where.items()
+        ):
+            continue
+        kept.append(row)
+    if req.columns is not None:
+        kept = [[row[col] if col < len(row) else "" for col in req.columns] for row in kept]
+    return kept
+
+
+@app.post("/api/sheets/{spreadsheet_id}/values:batchGet")
+async def batch_get_sheet_values(spreadsheet_id: str, req: SheetBatchGetRequest):
+    """Get several ranges in one Sheets call, optionally projected server-side"""
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
+    if not req.ranges:
+        raise HTTPException(status_code=400, detail="At least one range is required")
+    projecting = req.columns is not None or req.where or req.skip_empty
+    if projecting and req.major_dimension != "ROWS":
+        raise HTTPException(status_code=400, detail="Projection requires major_dimension=ROWS")
+
+    async def load():
+        service = get_service("sheets", "v4")
+        return await execute(
+            service.spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=req.ranges,
+                majorDimension=req.major_dimension,
+                valueRenderOption=req.value_render_option,
+            ),
+            creds,
+        )
+
+    try:
+        if sheets_write_queue.has_pending(spreadsheet_id):
+            await sheets_write_queue.flush(spreadsheet_id)
+        result = await response_cache.get_or_load(
+            "sheet_batch_get",
+            {
+                "spreadsheet_id": spreadsheet_id,
+                "ranges": "\n".join(req.ranges),
+                "major_dimension": req.major_dimension,
+                "value_render_option": req.value_render_option,
+            },
+            load,
+            tags=[("sheets", spreadsheet_id)],
+        )
+    except Exception as e:
+        raise google_error(e)
+
+    if not projecting:
+        return result
+    return {
+        "spreadsheetId": result.get("spreadsheetId", spreadsheet_id),
+        "valueRanges": [
+            {**value_range, "values": _project_rows(value_range.get("values", []), req)}
+            for value_range in result.get("valueRanges", [])
+        ],
+    }
+
+
+# ============ Sheets Query Engine ============
+
+_NUMBER_STRIP_RE = re.compile(r"[,\s₩$%원]")
+
+
+def _to_number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value:
+        try:
+            return float(_NUMBER_STRIP_RE.sub("", value))
+        except ValueError:
+            return None
+    return None
+
+
+class SheetTable:
+    """Column-oriented copy of a sheet range (first row = header)"""
+
+    def __init__(self, values: list):
+        header = [str(h) for h in values[0]] if values else []
+        rows = values[1:]
+        self.columns = header
+        self.row_count = len(rows)
+        self.data = [
+            [row[i] if i < len(row) else "" for row in rows] for i in range(len(header))
+        ]
+        self._numeric: dict = {}
+
+    def column_index(self, name: str) -> int:
+        if name in self.columns:
+            return self.columns.index(name)
+        # Fall back to A1 column letters
+        if re.fullmatch(r"[A-Za-z]{1,3}", name):
+            index = _col_to_index(name)
+            if index < len(self.columns):
+                return index
+        raise HTTPException(status_code=400, detail=f"Unknown column: {name}")
+
+    def numeric(self, index: int) -> list:
+        column = self._numeric.get(index)
+        if column is None:
+            column = self._numeric[index] = [_to_number(v) for v in self.data[index]]
+        return column
+
+
+class SheetQueryFilter(BaseModel):
+    column: str  # header name or column letter
+    op: str = "eq"  # eq, ne, gt, gte, lt, lte, contains, in, empty, not_empty
+    value: Any = None
+
+
+class SheetQueryAggregate(BaseModel):
+    column: Optional[str] = None  # not needed for count
+    fn: str = "sum"  # sum, count, avg, min, max
+    alias: Optional[str] = None
+
+
+class SheetQueryOrder(BaseModel):
+    column: str
+    desc: bool = False
+
+
+class SheetQueryRequest(BaseModel):
+    range: str
+    value_render_option: str = "FORMATTED_VALUE"
+    select: Optional[list[str]] = None
+    where: list[SheetQueryFilter] = []
+    group_by: list[str] = []
+    aggregates: list[SheetQueryAggregate] = []
+    order_by: list[SheetQueryOrder] = []
+    limit: Optional[int] = None
+    offset: int = 0
+
+
+_COMPARISONS = {
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _filter_rows(table: SheetTable, filters: list) -> list:
+    rows = range(table.row_count)
+    for f in filters:
+        index = table.column_index(f.column)
+        column = table.data[index]
+        if f.op == "eq":
+            rows = [r for r in rows if str(column[r]) == str(f.value)]
+        elif f.op == "ne":
+            rows = [r for r in rows if str(column[r]) != str(f.value)]
+        elif f.op == "contains":
+            needle = str(f.value).lower()
+            rows = [r for r in rows if needle in str(column[r]).lower()]
+        elif f.op == "in":
+            allowed = {str(v) for v in (f.value or [])}
+            rows = [r for r in rows if str(column[r]) in allowed]
+        elif f.op == "empty":
+            rows = [r for r in rows if column[r] in ("", None)]
+        elif f.op == "not_empty":
+            rows = [r for r in rows if column[r] not in ("", None)]
+        elif f.op in _COMPARISONS:
+            compare = _COMPARISONS[f.op]
+            target = _to_number(f.value)
+            if target is not None:
+                numbers = table.numeric(index)
+                rows = [r for r in rows if numbers[r] is not None and compare(numbers[r], target)]
+            else:
+                rows = [r for r in rows if compare(str(column[r]), str(f.value))]
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown filter op: {f.op}")
+    return list(rows)
+
+
+def _aggregate(table: SheetTable, agg: SheetQueryAggregate, rows: list):
+    if agg.fn == "count":
+        if agg.column is None:
+            return len(rows)
+        column = table.data[table.column_index(agg.column)]
+        return sum(1 for r in rows if column[r] not in ("", None))
+    if agg.column is None:
+        raise HTTPException(status_code=400, detail=f"{agg.fn} needs a column")
+    numbers = table.numeric(table.column_index(agg.column))
+    present = [numbers[r] for r in rows if numbers[r] is not None]
+    if agg.fn == "sum":
+        return sum(present)
+    if not present:
+        return None
+    if agg.fn == "avg":
+        return sum(present) / len(present)
+    if agg.fn == "min":
+        return min(present)
+    if agg.fn == "max":
+        return max(present)
+    raise HTTPException(status_code=400, detail=f"Unknown aggregate: {agg.fn}")
+
+
+def run_sheet_query(table: SheetTable, query: SheetQueryRequest) -> dict:
+    """Filter / group / aggregate / sort a SheetTable and return result rows"""
+    rows = _filter_rows(table, query.where)
+
+    if query.group_by or query.aggregates:
+        key_indexes = [table.column_index(c) for c in query.group_by]
+        groups: dict = {}
+        for r in rows:
+            key = tuple(table.data[i][r] for i in key_indexes)
+            groups.setdefault(key, []).append(r)
+        if not query.group_by:
+            groups = {(): rows}
+        columns = list(query.group_by) + [
+            a.alias or (f"{a.fn}({a.column})" if a.column else a.fn) for a in query.aggregates
+        ]
+        result = [
+            list(key) + [_aggregate(table, a, members) for a in query.aggregates]
+            for key, members in groups.items()
+        ]
+    else:
+        names = query.select or table.columns
+        indexes = [table.column_index(c) for c in names]
+        columns = list(names)
+        result = [[table.data[i][r] for i in indexes] for r in rows]
+
+    # Stable multi-key sort: apply keys from last to first
+    for order in reversed(query.order_by):
+        if order.column not in columns:
+            raise HTTPException(status_code=400, detail=f"Cannot order by {order.column}")
+        position = columns.index(order.column)
+
+        def sort_key(row, position=position):
+            number = _to_number(row[position])
+            return (0, number, "") if number is not None else (1, 0, str(row[position]))
+
+        result.sort(key=sort_key, reverse=order.desc)
+
+    total = len(result)
+    end = None if query.limit is None else query.offset + query.limit
+    return {"columns": columns, "rows": result[query.offset:end], "total": total}
+
+
+@app.post("/api/sheets/{spreadsheet_id}/query")
+async def query_sheet(spreadsheet_id: str, query: SheetQueryRequest):
+    """Run a filter/sort/group-by/aggregate query over a sheet range server-side"""
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    async def load():
+        service = get_service("sheets", "v4")
+        result = await execute(
+            service.spreadsheets().values().get(
+                spreadsheetId=spreadsheet_id,
+                range=query.range,
+                valueRenderOption=query.value_render_option,
+            ),
+            creds,
+        )
+        return SheetTable(result.get("values", []))
+
+    try:
+        if sheets_write_queue.has_pending(spreadsheet_id):
+            await sheets_write_queue.flush(spreadsheet_id)
+        table = await response_cache.get_or_load(
+            "sheet_table",
+            {
+                "spreadsheet_id": spreadsheet_id,
+                "range": query.range,
+                "value_render_option": query.value_render_option,
+            },
+            load,
+            tags=[("sheets", spreadsheet_id)],
+        )
+    except Exception as e:
+        raise google_error(e)
+
+    started = time.perf_counter()
+    result = run_sheet_query(table, query)
+    result["ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+@app.put("/api/sheets/{spreadsheet_id}/values/{range}")
+async def update_sheet_values(
+    spreadsheet_id: str,
+    range: str,
+    body: dict = Body(...),
+    value_input_option: str = "RAW",
+    write_behind: Optional[bool] = None,
+):
+    """Update values in a sheet range (write_behind=true queues and acknowledges)"""
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        if SHEETS_WRITE_BEHIND if write_behind is None else write_behind:
+            await sheets_write_queue.enqueue(
+                spreadsheet_id, "update", range, body, value_input_option=value_input_option
+            )
+            response_cache.invalidate(("sheets", spreadsheet_id))
+            return {"spreadsheetId": spreadsheet_id, "updatedRange": range, "queued": True}
+        # Keep ordering with writes still in the queue
+        if sheets_write_queue.has_pending(spreadsheet_id):
+            await sheets_write_queue.flush(spreadsheet_id)
+        service = get_service("sheets", "v4")
+        result = await execute(
+            service.spreadsheets().values().update(
+                spreadsheetId=spreadsheet_id,
+                range=range,
+                valueInputOption=value_input_option,
+                body=body
+            ),
+            creds,
+        )
+        response_cache.invalidate(("sheets", spreadsheet_id))
+        return result
+    except Exception as e:
+        raise google_error(e)
+
+
+@app.post("/api/sheets/{spreadsheet_id}/values/{range}:append")
+async def append_sheet_values(
+    spreadsheet_id: str,
+    range: str,
+    body: dict = Body(...),
+    value_input_option: str = "RAW",
+    insert_data_option: str = "INSERT_ROWS",
+    write_behind: Optional[bool] = None,
+):
+    """Append values to a sheet (write_behind=true queues and acknowledges)"""
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        if SHEETS_WRITE_BEHIND if write_behind is None else write_behind:
+            await sheets_write_queue.enqueue(
+                spreadsheet_id,
+                "append",
+                range,
+                body,
+                value_input_option=value_input_option,
+                insert_data_option=insert_data_option,
+            )
+            response_cache.invalidate(("sheets", spreadsheet_id))
+            return {"spreadsheetId": spreadsheet_id, "tableRange": range, "queued": True}
+        if sheets_write_queue.has_pending(spreadsheet_id):
+            await sheets_write_queue.flush(spreadsheet_id)
+        service = get_service("sheets", "v4")
+        result = await execute(
+            service.spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id,
+                range=range,
+                valueInputOption=value_input_option,
+                insertDataOption=insert_data_option,
+                body=body
+            ),
+            creds,
+        )
+        response_cache.invalidate(("sheets", spreadsheet_id))
+        return result
+    except Exception as e:
+        raise google_error(e)
+
+
+@app.post("/api/sheets/{spreadsheet_id}/flush")
+async def flush_sheet_writes(spreadsheet_id: str):
+    """Send queued write-behind writes for one spreadsheet now"""
+    try:
+        return await sheets_write_queue.flush(spreadsheet_id)
+    except Exception as e:
+        raise google_error(e)
+
+
+@app.post("/api/sheets:flush")
+async def flush_all_sheet_writes():
+    """Send all queued write-behind writes now"""
+    try:
+        return {"flushed": await sheets_write_queue.flush_all(current_account())}
+    except Exception as e:
+        raise google_error(e)
+
+
+@app.get("/api/sheets:queue")
+async def sheet_write_queue_status():
+    """Pending write-behind writes per spreadsheet"""
+    return sheets_write_queue.stats()
+
+
+# ============ Drive Index ============
+
+# File metadata kept in the local index (and the fields it can answer)
+DRIVE_INDEX_FIELDS = (
+    "id", "name", "mimeType", "modifiedTime", "createdTime",
+    "webViewLink", "parents", "trashed", "starred", "size",
+)
+DRIVE_FOLDER_MIME = "application/vnd.google-apps.folder"
+
+_DRIVE_Q_TOKEN = re.compile(r"\s*(?:'((?:[^'\\]|\\.)*)'|(!=|<=|>=|=|<|>)|([A-Za-z]+))")
+_DRIVE_Q_ESCAPE = re.compile(r"\\(.)")
+_DRIVE_FIELDS = re.compile(r"\s*(?:nextPageToken\s*,\s*)?files\(([\w\s,]+)\)(?:\s*,\s*nextPageToken)?\s*")
+_DRIVE_TIME_COLUMNS = {"modifiedTime": "modified_time", "createdTime": "created_time"}
+_DRIVE_ORDER_COLUMNS = {
+    "name": "name COLLATE NOCASE",
+    "modifiedTime": "modified_time",
+    "createdTime": "created_time",
+}
+_SQL_OPS = {"=": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _drive_time(value: Optional[str]) -> Optional[str]:
+    """Normalize an RFC3339 timestamp so the index can compare them as strings"""
+    if not value:
+        return None
+    return _parse_rfc3339(value).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+def _drive_q_tokens(q: str) -> Optional[list]:
+    tokens = []
+    pos = 0
+    while pos < len(q):
+        match = _DRIVE_Q_TOKEN.match(q, pos)
+        if not match:
+            return None if q[pos:].strip() else tokens
+        literal, op, word = match.groups()
+        if literal is not None:
+            tokens.append(("str", _DRIVE_Q_ESCAPE.sub(r"\1", literal)))
+        elif op is not None:
+            tokens.append(("op", op))
+        else:
+            tokens.append(("word", word))
+        pos = match.end()
+    return tokens
+
+
+def _drive_name_matcher(term: str):
+    # Drive matches `name contains` against the start of the name's words
+    pattern = re.compile(r"(?:^|[\W_])" + re.escape(term), re.IGNORECASE)
+    return lambda name: bool(pattern.search(name or ""))
+
+
+def compile_drive_query(q: Optional[str]) -> Optional[tuple]:
+    """Translate a Drive `q` into (SQL conditions, params, name filters).
+
+    Covers terms joined with `and` on name, mimeType, parents,
+    modifiedTime/createdTime, trashed and starred. Returns None for
+    anything else (or, not, parentheses, fullText, ...) so the caller can
+    ask Drive instead.
+    """
+    tokens = _drive_q_tokens(q or "")
+    if tokens is None:
+        return None
+    conditions, params, filters = [], [], []
+    i = 0
+    while i < len(tokens):
+        if i:
+            if tokens[i][0] != "word" or tokens[i][1].lower() != "and":
+                return None
+            i += 1
+        term = tokens[i:i + 3]
+        if len(term) < 3:
+            return None
+        (kind, first), (op_kind, op), (value_kind, value) = term
+        i += 3
+        if kind == "str" and op == "in" and value_kind == "word" and value == "parents":
+            if first == "root":
+                return None
+            conditions.append("EXISTS (SELECT 1 FROM json_each(drive_files.parents) WHERE value = ?)")
+            params.append(first)
+        elif kind != "word":
+            return None
+        elif first == "name" and op == "contains" and value_kind == "str":
+            filters.append(_drive_name_matcher(value))
+        elif first in ("name", "mimeType") and op in ("=", "!=") and value_kind == "str":
+            conditions.append(f"{'name' if first == 'name' else 'mime_type'} {op} ?")
+            params.append(value)
+        elif first in _DRIVE_TIME_COLUMNS and op_kind == "op" and value_kind == "str":
+            try:
+                params.append(_drive_time(value))
+            except ValueError:
+                return None
+            conditions.append(f"{_DRIVE_TIME_COLUMNS[first]} {_SQL_OPS[op]} ?")
+        elif first in ("trashed", "starred") and op in ("=", "!=") and value in ("true", "false"):
+            conditions.append(f"{first} {op} ?")
+            params.append(int(value == "true"))
+        else:
+            return None
+    return conditions, params, filters
+
+
+def compile_drive_order(order_by: Optional[str]) -> Optional[str]:
+    """Translate a Drive orderBy into SQL (None if a key isn't indexed)"""
+    clauses = []
+    for key in (order_by or "").split(","):
+        parts = key.split()
+        if not parts:
+            continue
+        if len(parts) > 2 or (len(parts) == 2 and parts[1] != "desc"):
+            return None
+        direction = " DESC" if len(parts) == 2 else ""
+        if parts[0] == "folder":
+            # Folders sort first in ascending order
+            clauses.append(f"mime_type != '{DRIVE_FOLDER_MIME}'{direction}")
+        elif parts[0] in _DRIVE_ORDER_COLUMNS:
+            clauses.append(_DRIVE_ORDER_COLUMNS[parts[0]] + direction)
+        else:
+            return None
+    return ", ".join(clauses)
+
+
+def compile_drive_fields(fields: str) -> Optional[list]:
+    """File fields requested by a `files(...)` selector, if all are indexed"""
+    match = _DRIVE_FIELDS.fullmatch(fields or "")
+    if not match:
+        return None
+    names = [name.strip() for name in match.group(1).split(",") if name.strip()]
+    if not names or any(name not in DRIVE_INDEX_FIELDS for name in names):
+        return None
+    return names
+
+
+class DriveIndex:
+    """Local copy of each account's Drive file metadata.
+
+    Seeded once in the background with a full file listing (taking the
+    changes start page token first, so nothing is missed), then kept current
+    with changes.list from the stored page token: at most once per
+    DRIVE_INDEX_INTERVAL in the background, or before answering when a
+    write through this backend marked it stale. Lives in the state DB, so
+    workers and restarts share it. Queries it cannot answer go to Drive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.fallbacks = 0
+        self._locks: dict = {}
+        self._tasks: dict = {}
+        with _sqlite_connect(path) as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS drive_index ("
+                "account TEXT PRIMARY KEY, page_token TEXT NOT NULL, "
+                "synced_at REAL NOT NULL, stale_at REAL NOT NULL DEFAULT 0)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS drive_files ("
+                "account TEXT NOT NULL, id TEXT NOT NULL, name TEXT, mime_type TEXT, "
+                "modified_time TEXT, created_time TEXT, trashed INTEGER NOT NULL, "
+                "starred INTEGER NOT NULL, parents TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (account, id))"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS drive_files_name ON drive_files(account, name)")
+            db.execute("CREATE INDEX IF NOT EXISTS drive_files_modified ON drive_files(account, modified_time)")
+
+    @staticmethod
+    def _lock_name(kind: str, account: str) -> str:
+        return f"drive-{kind}-" + hashlib.sha1(account.encode()).hexdigest()[:16]
+
+    def _lock(self, account: str) -> asyncio.Lock:
+        lock = self._locks.get(account)
+        if lock is None:
+            lock = self._locks[account] = asyncio.Lock()
+        return lock
+
+    # Blocking SQLite helpers (called through run_blocking)
+
+    def _state(self, account: str) -> Optional[tuple]:
+        return _sqlite_connect(self.path).execute(
+            "SELECT page_token, synced_at, stale_at FROM drive_index WHERE account = ?", (account,)
+        ).fetchone()
+
+    @staticmethod
+    def _row(account: str, file: dict) -> tuple:
+        return (
+            account, file["id"], file.get("name"), file.get("mimeType"),
+            _drive_time(file.get("modifiedTime")), _drive_time(file.get("createdTime")),
+            int(bool(file.get("trashed"))), int(bool(file.get("starred"))),
+            json.dumps(file.get("parents", [])), json.dumps(file),
+        )
+
+    def _write(self, account: str, files: list, removed: list, page_token: str, synced_at: float, replace: bool):
+        db = _sqlite_connect(self.path)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if replace:
+                db.execute("DELETE FROM drive_files WHERE account = ?", (account,))
+            db.executemany(
+                "DELETE FROM drive_files WHERE account = ? AND id = ?", [(account, file_id) for file_id in removed]
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO drive_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._row(account, file) for file in files],
+            )
+            db.execute(
+                "INSERT INTO drive_index (account, page_token, synced_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET page_token = excluded.page_token, synced_at = excluded.synced_at",
+                (account, page_token, synced_at),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _select(self, account: str, compiled: tuple, order: str, fields: list, limit: int) -> list:
+        conditions, params, filters = compiled
+        sql = "SELECT name, data FROM drive_files WHERE " + " AND ".join(["account = ?"] + conditions)
+        if order:
+            sql += " ORDER BY " + order
+        if not filters:
+            sql += f" LIMIT {int(limit)}"
+        files = []
+        for name, data in _sqlite_connect(self.path).execute(sql, [account] + params):
+            if all(matches(name) for matches in filters):
+                file = json.loads(data)
+                files.append({field: file[field] for field in fields if field in file})
+                if len(files) >= limit:
+                    break
+        return files
+
+    def clear(self, account: str):
+        """Forget an account's index (it is reseeded on the next query)"""
+        db = _sqlite_connect(self.path)
+        db.execute("DELETE FROM drive_files WHERE account = ?", (account,))
+        db.execute("DELETE FROM drive_index WHERE account = ?", (account,))
+
+    def _note_write(self, account: str, files: list, removed: list):
+        db = _sqlite_connect(self.path)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if db.execute("SELECT 1 FROM drive_index WHERE account = ?", (account,)).fetchone():
+                now = _utc_now().isoformat().replace("+00:00", "Z")
+                rows = []
+                for file in files:
+                    row = db.execute(
+                        "SELECT data FROM drive_files WHERE account = ? AND id = ?", (account, file["id"])
+                    ).fetchone()
+                    merged = json.loads(row[0]) if row else {
+                        "parents": [], "trashed": False, "starred": False, "createdTime": now,
+                    }
+                    merged.update((k, v) for k, v in file.items() if k in DRIVE_INDEX_FIELDS)
+                    merged["modifiedTime"] = now
+                    rows.append(self._row(account, merged))
+                db.executemany("INSERT OR REPLACE INTO drive_files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                db.executemany(
+                    "DELETE FROM drive_files WHERE account = ? AND id = ?", [(account, file_id) for file_id in removed]
+                )
+                db.execute("UPDATE drive_index SET stale_at = ? WHERE account = ?", (time.time(), account))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    async def note_write(self, files: list = (), removed: list = ()):
+        """Record a write made through this backend.
+
+        The written files are merged into the index straight from the
+        request/response (the changes feed can lag behind a create), and the
+        next query pulls changes before answering, in every worker.
+        """
+        await run_blocking(self._note_write, current_account() or "", list(files), list(removed))
+
+    # Sync
+
+    async def _seed(self, account: str, creds: Credentials):
+        lock = await run_blocking(try_hold_lock, self._lock_name("seed", account))
+        if lock is None:
+            return  # another worker is seeding
+        try:
+            if await run_blocking(self._state, account) is not None:
+                return
+            service = get_service("drive", "v3")
+            started = time.time()
+            start = await execute(service.changes().getStartPageToken(), creds)
+            files = []
+            page_token = None
+            while True:
+                result = await execute(
+                    service.files().list(
+                        pageSize=1000,
+                        pageToken=page_token,
+                        fields=f"nextPageToken,files({','.join(DRIVE_INDEX_FIELDS)})",
+                    ),
+                    creds,
+                )
+                files.extend(result.get("files", []))
+                page_token = result.get("nextPageToken")
+                if not page_token:
+                    break
+            await run_blocking(self._write, account, files, [], start["startPageToken"], started, True)
+            print(f"[Drive] Indexed {len(files)} files")
+        except Exception as e:
+            print(f"[Drive] Index seed failed: {e}")
+        finally:
+            lock.close()
+
+    async def _pull(self, account: str, creds: Credentials):
+        """Apply changes since the stored page token"""
+        async with self._lock(account):
+            lock = await run_blocking(try_hold_lock, self._lock_name("pull", account))
+            while lock is None:
+                # Another worker is pulling; its result is as good as ours
+                await asyncio.sleep(0.05)
+                lock = await run_blocking(try_hold_lock, self._lock_name("pull", account))
+            try:
+                state = await run_blocking(self._state, account)
+                if state is None or self._fresh(state):
+                    return
+                service = get_service("drive", "v3")
+                started = time.time()
+                page_token = state[0]
+                files, removed = {}, []
+                while True:
+                    try:
+                        result = await execute(
+                            service.changes().list(
+                                pageToken=page_token,
+                                pageSize=1000,
+                                includeRemoved=True,
+                                spaces="drive",
+                                fields="nextPageToken,newStartPageToken,"
+                                f"changes(fileId,removed,file({','.join(DRIVE_INDEX_FIELDS)}))",
+                            ),
+                            creds,
+                        )
+                    except HttpError as e:
+                        if e.resp.status not in (400, 404, 410):
+                            raise
+                        print(f"[Drive] Change token rejected ({e.resp.status}), reseeding index")
+                        await run_blocking(self.clear, account)
+                        raise
+                    for change in result.get("changes", []):
+                        if change.get("removed") or not change.get("file"):
+                            files.pop(change["fileId"], None)
+                            removed.append(change["fileId"])
+                        else:
+                            files[change["fileId"]] = change["file"]
+                    if result.get("newStartPageToken"):
+                        page_token = result["newStartPageToken"]
+                        break
+                    page_token = result["nextPageToken"]
+                await run_blocking(self._write, account, list(files.values()), removed, page_token, started, False)
+            finally:
+                lock.close()
+
+    async def _background_pull(self, account: str, creds: Credentials):
+        try:
+            await self._pull(account, creds)
+        except Exception as e:
+            print(f"[Drive] Index update failed: {e}")
+
+    def _spawn(self, key: tuple, coro):
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            coro.close()
+            return
+        self._tasks[key] = asyncio.create_task(coro)
+
+    @staticmethod
+    def _fresh(state: tuple) -> bool:
+        _, synced_at, stale_at = state
+        return synced_at > stale_at and time.time() - synced_at < DRIVE_INDEX_INTERVAL
+
+    async def search(self, q: Optional[str], order_by: str, page_size: int, fields: str, creds: Credentials):
+        """Answer a files.list query locally, or None if Drive has to"""
+        compiled = compile_drive_query(q)
+        order = compile_drive_order(order_by)
+        names = compile_drive_fields(fields)
+        if compiled is None or order is None or names is None:
+            self.fallbacks += 1
+            return None
+        account = current_account() or ""
+        state = await run_blocking(self._state, account)
+        if state is None:
+            self._spawn(("seed", account), self._seed(account, creds))
+            self.fallbacks += 1
+            return None
+        if state[2] >= state[1]:
+            # A write through this backend since the last pull: catch up before answering
+            try:
+                await self._pull(account, creds)
+            except Exception as e:
+                print(f"[Drive] Index update failed: {e}")
+                self.fallbacks += 1
+                return None
+        elif not self._fresh(state):
+            self._spawn(("pull", account), self._background_pull(account, creds))
+        self.hits += 1
+        return await run_blocking(self._select, account, compiled, order, names, min(page_size, 1000))
+
+    def stats(self, account: str) -> dict:
+        db = _sqlite_connect(self.path)
+        state = db.execute("SELECT synced_at, stale_at FROM drive_index WHERE account = ?", (account,)).fetchone()
+        files = db.execute("SELECT COUNT(*) FROM drive_files WHERE account = ?", (account,)).fetchone()[0]
+        return {
+            "enabled": DRIVE_INDEX_ENABLED,
+            "seeded": state is not None,
+            "files": files,
+            "synced_seconds_ago": round(time.time() - state[0], 1) if state else None,
+            "stale": bool(state and state[1] >= state[0]),
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+        }
+
 
-    try:
-        service = build("sheets", "v4", credentials=creds)
-        result = service.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range=range
-        ).execute()
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+drive_index = DriveIndex(STATE_DB_PATH)
 
 
-@app.put("/api/sheets/{spreadsheet_id}/values/{range}")
-async def update_sheet_values(
-    spreadsheet_id: str,
-    range: str,
-    body: dict = Body(...),
-    value_input_option: str = "RAW"
-):
-    """Update values in a sheet range"""
-    creds = get_credentials()
-    if not creds:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+# ============ Google Drive API ============
 
-    try:
-        service = build("sheets", "v4", credentials=creds)
-        result = service.spreadsheets().values().update(
-            spreadsheetId=spreadsheet_id,
-            range=range,
-            valueInputOption=value_input_option,
-            body=body
-        ).execute()
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
+DRIVE_LIST_FIELDS = "files(id,name,mimeType,modifiedTime,webViewLink,parents)"
 
-@app.post("/api/sheets/{spreadsheet_id}/values/{range}:append")
-async def append_sheet_values(
-    spreadsheet_id: str,
-    range: str,
-    body: dict = Body(...),
-    value_input_option: str = "RAW",
-    insert_data_option: str = "INSERT_ROWS"
-):
-    """Append values to a sheet"""
-    creds = get_credentials()
+
+async def find_drive_files(
+    q: str = None,
+    page_size: int = 100,
+    order_by: str = "modifiedTime desc",
+    fields: str = DRIVE_LIST_FIELDS,
+) -> tuple:
+    """One page of a files.list query as (files, "HIT" | "MISS").
+
+    Queries the local index understands are answered from it (HIT); the
+    rest go to Drive through the response cache.
+    """
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    if DRIVE_INDEX_ENABLED:
+        files = await drive_index.search(q, order_by, page_size, fields, creds)
+        if files is not None:
+            return files, "HIT"
+
+    async def load():
+        service = get_service("drive", "v3")
+        result = await execute(
+            service.files().list(
+                q=q,
+                pageSize=page_size,
+                orderBy=order_by,
+                fields=fields
+            ),
+            creds,
+        )
+        return result.get("files", [])
+
     try:
-        service = build("sheets", "v4", credentials=creds)
-        result = service.spreadsheets().values().append(
-            spreadsheetId=spreadsheet_id,
-            range=range,
-            valueInputOption=value_input_option,
-            insertDataOption=insert_data_option,
-            body=body
-        ).execute()
-        return result
+        files = await response_cache.get_or_load(
+            "drive_files",
+            {"q": q, "page_size": page_size, "order_by": order_by, "fields": fields},
+            load,
+            tags=[("drive",)],
+        )
+        return files, "MISS"
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
-# ============ Google Drive API ============
+async def _drive_files(
+    q: str = None,
+    page_size: int = 100,
+    order_by: str = "modifiedTime desc",
+    fields: str = DRIVE_LIST_FIELDS,
+) -> list:
+    files, _ = await find_drive_files(q, page_size, order_by, fields)
+    return files
 
 
 @app.get("/api/drive/files")
@@ -541,140 +3852,880 @@ async def list_drive_files(
     q: str = None,
     page_size: int = 100,
     order_by: str = "modifiedTime desc",
-    fields: str = "files(id,name,mimeType,modifiedTime,webViewLink,parents)"
+    fields: str = DRIVE_LIST_FIELDS,
+    all: bool = False,
 ):
-    """List files in Google Drive"""
-    creds = get_credentials()
+    """List files in Google Drive (all=true streams every page as NDJSON)
+
+    X-Drive-Index tells whether the local index answered (HIT) or Drive did.
+    """
+    if not all:
+        files, source = await find_drive_files(q, page_size, order_by, fields)
+        return JSONResponse(files, headers={"X-Drive-Index": source})
+
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
-
     try:
-        service = build("drive", "v3", credentials=creds)
-        result = service.files().list(
-            q=q,
-            pageSize=page_size,
-            orderBy=order_by,
-            fields=fields
-        ).execute()
-        return result.get("files", [])
+        service = get_service("drive", "v3")
+        page_fields = fields if "nextPageToken" in fields else f"nextPageToken,{fields}"
+        return await stream_pages(
+            lambda page_token: service.files().list(
+                q=q,
+                pageSize=1000,
+                orderBy=order_by,
+                fields=page_fields,
+                pageToken=page_token,
+            ),
+            "files",
+            creds,
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.get("/api/drive/files/{file_id}")
 async def get_drive_file(file_id: str, fields: str = "id,name,mimeType,modifiedTime,webViewLink"):
     """Get a file's metadata from Google Drive"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("drive", "v3", credentials=creds)
-        result = service.files().get(fileId=file_id, fields=fields).execute()
+        service = get_service("drive", "v3")
+        result = await execute(service.files().get(fileId=file_id, fields=fields), creds)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.post("/api/drive/files")
 async def create_drive_file(body: dict = Body(...)):
     """Create a file in Google Drive"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("drive", "v3", credentials=creds)
-        result = service.files().create(body=body, fields="id,name,webViewLink").execute()
+        service = get_service("drive", "v3")
+        result = await execute(service.files().create(body=body, fields="id,name,webViewLink"), creds)
+        response_cache.invalidate(("drive",))
+        await drive_index.note_write([{**body, **result}])
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.delete("/api/drive/files/{file_id}")
 async def delete_drive_file(file_id: str):
     """Delete a file from Google Drive"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("drive", "v3", credentials=creds)
-        service.files().delete(fileId=file_id).execute()
+        service = get_service("drive", "v3")
+        await execute(service.files().delete(fileId=file_id), creds)
+        response_cache.invalidate(("drive",), ("sheets", file_id))
+        await drive_index.note_write(removed=[file_id])
         return {"success": True}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.patch("/api/drive/files/{file_id}")
 async def update_drive_file(file_id: str, body: dict = Body(...)):
     """Update a file's metadata in Google Drive"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("drive", "v3", credentials=creds)
-        result = service.files().update(fileId=file_id, body=body).execute()
+        service = get_service("drive", "v3")
+        result = await execute(service.files().update(fileId=file_id, body=body), creds)
+        response_cache.invalidate(("drive",))
+        await drive_index.note_write([{**body, **result, "id": file_id}])
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
+
+
+@app.get("/api/drive:index")
+async def drive_index_status():
+    """Local Drive metadata index for the current account"""
+    return await run_blocking(drive_index.stats, current_account() or "")
+
+
+# ============ Docs Edit Queue ============
+
+# Request types whose effect on document indices is known, so edits made
+# against the same revision can be shifted past each other
+DOCS_RANGE_REQUESTS = ("updateTextStyle", "updateParagraphStyle", "deleteParagraphBullets")
+
+
+def _utf16_len(text: str) -> int:
+    # Docs indices count UTF-16 code units
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _docs_op(request: dict) -> Optional[dict]:
+    """Index effect of one body request, or None if it can't be transformed"""
+    if len(request) != 1:
+        return None
+    (kind, params), = request.items()
+    if kind == "insertText":
+        location = params.get("location")
+        if not location or location.get("segmentId") or location.get("tabId"):
+            return None
+        return {"kind": "insert", "at": location["index"], "length": _utf16_len(params.get("text", ""))}
+    if kind == "deleteContentRange" or kind in DOCS_RANGE_REQUESTS:
+        range_ = params.get("range")
+        if not range_ or range_.get("segmentId") or range_.get("tabId"):
+            return None
+        return {
+            "kind": "delete" if kind == "deleteContentRange" else "range",
+            "start": range_["startIndex"],
+            "end": range_["endIndex"],
+        }
+    return None
+
+
+def _docs_point(index: int, op: dict, after_ties: bool) -> Optional[int]:
+    if op["kind"] == "insert":
+        if index > op["at"] or (index == op["at"] and after_ties):
+            return index + op["length"]
+        return index
+    if op["kind"] == "delete":
+        if index <= op["start"]:
+            return index
+        if index >= op["end"]:
+            return index - (op["end"] - op["start"])
+        return None
+    return index
+
+
+def _docs_transform(op: dict, past: dict, later: bool) -> Optional[dict]:
+    """`op` rewritten to apply after `past` (both made against the same text).
+
+    Where both insert at one index, the earlier edit's text comes first.
+    Overlaps with a deletion, or an insertion inside a deleted range, are
+    conflicts: None.
+    """
+    if op["kind"] == "insert":
+        if past["kind"] == "delete" and past["start"] < op["at"] < past["end"]:
+            return None
+        at = _docs_point(op["at"], past, after_ties=later)
+        return None if at is None else {**op, "at": at}
+
+    start, end = op["start"], op["end"]
+    if past["kind"] == "delete" and start < past["end"] and past["start"] < end:
+        return None
+    if past["kind"] == "insert" and start < past["at"] < end:
+        if op["kind"] == "delete":
+            return None
+        # A style range grows over text inserted inside it
+        return {**op, "end": end + past["length"]}
+    start, end = _docs_point(start, past, after_ties=True), _docs_point(end, past, after_ties=False)
+    if start is None or end is None:
+        return None
+    return {**op, "start": start, "end": end}
+
+
+def _docs_request(request: dict, op: dict) -> dict:
+    """The request with its indices replaced by the transformed op's"""
+    (kind, params), = request.items()
+    if op["kind"] == "insert":
+        return {kind: {**params, "location": {**params["location"], "index": op["at"]}}}
+    return {kind: {**params, "range": {**params["range"], "startIndex": op["start"], "endIndex": op["end"]}}}
+
+
+class DocsEdit:
+    """One client batchUpdate waiting in the edit queue"""
+
+    def __init__(self, requests: list, write_control: Optional[dict]):
+        self.requests = requests
+        self.write_control = write_control or {}
+        self.future = asyncio.get_running_loop().create_future()
+        ops = [_docs_op(request) for request in requests]
+        self.ops = None if None in ops else ops
+
+
+class DocsBatch:
+    """Edits merged into one batchUpdate.
+
+    `ops` is the merged request sequence's index effects, or None once an
+    edit whose effects are unknown joined; after that only edits that apply
+    to the latest text (no writeControl) can be appended.
+    """
+
+    def __init__(self, edit: DocsEdit):
+        self.edits = [edit]
+        self.requests = list(edit.requests)
+        self.write_control = dict(edit.write_control)
+        self.ops = list(edit.ops) if edit.ops is not None else None
+
+    def add(self, edit: DocsEdit) -> bool:
+        if "targetRevisionId" in self.write_control or "targetRevisionId" in edit.write_control:
+            return False
+        required = edit.write_control.get("requiredRevisionId")
+        if required is None:
+            # Applies to whatever the text is by then, like a separate call would
+            if self.ops is not None:
+                self.ops = self.ops + edit.ops if edit.ops is not None else None
+            self._append(edit, edit.requests)
+            return True
+        if required != self.write_control.get("requiredRevisionId") or self.ops is None or edit.ops is None:
+            return False
+
+        # Made against the same revision as the batch: shift it past what the batch already does
+        past = self.ops
+        transformed = []
+        for op in edit.ops:
+            rebased_past = []
+            for earlier in past:
+                moved = _docs_transform(op, earlier, later=True)
+                earlier = _docs_transform(earlier, op, later=False)
+                if moved is None or earlier is None:
+                    return False
+                op = moved
+                rebased_past.append(earlier)
+            transformed.append(op)
+            # The edit's next request was made against the text after this one
+            past = rebased_past
+        self.ops = self.ops + transformed
+        self._append(edit, [_docs_request(r, op) for r, op in zip(edit.requests, transformed)])
+        return True
+
+    def _append(self, edit: DocsEdit, requests: list):
+        self.edits.append(edit)
+        self.requests.extend(requests)
+
+
+def _plan_docs_batches(edits: list) -> list:
+    """Group queued edits, in order, into as few batchUpdate calls as is safe"""
+    batches = []
+    for edit in edits:
+        if not (batches and batches[-1].add(edit)):
+            batches.append(DocsBatch(edit))
+    return batches
+
+
+class DocsEditQueue:
+    """Merges concurrent edits to a document into single batchUpdate calls.
+
+    An edit is sent as soon as no call for its document is in flight (after
+    waiting DOCS_EDIT_WINDOW, if set, for more edits); edits that arrive
+    meanwhile are planned by _plan_docs_batches and sent together next.
+    Each caller still gets the replies for its own requests. If a merged
+    call is rejected, its edits are retried one at a time so each gets the
+    outcome it would have had on its own.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: dict = {}  # (account_id, document_id) -> [DocsEdit]
+        self._draining: set = set()
+        self.edits = 0
+        self.api_calls = 0
+        self.fallbacks = 0
+
+    async def submit(self, document_id: str, body: dict) -> dict:
+        edit = DocsEdit(body.get("requests", []), body.get("writeControl"))
+        self.edits += 1
+        key = (current_account(), document_id)
+        self._pending.setdefault(key, []).append(edit)
+        if key not in self._draining:
+            self._draining.add(key)
+            asyncio.ensure_future(self._drain(key))
+        # The edit goes out even if this request is cancelled
+        return await asyncio.shield(edit.future)
+
+    async def _drain(self, key: tuple):
+        try:
+            if self.window > 0:
+                await asyncio.sleep(self.window)
+            while self._pending.get(key):
+                await self._flush(key, self._pending.pop(key))
+        finally:
+            self._draining.discard(key)
+
+    async def _flush(self, key: tuple, edits: list):
+        account_id, document_id = key
+        try:
+            creds = await get_credentials(account_id)
+            if not creds:
+                raise HTTPException(status_code=401, detail="Not authenticated")
+            for batch in _plan_docs_batches(edits):
+                await self._send(document_id, batch, creds)
+            await run_blocking(_doc_text_cache.delete, f"{account_id}:{document_id}")
+        except BaseException as e:
+            if isinstance(e, Exception) and not isinstance(e, HTTPException):
+                print(f"[Docs] Flushing edits to {document_id} failed: {e}")
+            # Nobody may be left waiting on an edit that will never be sent
+            self._fail(edits, e)
+            if not isinstance(e, Exception):
+                raise
+
+    @staticmethod
+    def _fail(edits: list, error: BaseException):
+        if not isinstance(error, HTTPException):
+            error = HTTPException(status_code=500, detail=str(error) or type(error).__name__)
+        for edit in edits:
+            if not edit.future.done():
+                edit.future.set_exception(error)
+
+    async def _send(self, document_id: str, batch: DocsBatch, creds: Credentials):
+        body = {"requests": batch.requests}
+        if batch.write_control:
+            body["writeControl"] = batch.write_control
+        service = get_service("docs", "v1")
+        self.api_calls += 1
+        try:
+            result = await execute(service.documents().batchUpdate(documentId=document_id, body=body), creds)
+        except Exception as e:
+            # A rejected batchUpdate changes nothing, so its edits can be sent on their own
+            if len(batch.edits) > 1 and isinstance(e, HttpError) and 400 <= e.resp.status < 500:
+                self.fallbacks += 1
+                print(f"[Docs] Merged edit of {len(batch.edits)} rejected ({e.resp.status}), sending one at a time")
+                for edit in batch.edits:
+                    await self._send(document_id, DocsBatch(edit), creds)
+                return
+            try:
+                error = google_error(e)
+            except Exception as conversion_error:
+                error = conversion_error
+            self._fail(batch.edits, error)
+            return
+
+        replies = result.get("replies", [])
+        offset = 0
+        for edit in batch.edits:
+            edit.future.set_result({
+                "documentId": result.get("documentId", document_id),
+                "replies": replies[offset:offset + len(edit.requests)],
+                "writeControl": result.get("writeControl", {}),
+            })
+            offset += len(edit.requests)
+
+    def stats(self) -> dict:
+        return {
+            "window": self.window,
+            "edits": self.edits,
+            "api_calls": self.api_calls,
+            "fallbacks": self.fallbacks,
+            "pending": sum(len(edits) for edits in self._pending.values()),
+        }
+
+
+docs_edit_queue = DocsEditQueue(DOCS_EDIT_WINDOW)
 
 
 # ============ Google Docs API ============
 
+# Only what the text/markdown flattening reads; styles, positions and inline
+# objects of the full document tree are never transferred
+DOC_TEXT_FIELDS = (
+    "documentId,title,revisionId,lists,"
+    "body(content(paragraph(elements(textRun(content,textStyle(bold,italic,link(url))),horizontalRule),"
+    "paragraphStyle(namedStyleType),bullet(listId,nestingLevel)),"
+    "table(tableRows(tableCells(content(paragraph(elements(textRun(content))))))),"
+    "tableOfContents(content(paragraph(elements(textRun(content)))))))"
+)
+DOC_TEXT_FORMATS = ("text", "markdown")
+
+HEADING_LEVELS = {
+    "TITLE": 1,
+    "SUBTITLE": 2,
+    **{f"HEADING_{level}": level for level in range(1, 7)},
+}
+ORDERED_GLYPHS = ("DECIMAL", "ZERO_DECIMAL", "UPPER_ALPHA", "ALPHA", "UPPER_ROMAN", "ROMAN")
+
+# Flattened documents by account and document, tagged with the Drive version they were built from
+_doc_text_cache = SqliteStore(
+    STATE_DB_PATH,
+    "doc_text",
+    ttl=7 * 24 * 3600,
+    max_entries=200,
+    max_bytes=20 * 1024 * 1024,
+)
+
+
+def _markdown_run(text_run: dict) -> str:
+    content = text_run.get("content", "")
+    core = content.strip()
+    if not core:
+        return content
+    # Keep surrounding whitespace (and the paragraph's newline) outside the markers
+    lead = content[: len(content) - len(content.lstrip())]
+    trail = content[len(content.rstrip()):]
+    style = text_run.get("textStyle", {})
+    url = style.get("link", {}).get("url")
+    if url:
+        core = f"[{core}]({url})"
+    if style.get("bold") and style.get("italic"):
+        core = f"***{core}***"
+    elif style.get("bold"):
+        core = f"**{core}**"
+    elif style.get("italic"):
+        core = f"*{core}*"
+    return lead + core + trail
+
+
+def _flatten_paragraph(paragraph: dict, lists: dict, markdown: bool) -> tuple:
+    """(kind, text) for one paragraph; kind is "heading", "item", "rule" or "text\""""
+    parts = []
+    for element in paragraph.get("elements", []):
+        if "textRun" in element:
+            parts.append(_markdown_run(element["textRun"]) if markdown else element["textRun"].get("content", ""))
+        elif "horizontalRule" in element and markdown:
+            return "rule", "---"
+    # \x0b is a soft line break inside a paragraph
+    text = "".join(parts).rstrip("\n").replace("\x0b", "\n")
+
+    bullet = paragraph.get("bullet")
+    if bullet is not None:
+        level = bullet.get("nestingLevel", 0)
+        marker = "-"
+        if markdown:
+            levels = lists.get(bullet.get("listId"), {}).get("listProperties", {}).get("nestingLevels", [])
+            glyph = levels[level].get("glyphType") if level < len(levels) else None
+            if glyph in ORDERED_GLYPHS:
+                marker = "1."
+        # Four spaces nest under both "-" and "1." items in Markdown
+        return "item", ("    " if markdown else "  ") * level + f"{marker} {text}"
+
+    style = paragraph.get("paragraphStyle", {}).get("namedStyleType")
+    if markdown and style in HEADING_LEVELS and text.strip():
+        return "heading", "#" * HEADING_LEVELS[style] + " " + text
+    return "text", text
+
+
+def _flatten_table(table: dict, markdown: bool) -> str:
+    rows = []
+    for row in table.get("tableRows", []):
+        cells = []
+        for cell in row.get("tableCells", []):
+            blocks = _flatten_content(cell.get("content", []), {}, False)
+            text = " ".join(text.strip() for _, text in blocks if text.strip())
+            cells.append(text.replace("|", "\\|") if markdown else text)
+        rows.append(cells)
+    if not rows:
+        return ""
+    if not markdown:
+        return "\n".join("\t".join(cells) for cells in rows)
+    width = max(len(cells) for cells in rows)
+    lines = ["| " + " | ".join(cells + [""] * (width - len(cells))) + " |" for cells in rows]
+    lines.insert(1, "|" + " --- |" * width)
+    return "\n".join(lines)
+
+
+def _flatten_content(content: list, lists: dict, markdown: bool) -> list:
+    blocks = []
+    for element in content:
+        if "paragraph" in element:
+            blocks.append(_flatten_paragraph(element["paragraph"], lists, markdown))
+        elif "table" in element:
+            blocks.append(("table", _flatten_table(element["table"], markdown)))
+        elif "tableOfContents" in element:
+            blocks.extend(_flatten_content(element["tableOfContents"].get("content", []), lists, markdown))
+    return blocks
+
+
+def flatten_document(document: dict, fmt: str) -> str:
+    """Document body as plain text (one line per paragraph) or Markdown"""
+    markdown = fmt == "markdown"
+    blocks = _flatten_content(document.get("body", {}).get("content", []), document.get("lists", {}), markdown)
+    if not markdown:
+        return "\n".join(text for _, text in blocks)
+
+    out = []
+    previous = None
+    for kind, text in blocks:
+        if not text.strip():
+            continue
+        if out:
+            # List items stay together; everything else is its own block
+            out.append("\n" if kind == "item" and previous == "item" else "\n\n")
+        out.append(text)
+        previous = kind
+    return "".join(out)
+
 
 @app.get("/api/docs/{document_id}")
-async def get_document(document_id: str):
-    """Get a Google Doc"""
-    creds = get_credentials()
+async def get_document(document_id: str, fields: Optional[str] = None):
+    """Get a Google Doc (fields: Docs API field mask to return only part of it)"""
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("docs", "v1", credentials=creds)
-        result = service.documents().get(documentId=document_id).execute()
+        service = get_service("docs", "v1")
+        result = await execute(service.documents().get(documentId=document_id, fields=fields), creds)
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
+
+
+@app.get("/api/docs/{document_id}/text")
+async def get_document_text(document_id: str, request: Request, format: str = "text"):
+    """Document body flattened to text or Markdown, cached per document revision.
+
+    Each call checks the Drive file version (a few hundred bytes); the
+    document itself is only fetched, with a field mask, when it changed.
+    Sends an ETag, and answers a matching If-None-Match with 304.
+    """
+    if format not in DOC_TEXT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(DOC_TEXT_FORMATS)}")
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    key = f"{current_account()}:{document_id}"
+    try:
+        drive = get_service("drive", "v3")
+        meta, cached = await asyncio.gather(
+            execute(drive.files().get(fileId=document_id, fields="version,modifiedTime"), creds),
+            run_blocking(_doc_text_cache.get, key),
+        )
+        entry = json.loads(cached) if cached else None
+        cache = "HIT"
+        if entry is None or entry["version"] != meta.get("version"):
+            cache = "MISS"
+            service = get_service("docs", "v1")
+            document = await execute(service.documents().get(documentId=document_id, fields=DOC_TEXT_FIELDS), creds)
+            entry = {
+                "version": meta.get("version"),
+                "revisionId": document.get("revisionId"),
+                "title": document.get("title"),
+                "modifiedTime": meta.get("modifiedTime"),
+                **{fmt: await run_blocking(flatten_document, document, fmt) for fmt in DOC_TEXT_FORMATS},
+            }
+            await run_blocking(_doc_text_cache.put, key, json.dumps(entry, ensure_ascii=False))
+    except Exception as e:
+        raise google_error(e)
+
+    etag = f'"{entry["revisionId"] or entry["version"]}-{format}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "X-Docs-Cache": cache}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(
+        content={
+            "documentId": document_id,
+            "title": entry["title"],
+            "revisionId": entry["revisionId"],
+            "modifiedTime": entry["modifiedTime"],
+            "format": format,
+            "content": entry[format],
+        },
+        headers=headers,
+    )
 
 
 @app.post("/api/docs")
 async def create_document(body: dict = Body(...)):
     """Create a new Google Doc"""
-    creds = get_credentials()
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        service = build("docs", "v1", credentials=creds)
-        result = service.documents().create(body=body).execute()
+        service = get_service("docs", "v1")
+        result = await execute(service.documents().create(body=body), creds)
+        response_cache.invalidate(("drive",))
+        await drive_index.note_write([{
+            "id": result["documentId"],
+            "name": result.get("title"),
+            "mimeType": "application/vnd.google-apps.document",
+        }])
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
 @app.post("/api/docs/{document_id}/batchUpdate")
 async def batch_update_document(document_id: str, body: dict = Body(...)):
-    """Batch update a Google Doc"""
-    creds = get_credentials()
+    """Batch update a Google Doc (edits arriving together are merged; see DocsEditQueue)"""
+    creds = await get_credentials()
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    if DOCS_EDIT_MERGE:
+        return await docs_edit_queue.submit(document_id, body)
+
     try:
-        service = build("docs", "v1", credentials=creds)
-        result = service.documents().batchUpdate(documentId=document_id, body=body).execute()
+        service = get_service("docs", "v1")
+        result = await execute(service.documents().batchUpdate(documentId=document_id, body=body), creds)
+        await run_blocking(_doc_text_cache.delete, f"{current_account()}:{document_id}")
         return result
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise google_error(e)
 
 
-# ============ PDF Report ============
+@app.get("/api/docs:queue")
+async def docs_edit_queue_status():
+    """Docs edit queue counters (edits received vs batchUpdate calls made)"""
+    return docs_edit_queue.stats()
 
-import uuid
 
-# Temporary storage for report data (token → summary)
-_report_store: dict = {}
+# ============ Dashboard Aggregate ============
+
+
+class DashboardPart(BaseModel):
+    name: str  # key in the response
+    type: str  # see DASHBOARD_PART_TYPES
+    params: dict = {}
+
+
+class DashboardRequest(BaseModel):
+    parts: list[DashboardPart]
+
+
+async def _all_tasks(tasklist_ids: Optional[list] = None) -> dict:
+    """Tasks for every (or the given) task list, fetched concurrently"""
+    if tasklist_ids is None:
+        tasklist_ids = [tl["id"] for tl in await get_task_lists()]
+    results = await asyncio.gather(*(get_tasks(tasklist_id) for tasklist_id in tasklist_ids))
+    return dict(zip(tasklist_ids, results))
+
+
+DASHBOARD_PART_TYPES = {
+    "calendar_events": get_calendar_events,
+    "task_lists": get_task_lists,
+    "tasks": get_tasks,
+    "all_tasks": _all_tasks,
+    "spreadsheet": get_spreadsheet,
+    "sheet_values": get_sheet_values,
+    "drive_files": _drive_files,
+    "drive_file": get_drive_file,
+    "document": get_document,
+}
+
+
+async def _load_dashboard_part(part: DashboardPart) -> dict:
+    started = time.perf_counter()
+    handler = DASHBOARD_PART_TYPES.get(part.type)
+    try:
+        if handler is None:
+            raise HTTPException(status_code=400, detail=f"Unknown part type: {part.type}")
+        try:
+            inspect.signature(handler).bind(**part.params)
+        except TypeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid params: {e}")
+        if part.params.get("all"):
+            # all=true streams NDJSON, which can't be embedded in a part
+            raise HTTPException(status_code=400, detail="all=true is not supported in dashboard parts")
+        data = await handler(**part.params)
+        result = {"ok": True, "data": data}
+    except HTTPException as e:
+        result = {"ok": False, "error": {"status": e.status_code, "detail": e.detail}}
+    except Exception as e:
+        result = {"ok": False, "error": {"status": 500, "detail": str(e)}}
+    result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+@app.post("/api/dashboard")
+async def get_dashboard(req: DashboardRequest):
+    """Fetch several proxy resources concurrently in one round trip.
+
+    Each part names a proxy (`type`) and its parameters; the response maps
+    part names to `{ok, data | error, ms}` so one failing part doesn't fail
+    the whole dashboard. `all_tasks` resolves task lists first and then
+    fetches every list's tasks in parallel.
+    """
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    names = [part.name for part in req.parts]
+    if len(set(names)) != len(names):
+        raise HTTPException(status_code=400, detail="Part names must be unique")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_load_dashboard_part(part) for part in req.parts))
+    return {
+        "parts": dict(zip(names, results)),
+        "ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+# ============ Batch Operations ============
+
+# Operation name -> (api, version, resource chain, method)
+BATCH_OPERATIONS = {
+    "calendar.events.insert": ("calendar", "v3", ("events",), "insert"),
+    "calendar.events.patch": ("calendar", "v3", ("events",), "patch"),
+    "calendar.events.delete": ("calendar", "v3", ("events",), "delete"),
+    "tasks.tasks.insert": ("tasks", "v1", ("tasks",), "insert"),
+    "tasks.tasks.patch": ("tasks", "v1", ("tasks",), "patch"),
+    "tasks.tasks.delete": ("tasks", "v1", ("tasks",), "delete"),
+    "drive.files.update": ("drive", "v3", ("files",), "update"),
+    "drive.files.delete": ("drive", "v3", ("files",), "delete"),
+}
+
+# Google's per-batch request limits
+BATCH_CHUNK_SIZES = {"calendar": 50, "tasks": 50, "drive": 100}
+BATCH_MAX_OPERATIONS = 1000
+
+
+class BatchOperation(BaseModel):
+    method: str  # e.g. "tasks.tasks.patch"
+    params: dict = {}  # Google API parameters, e.g. {"tasklist": ..., "task": ...}
+    body: Optional[dict] = None
+
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation]
+
+
+def _build_batch_request(op: BatchOperation):
+    api, version, resources, method = BATCH_OPERATIONS[op.method]
+    target = get_service(api, version)
+    for resource in resources:
+        target = getattr(target, resource)()
+    kwargs = dict(op.params)
+    if op.body is not None:
+        kwargs["body"] = op.body
+    return getattr(target, method)(**kwargs)
+
+
+def _execute_batch(api: str, version: str, chunk: list, creds: Credentials) -> dict:
+    """Send one multipart batch; returns {index: result}"""
+    results = {}
+
+    def callback(request_id, response, exception):
+        index = int(request_id)
+        if exception is None:
+            results[index] = {"ok": True, "data": response or None}
+        else:
+            status = exception.resp.status if isinstance(exception, HttpError) else 500
+            results[index] = {"ok": False, "error": {"status": status, "detail": str(exception)}}
+
+    batch = get_service(api, version).new_batch_http_request(callback=callback)
+    for index, request in chunk:
+        batch.add(request, request_id=str(index))
+    started = time.perf_counter()
+    status = "200"
+    try:
+        batch.execute(http=_authorized_http(creds))
+    except HttpError as e:
+        status = str(e.resp.status)
+        raise
+    finally:
+        google_request_duration.observe(time.perf_counter() - started, api, "batch", status)
+        google_requests_total.inc(api, "batch", status)
+    return results
+
+
+async def _run_batch(api: str, version: str, chunk: list, creds: Credentials) -> dict:
+    # Google counts every request in a batch against quota: take a token for
+    # each. Bulk work yields to interactive reads when the quota is tight.
+    await rate_limiter(api).acquire(PRIORITY_BACKGROUND, len(chunk))
+    try:
+        result = await run_blocking(_execute_batch, api, version, chunk, creds)
+    except HttpError as e:
+        if _is_rate_limited(e):
+            rate_limiter(api).throttled(_retry_after(e))
+        raise
+    rate_limiter(api).succeeded()
+    return result
+
+
+async def _invalidate_for_operations(done: list):
+    """Evict what a batch's successful (op, data) pairs changed, once per tag"""
+    tags, mirrors, files, removed = {}, {}, [], []
+    for op, data in done:
+        api = op.method.split(".", 1)[0]
+        if api == "calendar":
+            calendar_id = op.params.get("calendarId", "primary")
+            tags[("calendar", calendar_id)] = None
+            mirrors[("calendar", calendar_id)] = None
+        elif api == "tasks":
+            tasklist_id = op.params.get("tasklist")
+            tags[("tasks", tasklist_id)] = None
+            mirrors[("tasks", tasklist_id)] = None
+        elif api == "drive":
+            file_id = op.params.get("fileId")
+            tags[("drive",)] = None
+            tags[("sheets", file_id)] = None
+            if op.method == "drive.files.delete":
+                removed.append(file_id)
+            else:
+                files.append({**(op.body or {}), **(data or {}), "id": file_id})
+    if tags:
+        response_cache.invalidate(*tags)
+    if mirrors:
+        sync_engine.mark_stale_many(list(mirrors))
+    if files or removed:
+        await drive_index.note_write(files, removed)
+
+
+@app.post("/api/batch")
+async def batch_operations(req: BatchRequest):
+    """Run many small Calendar/Tasks/Drive writes as multipart batch requests.
+
+    Operations are grouped per API and sent in chunks of Google's batch
+    limit; results come back in the same order as the operations.
+    """
+    creds = await get_credentials()
+    if not creds:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if len(req.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many operations (max {BATCH_MAX_OPERATIONS})",
+        )
+
+    results: list = [None] * len(req.operations)
+    groups: dict = {}
+    for index, op in enumerate(req.operations):
+        if op.method not in BATCH_OPERATIONS:
+            results[index] = {"ok": False, "error": {"status": 400, "detail": f"Unsupported method: {op.method}"}}
+            continue
+        try:
+            request = _build_batch_request(op)
+        except TypeError as e:
+            results[index] = {"ok": False, "error": {"status": 400, "detail": str(e)}}
+            continue
+        api, version = BATCH_OPERATIONS[op.method][:2]
+        groups.setdefault((api, version), []).append((index, request))
+
+    jobs = []
+    for (api, version), items in groups.items():
+        size = BATCH_CHUNK_SIZES[api]
+        for start in range(0, len(items), size):
+            chunk = items[start:start + size]
+            jobs.append((chunk, _run_batch(api, version, chunk, creds)))
+
+    outcomes = await asyncio.gather(*(job for _, job in jobs), return_exceptions=True)
+    for (chunk, _), outcome in zip(jobs, outcomes):
+        for index, _ in chunk:
+            if isinstance(outcome, Exception):
+                error = google_error(outcome)
+                results[index] = {"ok": False, "error": {"status": error.status_code, "detail": error.detail}}
+            else:
+                results[index] = outcome.get(index) or {
+                    "ok": False,
+                    "error": {"status": 500, "detail": "No response for operation"},
+                }
+
+    await _invalidate_for_operations(
+        [(op, result["data"]) for op, result in zip(req.operations, results) if result["ok"]]
+    )
+
+    return {"results": results}
+
+
+# ============ PDF Report ============
+
+# Prepared report data (token → summary), shared by all worker processes
+_report_store = SqliteStore(
+    STATE_DB_PATH,
+    "reports",
+    ttl=REPORT_TTL,
+    max_entries=REPORT_MAX_ENTRIES,
+    max_bytes=REPORT_MAX_BYTES,
+)
 
 
 class ReportRequest(BaseModel):
@@ -685,36 +4736,162 @@ class ReportRequest(BaseModel):
 async def prepare_report(req: ReportRequest):
     """Store summary data and return a download token"""
     token = str(uuid.uuid4())
-    _report_store[token] = req.summary
-    return {"token": token}
+    await run_blocking(_report_store.put, token, json.dumps(req.summary, ensure_ascii=False))
+    return {"token": token, "expires_in": REPORT_TTL}
 
 
 @app.get("/api/report/pdf/{token}")
 async def download_report_pdf(token: str):
     """Generate and download PDF report by token"""
-    summary = _report_store.pop(token, None)
-    if not summary:
+    stored = await run_blocking(_report_store.pop, token)
+    if not stored:
         raise HTTPException(status_code=404, detail="Report token expired or invalid")
-    return _generate_pdf(summary)
+    summary = json.loads(stored)
+    return await _generate_pdf(summary)
+
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+FONT_REGULAR = os.path.join(FONT_DIR, "NanumGothic-Regular.ttf")
+FONT_BOLD = os.path.join(FONT_DIR, "NanumGothic-Bold.ttf")
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_pdf_cache: OrderedDict = OrderedDict()  # content hash -> PDF bytes
+_pdf_inflight: dict = {}  # content hash -> asyncio.Future
 
+# Worker-process state: FPDF documents with the fonts already parsed
+_ready_pdfs: Optional[queue.Queue] = None
+_pdf_wanted: Optional[threading.Semaphore] = None
 
-def _generate_pdf(summary: dict) -> Response:
-    """Generate PDF report from dashboard summary"""
+
+def _new_pdf_document():
     from fpdf import FPDF
 
-    date_str = datetime.now().strftime("%Y년 %m월 %d일")
+    pdf = FPDF()
+    pdf.add_font("NanumGothic", "", FONT_REGULAR)
+    pdf.add_font("NanumGothic", "B", FONT_BOLD)
+    return pdf
+
+
+def _prepare_pdf_documents():
+    while True:
+        _pdf_wanted.acquire()
+        _ready_pdfs.put(_new_pdf_document())
+
+
+def _pdf_worker_init():
+    """Parse the CJK fonts ahead of time in each render worker.
+
+    fpdf2 subsets fonts in place when a document is written, so a parsed
+    font can't be shared between documents. Instead a background thread
+    keeps one document with both fonts loaded ready, and parses the next
+    one after each render finishes (not during it, to avoid competing for
+    the GIL).
+    """
+    global _ready_pdfs, _pdf_wanted
+    _ready_pdfs = queue.Queue(maxsize=1)
+    _pdf_wanted = threading.Semaphore(1)
+    threading.Thread(target=_prepare_pdf_documents, daemon=True).start()
+
+
+def _warm_pdf_worker():
+    if _ready_pdfs is not None:
+        # Block until the first document is parsed
+        _ready_pdfs.put(_ready_pdfs.get())
+    return os.getpid()
+
+
+def start_pdf_workers():
+    global _pdf_executor
+    if PDF_WORKERS > 0 and _pdf_executor is None:
+        # spawn: forking a process that already runs threads isn't safe
+        _pdf_executor = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_pdf_worker_init,
+        )
+        for _ in range(PDF_WORKERS):
+            _pdf_executor.submit(_warm_pdf_worker)
 
-    font_dir = os.path.join(os.path.dirname(__file__), "fonts")
-    font_regular = os.path.join(font_dir, "NanumGothic-Regular.ttf")
-    font_bold = os.path.join(font_dir, "NanumGothic-Bold.ttf")
 
-    if not os.path.exists(font_regular):
+def stop_pdf_workers():
+    global _pdf_executor
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(wait=False, cancel_futures=True)
+        _pdf_executor = None
+
+
+async def _generate_pdf(summary: dict) -> Response:
+    """Render the report off the event loop, reusing identical renders"""
+    if not os.path.exists(FONT_REGULAR):
         raise HTTPException(status_code=500, detail="Korean font not found")
 
-    pdf = FPDF()
+    date_str = datetime.now().strftime("%Y년 %m월 %d일")
+    digest = hashlib.sha256(
+        json.dumps([summary, date_str], sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+    started = time.perf_counter()
+    pdf_bytes = _pdf_cache.get(digest)
+    cache_status = "HIT"
+    if pdf_bytes is not None:
+        _pdf_cache.move_to_end(digest)
+    elif digest in _pdf_inflight:
+        cache_status = "COALESCED"
+        pdf_bytes = await asyncio.shield(_pdf_inflight[digest])
+    else:
+        cache_status = "MISS"
+        future = asyncio.get_running_loop().create_future()
+        _pdf_inflight[digest] = future
+        try:
+            if _pdf_executor is not None:
+                loop = asyncio.get_running_loop()
+                pdf_bytes = await loop.run_in_executor(_pdf_executor, _render_pdf, summary, date_str)
+            else:
+                pdf_bytes = await run_blocking(_render_pdf, summary, date_str)
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(pdf_bytes)
+        finally:
+            _pdf_inflight.pop(digest, None)
+        if PDF_CACHE_SIZE > 0:
+            _pdf_cache[digest] = pdf_bytes
+            while len(_pdf_cache) > PDF_CACHE_SIZE:
+                _pdf_cache.popitem(last=False)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    pdf_render_duration.observe(elapsed_ms / 1000, cache_status)
+
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": 'attachment; filename="LifeOps_Report.pdf"',
+            "X-Render-Time-Ms": f"{elapsed_ms:.1f}",
+            "X-Render-Cache": cache_status,
+            "Server-Timing": f"render;dur={elapsed_ms:.1f}",
+        },
+    )
+
+
+def _render_pdf(summary: dict, date_str: str) -> bytes:
+    """Render the PDF report from dashboard summary (runs in a worker)"""
+    if _ready_pdfs is None:
+        pdf = _new_pdf_document()
+        _draw_report(pdf, summary, date_str)
+        return bytes(pdf.output())
+
+    pdf = _ready_pdfs.get()
+    try:
+        _draw_report(pdf, summary, date_str)
+        return bytes(pdf.output())
+    finally:
+        _pdf_wanted.release()
+
+
+def _draw_report(pdf, summary: dict, date_str: str):
     pdf.add_page()
-    pdf.add_font("NanumGothic", "", font_regular)
-    pdf.add_font("NanumGothic", "B", font_bold)
 
     # Header
     pdf.set_font("NanumGothic", "B", 22)
@@ -808,13 +4985,6 @@ def _generate_pdf(summary: dict) -> Response:
     pdf.set_text_color(156, 163, 175)
     pdf.cell(0, 5, f"LifeOps Panel에서 자동 생성 | {date_str}", align="C")
 
-    pdf_bytes = pdf.output()
-    return Response(
-        content=bytes(pdf_bytes),
-        media_type="application/pdf",
-        headers={"Content-Disposition": 'attachment; filename="LifeOps_Report.pdf"'},
-    )
-
 
 def _section_title(pdf, title: str):
     pdf.set_font("NanumGothic", "B", 13)
@@ -885,21 +5055,565 @@ def find_claude_cli() -> Optional[str]:
     return None
 
 
+# Bump when the evaluation prompt changes so cached results are not reused
+EVAL_PROMPT_VERSION = "4"
+
+_evaluation_cache = SqliteStore(
+    STATE_DB_PATH,
+    "evaluations",
+    ttl=max(EVAL_CACHE_TTL, 1),
+    max_entries=500,
+    max_bytes=10 * 1024 * 1024,
+)
+
+
+def _evaluation_key(summary: dict) -> str:
+    canonical = json.dumps(
+        {"prompt_version": EVAL_PROMPT_VERSION, "engine": evaluation_engine.name, "summary": summary},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class EvaluationJobStore:
+    """Evaluation jobs as seen by every worker process.
+
+    The worker running a job keeps its snapshot here (a few times a second
+    while it runs), so a poll, event stream or cancel that lands on another
+    worker still finds it. Methods are blocking; call them through run_blocking.
+    """
+
+    ACTIVE = ("queued", "running")
+    # An active job not updated for this long belongs to a worker that exited
+    STALE_AFTER = 10
+
+    def __init__(self, path: str):
+        self.path = path
+        db = _sqlite_connect(path)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS evaluation_jobs ("
+            "job_id TEXT PRIMARY KEY, key TEXT NOT NULL, worker TEXT NOT NULL, status TEXT NOT NULL, "
+            "snapshot TEXT NOT NULL, cancel_requested INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS evaluation_jobs_key ON evaluation_jobs(key, status)")
+
+    def save(self, rows: list):
+        """Upsert (job_id, key, status, snapshot json) rows owned by this worker"""
+        now = time.time()
+        db = _sqlite_connect(self.path)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "INSERT INTO evaluation_jobs (job_id, key, worker, status, snapshot, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(job_id) DO UPDATE SET "
+                "status = excluded.status, snapshot = excluded.snapshot, updated_at = excluded.updated_at",
+                [(job_id, key, _WORKER_ID, status, snapshot, now) for job_id, key, status, snapshot in rows],
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = _sqlite_connect(self.path).execute(
+            "SELECT worker, status, snapshot, updated_at FROM evaluation_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        worker, status, snapshot, updated_at = row
+        return {"worker": worker, "status": status, "snapshot": json.loads(snapshot), "updated_at": updated_at}
+
+    def find_active(self, key: str) -> Optional[str]:
+        row = _sqlite_connect(self.path).execute(
+            "SELECT job_id FROM evaluation_jobs WHERE key = ? AND status IN (?, ?) AND updated_at > ? "
+            "ORDER BY updated_at DESC LIMIT 1",
+            (key, *self.ACTIVE, time.time() - self.STALE_AFTER),
+        ).fetchone()
+        return row[0] if row else None
+
+    def request_cancel(self, job_id: str) -> bool:
+        cursor = _sqlite_connect(self.path).execute(
+            "UPDATE evaluation_jobs SET cancel_requested = 1 WHERE job_id = ? AND status IN (?, ?)",
+            (job_id, *self.ACTIVE),
+        )
+        return cursor.rowcount > 0
+
+    def cancel_requests(self) -> list:
+        """Active jobs of this worker that another worker asked to cancel"""
+        rows = _sqlite_connect(self.path).execute(
+            "SELECT job_id FROM evaluation_jobs WHERE worker = ? AND cancel_requested = 1 AND status IN (?, ?)",
+            (_WORKER_ID, *self.ACTIVE),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def purge(self, retention: float):
+        _sqlite_connect(self.path).execute(
+            "DELETE FROM evaluation_jobs WHERE updated_at < ?", (time.time() - retention,)
+        )
+
+
+_evaluation_jobs = EvaluationJobStore(STATE_DB_PATH)
+
+
+class EvaluationJob:
+    """One queued/running evaluation and the events produced so far"""
+
+    TERMINAL = ("done", "failed", "cancelled")
+
+    def __init__(self, summary: dict, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.summary = summary
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.output = ""
+        self.result: Optional[dict] = None
+        self.error: Optional[dict] = None
+        self.task: Optional[asyncio.Task] = None
+        self.done = asyncio.get_running_loop().create_future()
+        self.dirty = True  # changed since last written to the job store
+        self._listeners: set = set()
+
+    def publish(self, event: str, data):
+        self.dirty = True
+        for listener in self._listeners:
+            listener.put_nowait((event, data))
+
+    def append_output(self, text: str):
+        self.output += text
+        self.publish("output", {"text": text})
+
+    def set_status(self, status: str):
+        self.status = status
+        self.publish("status", {"status": status})
+
+    def finish(self, status: str, result: Optional[dict] = None, error: Optional[dict] = None):
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.set_status(status)
+        if result is not None:
+            self.publish("result", result)
+        if error is not None:
+            self.publish("error", error)
+        if not self.done.done():
+            self.done.set_result(None)
+
+    async def wait(self):
+        await asyncio.shield(self.done)
+
+    def store_row(self) -> tuple:
+        return (self.id, self.key, self.status, json.dumps(self.snapshot(), ensure_ascii=False))
+
+    async def events(self):
+        """Replay the job so far, then yield new (event, data) pairs until it ends"""
+        listener: asyncio.Queue = asyncio.Queue()
+        self._listeners.add(listener)
+        try:
+            yield "status", {"status": self.status}
+            if self.output:
+                yield "output", {"text": self.output}
+            if self.status in self.TERMINAL:
+                if self.result is not None:
+                    yield "result", self.result
+                if self.error is not None:
+                    yield "error", self.error
+                return
+            while True:
+                event, data = await listener.get()
+                yield event, data
+                if event == "status" and data["status"] in self.TERMINAL:
+                    # result / error events were queued right after the status
+                    while not listener.empty():
+                        yield listener.get_nowait()
+                    return
+        finally:
+            self._listeners.discard(listener)
+
+    def snapshot(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "output": self.output,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class RemoteEvaluationJob:
+    """A job running in another worker process, followed through the job store"""
+
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, job_id: str, row: dict):
+        self.id = job_id
+        self._update(row)
+
+    def _update(self, row: dict):
+        snapshot = row["snapshot"]
+        if row["status"] not in EvaluationJob.TERMINAL and row["updated_at"] < time.time() - EvaluationJobStore.STALE_AFTER:
+            snapshot = {
+                **snapshot,
+                "status": "failed",
+                "error": {"status": 503, "detail": "평가를 실행하던 워커가 종료되었습니다"},
+            }
+        self._snapshot = snapshot
+        self.status = snapshot["status"]
+        self.output = snapshot["output"]
+        self.result = snapshot["result"]
+        self.error = snapshot["error"]
+
+    async def _poll(self):
+        await asyncio.sleep(self.POLL_INTERVAL)
+        row = await run_blocking(_evaluation_jobs.get, self.id)
+        if row is not None:
+            self._update(row)
+
+    async def wait(self):
+        while self.status not in EvaluationJob.TERMINAL:
+            await self._poll()
+
+    async def events(self):
+        """Same events as EvaluationJob.events(), from snapshots"""
+        status, sent = self.status, len(self.output)
+        yield "status", {"status": status}
+        if self.output:
+            yield "output", {"text": self.output}
+        while status not in EvaluationJob.TERMINAL:
+            await self._poll()
+            if len(self.output) > sent:
+                yield "output", {"text": self.output[sent:]}
+                sent = len(self.output)
+            if self.status != status:
+                status = self.status
+                yield "status", {"status": status}
+        if self.result is not None:
+            yield "result", self.result
+        if self.error is not None:
+            yield "error", self.error
+
+    def snapshot(self) -> dict:
+        return dict(self._snapshot)
+
+
+class EvaluationQueue:
+    """Runs evaluations on a fixed number of workers; the rest wait in line.
+
+    Identical summaries share one job, and finished jobs are kept for
+    EVAL_JOB_RETENTION seconds so clients can poll or re-subscribe. Jobs are
+    mirrored to the job store, so requests handled by another uvicorn worker
+    can poll, stream, cancel or join them. Concurrency limits are per worker.
+    """
+
+    EVAL_JOB_RETENTION = 600
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.jobs: dict = {}  # job id -> EvaluationJob
+        self._by_key: dict = {}  # cache key -> active job
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list = []
+        self._sharer: Optional[asyncio.Task] = None
+        self.running = 0
+        self.counts = {"completed": 0, "failed": 0, "cancelled": 0, "timeouts": 0, "cache_hits": 0}
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+        self._sharer = asyncio.create_task(self._share_loop())
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        self._sharer.cancel()
+        for job in list(self.jobs.values()):
+            if job.status not in EvaluationJob.TERMINAL:
+                self.cancel(job.id)
+        await self._share()
+
+    async def _share(self) -> list:
+        """Write changed and running jobs to the job store; returns cancel requests for them"""
+        active = [job for job in self.jobs.values() if job.dirty or job.status not in EvaluationJob.TERMINAL]
+        if not active:
+            return []
+        rows = []
+        for job in active:
+            job.dirty = False
+            rows.append(job.store_row())
+        await run_blocking(_evaluation_jobs.save, rows)
+        return await run_blocking(_evaluation_jobs.cancel_requests)
+
+    async def _share_loop(self):
+        purged_at = 0.0
+        while True:
+            await asyncio.sleep(RemoteEvaluationJob.POLL_INTERVAL)
+            try:
+                for job_id in await self._share():
+                    self.cancel(job_id)
+                if time.monotonic() - purged_at > 60:
+                    purged_at = time.monotonic()
+                    await run_blocking(_evaluation_jobs.purge, self.EVAL_JOB_RETENTION)
+            except Exception as e:
+                print(f"[Evaluate] Job store sync failed: {e}")
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "queued")
+
+    def _purge(self):
+        cutoff = time.time() - self.EVAL_JOB_RETENTION
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    async def submit(self, summary: dict, refresh: bool = False) -> tuple:
+        """Return (job, cache status): HIT from the result cache, COALESCED onto
+        an identical active job, or MISS for a newly queued one"""
+        self._purge()
+        key = _evaluation_key(summary)
+
+        if not refresh:
+            active = self._by_key.get(key)
+            if active is not None:
+                return active, "COALESCED"
+            # The same summary may already be running in another worker
+            remote = await self._find_remote(key)
+            if remote is not None:
+                return remote, "COALESCED"
+
+        job = EvaluationJob(summary, key)
+        if EVAL_CACHE_TTL > 0 and not refresh:
+            cached = await run_blocking(_evaluation_cache.get, key)
+            if cached is not None:
+                self.jobs[job.id] = job
+                self.counts["cache_hits"] += 1
+                job.finish("done", result=json.loads(cached))
+                await self._save(job)
+                return job, "HIT"
+
+        if self.depth >= self.max_queue:
+            raise HTTPException(status_code=429, detail="평가 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요")
+        self.jobs[job.id] = job
+        self._by_key[key] = job
+        await self._save(job)
+        self._queue.put_nowait(job)
+        return job, "MISS"
+
+    async def _save(self, job: EvaluationJob):
+        # Visible to other workers before the job id reaches the client
+        job.dirty = False
+        await run_blocking(_evaluation_jobs.save, [job.store_row()])
+
+    async def _find_remote(self, key: str) -> Optional[RemoteEvaluationJob]:
+        job_id = await run_blocking(_evaluation_jobs.find_active, key)
+        if job_id is None or job_id in self.jobs:
+            return None
+        return await self.get(job_id)
+
+    async def get(self, job_id: str):
+        """A job of this worker, or a view of one running in another worker"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        row = await run_blocking(_evaluation_jobs.get, job_id)
+        if row is None or row["worker"] == _WORKER_ID:
+            return None
+        return RemoteEvaluationJob(job_id, row)
+
+    async def request_cancel(self, job_id: str):
+        """Cancel a job here, or ask the worker running it to"""
+        job = self.cancel(job_id)
+        if job is not None:
+            return job
+        job = await self.get(job_id)
+        if job is not None:
+            await run_blocking(_evaluation_jobs.request_cancel, job_id)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[EvaluationJob]:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == "queued":
+            # The worker skips it when it comes up
+            self._release(job)
+            job.finish("cancelled")
+            self.counts["cancelled"] += 1
+        elif job.status == "running" and job.task is not None:
+            job.task.cancel()
+        return job
+
+    def _release(self, job: EvaluationJob):
+        if self._by_key.get(job.key) is job:
+            del self._by_key[job.key]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                continue
+            self.running += 1
+            job.started_at = time.time()
+            job.set_status("running")
+            job.task = asyncio.create_task(_run_evaluation(job.summary, on_output=job.append_output))
+            try:
+                result = await job.task
+            except asyncio.CancelledError:
+                if not job.task.cancelled():
+                    raise  # the worker itself is shutting down
+                self.counts["cancelled"] += 1
+                job.finish("cancelled")
+            except HTTPException as e:
+                self.counts["timeouts" if e.status_code == 504 else "failed"] += 1
+                job.finish("failed", error={"status": e.status_code, "detail": e.detail})
+            except Exception as e:
+                self.counts["failed"] += 1
+                job.finish("failed", error={"status": 500, "detail": str(e)})
+            else:
+                self.counts["completed"] += 1
+                if EVAL_CACHE_TTL > 0:
+                    await run_blocking(_evaluation_cache.put, job.key, json.dumps(result, ensure_ascii=False))
+                job.finish("done", result=result)
+            finally:
+                self.running -= 1
+                self._release(job)
+            try:
+                await self._save(job)
+            except Exception as e:
+                print(f"[Evaluate] Job store sync failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "engine": evaluation_engine.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "timeout": EVAL_TIMEOUT,
+            "running": self.running,
+            "queued": self.depth,
+            **self.counts,
+            "jobs": [
+                {"job_id": job.id, "status": job.status, "created_at": job.created_at}
+                for job in self.jobs.values()
+                if job.status not in EvaluationJob.TERMINAL
+            ],
+        }
+
+
+evaluation_queue = EvaluationQueue(EVAL_MAX_CONCURRENCY, EVAL_QUEUE_MAX)
+
+register_metric(Gauge(
+    "lifeops_evaluation_queue_depth", "Evaluation jobs waiting for a worker", lambda: evaluation_queue.depth,
+))
+register_metric(Gauge(
+    "lifeops_evaluation_running", "Evaluation jobs currently running", lambda: evaluation_queue.running,
+))
+
+
+async def _job_or_404(job_id: str):
+    job = await evaluation_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    return job
+
+
 @app.post("/api/evaluate")
-async def evaluate_status(req: EvaluateRequest):
-    """Evaluate current life status using Claude Code CLI subprocess"""
-    claude_path = find_claude_cli()
-    if not claude_path:
-        raise HTTPException(status_code=500, detail="Claude Code CLI가 설치되어 있지 않습니다")
+async def evaluate_status(req: EvaluateRequest, refresh: bool = False):
+    """Evaluate current life status and wait for the result (runs through the job queue)"""
+    job, cache = await evaluation_queue.submit(req.summary, refresh=refresh)
+    await job.wait()
+    if job.status == "done":
+        return JSONResponse(content=job.result, headers={"X-Evaluation-Cache": cache})
+    error = job.error or {"status": 499, "detail": "평가가 취소되었습니다"}
+    raise HTTPException(status_code=error["status"], detail=error["detail"])
+
+
+@app.post("/api/evaluate/jobs")
+async def submit_evaluation_job(req: EvaluateRequest, refresh: bool = False):
+    """Queue an evaluation and return its job id immediately"""
+    job, cache = await evaluation_queue.submit(req.summary, refresh=refresh)
+    return {"job_id": job.id, "status": job.status, "cache": cache, "queued": evaluation_queue.depth}
+
+
+@app.get("/api/evaluate/jobs/{job_id}")
+async def get_evaluation_job(job_id: str):
+    """Poll an evaluation job (partial output while running, result when done)"""
+    return (await _job_or_404(job_id)).snapshot()
+
+
+@app.get("/api/evaluate/jobs/{job_id}/events")
+async def stream_evaluation_job(job_id: str):
+    """Server-Sent Events: status changes, output chunks, then result or error"""
+    job = await _job_or_404(job_id)
+
+    async def events():
+        async for event, data in job.events():
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    summary = req.summary
 
-    prompt = f"""당신은 취업 준비생의 현재 상태를 평가하는 커리어 코치입니다.
+@app.delete("/api/evaluate/jobs/{job_id}")
+async def cancel_evaluation_job(job_id: str):
+    """Cancel a queued or running evaluation"""
+    job = await evaluation_queue.request_cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    return {"job_id": job.id, "status": job.status}
 
-아래 데이터를 분석하고, 반드시 아래 JSON 형식으로만 응답하세요. 다른 텍스트 없이 순수 JSON만 반환하세요.
 
-## 현재 상태 데이터
-{json.dumps(summary, ensure_ascii=False, indent=2)}
+@app.get("/api/evaluate/queue")
+async def evaluation_queue_status():
+    """Running / queued evaluations and timeout / cancellation counters"""
+    return evaluation_queue.stats()
+
+
+async def _communicate_streaming(process, data: bytes, on_output=None):
+    """Like process.communicate(), but reports stdout text as it arrives"""
+    process.stdin.write(data)
+    await process.stdin.drain()
+    process.stdin.close()
+
+    stderr_task = asyncio.ensure_future(process.stderr.read())
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = []
+    try:
+        while True:
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if on_output is not None:
+                text = decoder.decode(chunk)
+                if text:
+                    on_output(text)
+        stderr = await stderr_task
+    finally:
+        stderr_task.cancel()
+    await process.wait()
+    return b"".join(chunks), stderr
+
+
+# Shortest prompt prefix the API caches (Haiku models need more)
+EVAL_CACHE_MIN_TOKENS = 2048 if "haiku" in EVAL_MODEL else 1024
+
+# Fixed part of the prompt. Sent as a system block by the SDK engine and
+# marked for caching when it is long enough to be cached, so only the summary
+# below it is new input on each call.
+EVAL_SYSTEM_PROMPT = """당신은 취업 준비생의 현재 상태를 평가하는 커리어 코치입니다.
+
+사용자가 보내는 현재 상태 데이터를 분석하고, 반드시 아래 JSON 형식으로만 응답하세요. 다른 텍스트 없이 순수 JSON만 반환하세요.
 
 ## 프로필
 - 이름: 최대열
@@ -907,40 +5621,60 @@ async def evaluate_status(req: EvaluateRequest):
 - 목표: 공공기관/준정부기관 전산직 정규직 또는 광주/전남 소재 IT기업
 
 ## 응답 JSON 형식
-{{
+{
   "overallScore": 0-100 숫자,
   "categories": [
-    {{
+    {
       "name": "구직활동",
       "score": 0-100 숫자,
       "analysis": "현재 상태 분석 (2-3문장)",
       "suggestion": "개선 제안 (1-2문장)"
-    }},
-    {{
+    },
+    {
       "name": "스펙/자격증",
       "score": 0-100 숫자,
       "analysis": "현재 상태 분석 (2-3문장)",
       "suggestion": "개선 제안 (1-2문장)"
-    }},
-    {{
+    },
+    {
       "name": "일상관리",
       "score": 0-100 숫자,
       "analysis": "현재 상태 분석 (2-3문장)",
       "suggestion": "개선 제안 (1-2문장)"
-    }},
-    {{
+    },
+    {
       "name": "재테크",
       "score": 0-100 숫자,
       "analysis": "현재 상태 분석 (2-3문장)",
       "suggestion": "개선 제안 (1-2문장)"
-    }}
+    }
   ],
   "strengths": ["강점1", "강점2", "강점3"],
   "improvements": ["개선점1", "개선점2", "개선점3"],
   "actionItems": ["액션아이템1", "액션아이템2", "액션아이템3"]
-}}"""
+}"""
 
-    try:
+
+def _evaluation_user_prompt(summary: dict) -> str:
+    return f"## 현재 상태 데이터\n{json.dumps(summary, ensure_ascii=False, indent=2)}"
+
+
+class ClaudeCliEngine:
+    """Runs `claude -p` as a subprocess (uses the CLI's own subscription auth)"""
+
+    label = "Claude CLI"
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.env: Optional[dict] = None
+
+    @property
+    def name(self) -> str:
+        return "cli"
+
+    def resolve(self):
+        """Locate the binary and build the subprocess environment once"""
+        self.path = find_claude_cli()
         # Ensure node/nvm paths are in PATH for the subprocess
         env = os.environ.copy()
         home = os.path.expanduser("~")
@@ -953,18 +5687,32 @@ async def evaluate_status(req: EvaluateRequest):
                     break
         # Remove ANTHROPIC_API_KEY so claude CLI uses its own subscription auth
         env.pop("ANTHROPIC_API_KEY", None)
+        self.env = env
+        print(f"[Evaluate] Engine: cli ({self.path or 'claude not found'})")
+
+    async def evaluate(self, summary: dict, on_output=None) -> str:
+        if not self.path:
+            # Installed after startup?
+            self.resolve()
+        if not self.path:
+            raise HTTPException(status_code=500, detail="Claude Code CLI가 설치되어 있지 않습니다")
 
+        prompt = f"{EVAL_SYSTEM_PROMPT}\n\n{_evaluation_user_prompt(summary)}"
         process = await asyncio.create_subprocess_exec(
-            claude_path, "-p", "--output-format", "text",
+            self.path, "-p", "--output-format", "text",
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
-        stdout, stderr = await asyncio.wait_for(
-            process.communicate(input=prompt.encode("utf-8")),
-            timeout=120,
+            env=self.env,
         )
+        try:
+            stdout, stderr = await _communicate_streaming(process, prompt.encode("utf-8"), on_output)
+        except BaseException:
+            # Timed out or cancelled: don't leave the CLI running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
 
         if process.returncode != 0:
             err_msg = stderr.decode("utf-8", errors="replace").strip()
@@ -974,26 +5722,141 @@ async def evaluate_status(req: EvaluateRequest):
             print(f"[Evaluate] stdout: {out_msg}")
             raise HTTPException(status_code=500, detail=f"Claude CLI 오류 (code={process.returncode}): {err_msg or out_msg}")
 
-        response_text = stdout.decode("utf-8").strip()
+        return stdout.decode("utf-8")
 
-        # JSON 파싱 (마크다운 코드블록 제거)
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1])
-        if response_text.endswith("```"):
-            response_text = response_text[:-3].strip()
 
-        result = json.loads(response_text)
-        return JSONResponse(content=result)
+class AnthropicSdkEngine:
+    """Streams from the Messages API, caching the fixed prompt when it is long enough"""
 
-    except asyncio.TimeoutError:
-        raise HTTPException(status_code=504, detail="Claude CLI 응답 시간 초과 (120초)")
+    label = "Anthropic API"
+
+    def __init__(self):
+        self.client: Optional[anthropic.AsyncAnthropic] = None
+        self.cache_prompt: Optional[bool] = None  # measured on first use
+        self.cache_warned = False
+
+    @property
+    def name(self) -> str:
+        return f"sdk:{EVAL_MODEL}"
+
+    def resolve(self):
+        # One client (and connection pool) for the process lifetime
+        self.client = anthropic.AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY,
+            base_url=ANTHROPIC_BASE_URL or None,
+            max_retries=2,
+        )
+        print(f"[Evaluate] Engine: sdk ({EVAL_MODEL} via {self.client.base_url})")
+
+    async def _system(self) -> list:
+        """The fixed prompt as a system block, marked for caching only if the API would cache it"""
+        if self.cache_prompt is None:
+            try:
+                counted = await self.client.messages.count_tokens(
+                    model=EVAL_MODEL,
+                    system=EVAL_SYSTEM_PROMPT,
+                    messages=[{"role": "user", "content": "."}],
+                )
+            except anthropic.APIError as e:
+                print(f"[Evaluate] Could not count system prompt tokens, not caching it: {e}")
+            else:
+                self.cache_prompt = counted.input_tokens >= EVAL_CACHE_MIN_TOKENS
+                print(
+                    f"[Evaluate] System prompt is {counted.input_tokens} tokens, "
+                    f"caching {'on' if self.cache_prompt else f'off (under {EVAL_CACHE_MIN_TOKENS})'}"
+                )
+        block = {"type": "text", "text": EVAL_SYSTEM_PROMPT}
+        if self.cache_prompt:
+            block["cache_control"] = {"type": "ephemeral"}
+        return [block]
+
+    async def evaluate(self, summary: dict, on_output=None) -> str:
+        if self.client is None:
+            self.resolve()
+        try:
+            system = await self._system()
+            async with self.client.messages.stream(
+                model=EVAL_MODEL,
+                max_tokens=EVAL_MAX_TOKENS,
+                system=system,
+                messages=[{"role": "user", "content": _evaluation_user_prompt(summary)}],
+            ) as stream:
+                async for text in stream.text_stream:
+                    if on_output is not None:
+                        on_output(text)
+                message = await stream.get_final_message()
+        except anthropic.APIStatusError as e:
+            raise HTTPException(status_code=502, detail=f"Anthropic API 오류 ({e.status_code}): {e.message}")
+        except anthropic.APIConnectionError as e:
+            raise HTTPException(status_code=502, detail=f"Anthropic API 연결 실패: {e}")
+
+        usage = message.usage
+        print(
+            f"[Evaluate] sdk usage: in={usage.input_tokens} out={usage.output_tokens} "
+            f"cache_read={getattr(usage, 'cache_read_input_tokens', None)} "
+            f"cache_write={getattr(usage, 'cache_creation_input_tokens', None)}"
+        )
+        cached = usage.cache_read_input_tokens or usage.cache_creation_input_tokens
+        if "cache_control" in system[0] and not cached and not self.cache_warned:
+            # Neither read nor written: the prefix is under the model's cache minimum after all
+            self.cache_warned = True
+            print(
+                f"[Evaluate] System prompt was not cached; {EVAL_MODEL} may need a prefix longer than "
+                f"{EVAL_CACHE_MIN_TOKENS} tokens"
+            )
+        return "".join(block.text for block in message.content if block.type == "text")
+
+
+EVAL_ENGINES = {
+    "cli": ClaudeCliEngine,
+    "sdk": AnthropicSdkEngine,
+}
+
+if EVAL_ENGINE not in EVAL_ENGINES:
+    print(f"[Evaluate] Unknown EVAL_ENGINE={EVAL_ENGINE!r}, using cli")
+evaluation_engine = EVAL_ENGINES.get(EVAL_ENGINE, ClaudeCliEngine)()
+
+
+def _parse_evaluation(response_text: str) -> dict:
+    response_text = response_text.strip()
+
+    # JSON 파싱 (마크다운 코드블록 제거)
+    if response_text.startswith("```"):
+        lines = response_text.split("\n")
+        response_text = "\n".join(lines[1:-1])
+    if response_text.endswith("```"):
+        response_text = response_text[:-3].strip()
+
+    try:
+        return json.loads(response_text)
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"AI 응답 파싱 실패: {str(e)}\n원본: {response_text[:500]}")
+
+
+async def _run_evaluation(summary: dict, on_output=None) -> dict:
+    """Evaluate current life status with the configured engine"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response_text = await asyncio.wait_for(
+            evaluation_engine.evaluate(summary, on_output),
+            timeout=EVAL_TIMEOUT,
+        )
+        result = _parse_evaluation(response_text)
+        outcome = "ok"
+        return result
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise HTTPException(status_code=504, detail=f"{evaluation_engine.label} 응답 시간 초과 ({EVAL_TIMEOUT}초)")
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"평가 실패: {str(e)}")
+    finally:
+        evaluation_duration.observe(time.perf_counter() - started, evaluation_engine.name, outcome)
 
 
 # ============ Health Check ============
@@ -1004,7 +5867,39 @@ async def health():
     return {"status": "ok", "timestamp": datetime.now().isoformat()}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, upstream and queue metrics"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/google/limits")
+async def google_limits():
+    """Current per-API rate limiter state (adapted rate, waiters, pauses)"""
+    return {api: limiter.stats() for api, limiter in _rate_limiters.items()}
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss counters (for tuning CACHE_TTL_*)"""
+    return response_cache.stats()
+
+
+@app.get("/api/worker")
+async def worker_status():
+    """Which worker process answered, and its cross-worker invalidation counters"""
+    return {
+        "workers": WORKERS,
+        **worker_events.stats(),
+        "sheets_journal": sheets_write_queue.journal_path,
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=True)
+    if WORKERS > 1:
+        # uvicorn can't combine reload with several workers
+        uvicorn.run("main:app", host="0.0.0.0", port=PORT, workers=WORKERS)
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=True)
@@ -1,4 +1,5 @@
 #!/bin/bash
 cd /Users/haneulhaneul/dev/lifeops-panel/backend
 source venv/bin/activate
-exec uvicorn main:app --host 0.0.0.0 --port 8000
+# WEB_CONCURRENCY > 1 runs several worker processes sharing STATE_DB_PATH
+exec uvicorn main:app --host 0.0.0.0 --port 8000 --workers "${WEB_CONCURRENCY:-1}"
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# main creates its state files on import; keep them out of the source tree
+_state_dir = tempfile.mkdtemp(prefix="lifeops-tests-")
+os.environ.setdefault("STATE_DB_PATH", os.path.join(_state_dir, "state.db"))
+os.environ.setdefault("SHEETS_JOURNAL_PATH", os.path.join(_state_dir, "sheets-journal.jsonl"))
+os.environ.setdefault("TOKEN_PATH", os.path.join(_state_dir, "tokens.json"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+import asyncio
+
+import main
+
+
+def test_batch_invalidation_is_collected_across_operations(monkeypatch):
+    calls = {"invalidate": [], "stale": [], "note_write": []}
+    monkeypatch.setattr(main.response_cache, "invalidate", lambda *tags, **kw: calls["invalidate"].append(tags))
+    monkeypatch.setattr(main.sync_engine, "mark_stale_many", lambda mirrors: calls["stale"].append(mirrors))
+
+    async def note_write(files=(), removed=()):
+        calls["note_write"].append((list(files), list(removed)))
+
+    monkeypatch.setattr(main.drive_index, "note_write", note_write)
+
+    done = [
+        (main.BatchOperation(method="tasks.tasks.patch", params={"tasklist": "L1", "task": f"t{i}"}), {})
+        for i in range(200)
+    ] + [
+        (main.BatchOperation(method="drive.files.update", params={"fileId": f"f{i}"}, body={"name": f"n{i}"}), {"id": f"f{i}"})
+        for i in range(3)
+    ] + [
+        (main.BatchOperation(method="drive.files.delete", params={"fileId": "gone"}), None),
+        (main.BatchOperation(method="calendar.events.delete", params={"eventId": "e"}), None),
+    ]
+    asyncio.run(main._invalidate_for_operations(done))
+
+    assert len(calls["invalidate"]) == 1
+    assert set(calls["invalidate"][0]) == {
+        ("tasks", "L1"), ("drive",), ("sheets", "f0"), ("sheets", "f1"), ("sheets", "f2"), ("sheets", "gone"),
+        ("calendar", "primary"),
+    }
+    assert calls["stale"] == [[("tasks", "L1"), ("calendar", "primary")]]
+    assert calls["note_write"] == [([{"name": f"n{i}", "id": f"f{i}"} for i in range(3)], ["gone"])]
+
+
+def test_nothing_to_invalidate_for_an_empty_batch(monkeypatch):
+    published = []
+    monkeypatch.setattr(main.worker_events, "publish", lambda *args: published.append(args))
+    asyncio.run(main._invalidate_for_operations([]))
+    assert published == []
+
+
+def test_stale_marks_for_many_mirrors_are_one_worker_event(monkeypatch):
+    published = []
+    monkeypatch.setattr(main.worker_events, "publish", lambda *args: published.append(args))
+    main.sync_engine.mark_stale_many([("tasks", "L1"), ("calendar", "primary")])
+    assert published == [("stale", None, [["tasks", "L1"], ["calendar", "primary"]])]
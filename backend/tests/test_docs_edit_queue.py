@@ -0,0 +1,228 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+TEXT = "abcdefghij"
+
+
+def insert(index, text):
+    return {"insertText": {"location": {"index": index}, "text": text}}
+
+
+def delete(start, end):
+    return {"deleteContentRange": {"range": {"startIndex": start, "endIndex": end}}}
+
+
+def style(start, end):
+    return {"updateTextStyle": {"range": {"startIndex": start, "endIndex": end}, "textStyle": {"bold": True}, "fields": "bold"}}
+
+
+def edit(*requests, revision="r1", **write_control):
+    if revision:
+        write_control.setdefault("requiredRevisionId", revision)
+    return {"requests": list(requests), "writeControl": write_control}
+
+
+def apply(text, requests):
+    """Apply insert/delete requests like Docs does (body indices start at 1)"""
+    for request in requests:
+        if "insertText" in request:
+            index = request["insertText"]["location"]["index"] - 1
+            text = text[:index] + request["insertText"]["text"] + text[index:]
+        elif "deleteContentRange" in request:
+            range_ = request["deleteContentRange"]["range"]
+            text = text[:range_["startIndex"] - 1] + text[range_["endIndex"] - 1:]
+    return text
+
+
+def plan(*bodies):
+    async def run():
+        edits = [main.DocsEdit(body["requests"], body.get("writeControl")) for body in bodies]
+        return main._plan_docs_batches(edits)
+    return asyncio.run(run())
+
+
+# ============ Transforms ============
+
+
+def test_insert_shifts_past_earlier_insert_before_it():
+    op = main._docs_op(insert(7, "Z"))
+    past = main._docs_op(insert(3, "XY"))
+    assert main._docs_transform(op, past, later=True)["at"] == 9
+    assert main._docs_transform(past, op, later=False)["at"] == 3
+
+
+def test_same_index_inserts_keep_earlier_edit_first():
+    first = main._docs_op(insert(3, "1"))
+    second = main._docs_op(insert(3, "2"))
+    assert main._docs_transform(second, first, later=True)["at"] == 4
+    assert main._docs_transform(first, second, later=False)["at"] == 3
+
+
+def test_delete_shifts_indices_after_it():
+    op = main._docs_op(insert(8, "Z"))
+    past = main._docs_op(delete(2, 5))
+    assert main._docs_transform(op, past, later=True)["at"] == 5
+
+
+def test_conflicts_are_not_transformed():
+    assert main._docs_transform(main._docs_op(insert(4, "Z")), main._docs_op(delete(2, 6)), later=True) is None
+    assert main._docs_transform(main._docs_op(delete(3, 7)), main._docs_op(delete(5, 9)), later=True) is None
+    assert main._docs_transform(main._docs_op(delete(3, 7)), main._docs_op(insert(5, "Z")), later=True) is None
+
+
+def test_style_range_grows_over_text_inserted_inside_it():
+    op = main._docs_op(style(2, 6))
+    moved = main._docs_transform(op, main._docs_op(insert(4, "XYZ")), later=True)
+    assert (moved["start"], moved["end"]) == (2, 9)
+
+
+def test_lengths_count_utf16_code_units():
+    past = main._docs_op(insert(1, "😀"))
+    assert past["length"] == 2
+    assert main._docs_transform(main._docs_op(insert(3, "x")), past, later=True)["at"] == 5
+
+
+def test_unknown_or_segmented_requests_have_no_op():
+    assert main._docs_op({"insertTable": {"rows": 1, "columns": 1}}) is None
+    assert main._docs_op({"insertText": {"location": {"index": 1, "segmentId": "h"}, "text": "x"}}) is None
+
+
+# ============ Merged edits ============
+
+
+@pytest.mark.parametrize("first, second, expected", [
+    (edit(insert(3, "XX")), edit(insert(7, "YY")), "abXXcdefYYghij"),
+    (edit(delete(2, 5)), edit(insert(8, "Z")), "aefgZhij"),
+    (edit(insert(5, "XX")), edit(delete(2, 4)), "adXXefghij"),
+    (edit(insert(3, "1")), edit(insert(3, "2")), "ab12cdefghij"),
+    (edit(delete(8, 10)), edit(delete(1, 3)), "cdefgj"),
+])
+def test_edits_against_one_revision_merge_into_one_call(first, second, expected):
+    batches = plan(first, second)
+    assert len(batches) == 1
+    assert apply(TEXT, batches[0].requests) == expected
+
+
+def test_later_requests_of_an_edit_see_its_earlier_ones():
+    # The second edit's delete is indexed against the text after its own insert
+    batches = plan(edit(insert(1, "XX")), edit(insert(2, "Q"), delete(5, 6)))
+    assert len(batches) == 1
+    assert apply(TEXT, batches[0].requests) == "XXaQbcefghij"
+
+
+def test_three_edits_merge_in_order():
+    batches = plan(edit(insert(2, "A")), edit(delete(4, 6)), edit(insert(9, "B")))
+    assert len(batches) == 1
+    assert apply(TEXT, batches[0].requests) == "aAbcfghBij"
+
+
+def test_edit_without_write_control_applies_to_latest_text():
+    batches = plan(edit(insert(1, "XX")), edit(delete(1, 3), revision=None))
+    assert len(batches) == 1
+    assert apply(TEXT, batches[0].requests) == TEXT
+
+
+@pytest.mark.parametrize("first, second", [
+    (edit(delete(3, 7)), edit(delete(5, 9))),
+    (edit(delete(2, 6)), edit(insert(4, "Z"))),
+    (edit(insert(2, "X")), edit(insert(5, "Y"), revision="r2")),
+    (edit(insert(2, "X"), revision=None, targetRevisionId="r1"), edit(insert(5, "Y"))),
+    (edit({"insertTable": {"rows": 1, "columns": 1, "location": {"index": 1}}}), edit(insert(5, "Y"))),
+])
+def test_unsafe_edits_are_sent_separately(first, second):
+    batches = plan(first, second)
+    assert len(batches) == 2
+    assert batches[1].requests == second["requests"]
+
+
+# ============ Queue ============
+
+
+class FakeDocs:
+    """Stands in for execute(): records batchUpdate bodies"""
+
+    def __init__(self, delay=0.05, error=None):
+        self.delay = delay
+        self.error = error
+        self.bodies = []
+
+    async def __call__(self, request, creds, idempotent=None):
+        body = json.loads(request.body)
+        self.bodies.append(body)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"documentId": "doc", "replies": [{} for _ in body["requests"]]}
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    async def credentials(account_id=None):
+        return object()
+    monkeypatch.setattr(main, "get_credentials", credentials)
+    return main.DocsEditQueue(0)
+
+
+def test_single_edit_is_sent_without_delay(queue, monkeypatch):
+    fake = FakeDocs(delay=0)
+    monkeypatch.setattr(main, "execute", fake)
+
+    async def run():
+        pending = asyncio.ensure_future(queue.submit("doc", edit(insert(1, "x"))))
+        # No debounce timer: the call goes out within a few loop iterations
+        for _ in range(5):
+            await asyncio.sleep(0)
+        sent = len(fake.bodies)
+        return sent, await pending
+
+    sent, result = asyncio.run(run())
+    assert sent == 1
+    assert result["replies"] == [{}]
+
+
+def test_edits_arriving_during_a_call_are_merged(queue, monkeypatch):
+    fake = FakeDocs()
+    monkeypatch.setattr(main, "execute", fake)
+
+    async def run():
+        first = asyncio.ensure_future(queue.submit("doc", edit(insert(1, "a"), revision=None)))
+        await asyncio.sleep(0.01)
+        rest = [queue.submit("doc", edit(insert(1, str(i)), revision=None)) for i in range(4)]
+        return await asyncio.gather(first, *rest)
+
+    results = asyncio.run(run())
+    assert len(results) == 5
+    assert [len(body["requests"]) for body in fake.bodies] == [1, 4]
+
+
+def test_flush_failure_fails_waiting_edits(queue, monkeypatch):
+    async def broken(account_id=None):
+        raise RuntimeError("credential store unavailable")
+    monkeypatch.setattr(main, "get_credentials", broken)
+
+    async def run():
+        return await asyncio.wait_for(queue.submit("doc", edit(insert(1, "x"))), timeout=2)
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(run())
+    assert raised.value.status_code == 500
+
+
+def test_error_conversion_failure_fails_waiting_edits(queue, monkeypatch):
+    monkeypatch.setattr(main, "execute", FakeDocs(delay=0, error=ValueError("boom")))
+
+    def broken_google_error(e):
+        raise TypeError("cannot convert")
+    monkeypatch.setattr(main, "google_error", broken_google_error)
+
+    async def run():
+        return await asyncio.wait_for(queue.submit("doc", edit(insert(1, "x"))), timeout=2)
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(run())
+    assert "cannot convert" in raised.value.detail
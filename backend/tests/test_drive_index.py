@@ -0,0 +1,151 @@
+import json
+import os
+
+import pytest
+
+import main
+from bench import fake_google
+
+FIELDS = ["id", "name", "mimeType", "modifiedTime", "parents"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = main.DriveIndex(os.path.join(tmp_path, "state.db"))
+    index._write("me", fake_google.DRIVE_FILES, [], "token-1", 100.0, True)
+    return index
+
+
+def select(index, q, order_by="modifiedTime desc,name", limit=1000):
+    compiled = main.compile_drive_query(q)
+    order = main.compile_drive_order(order_by)
+    assert compiled is not None and order is not None
+    return index._select("me", compiled, order, FIELDS, limit)
+
+
+def drive(q, order_by="modifiedTime desc,name", limit=1000):
+    """What the fake Drive answers for the same files.list call"""
+    files = [file for file in fake_google.DRIVE_FILES if fake_google.DriveQuery(q).matches(file)]
+    files = fake_google._drive_sort(files, order_by)[:limit]
+    return fake_google._drive_fields(files, f"files({','.join(FIELDS)})")
+
+
+@pytest.mark.parametrize("q", [
+    "",
+    "name contains '문서 1'",
+    "name contains 'LIFEOPS'",
+    "name = '문서 7'",
+    "name != '문서 7' and trashed = false",
+    "mimeType = 'application/pdf' and starred = true",
+    "mimeType != 'application/vnd.google-apps.folder' and 'folder-b' in parents",
+    "trashed = true",
+    "starred != false and trashed = false",
+    "modifiedTime > '2000-01-01T00:00:00Z' and createdTime <= '2100-01-01'",
+    "name contains 'it\\'s'",
+    "name contains '문서' AND trashed = false",
+])
+def test_index_answers_match_drive(index, q):
+    assert select(index, q) == drive(q)
+
+
+@pytest.mark.parametrize("order_by", [
+    "name", "name desc", "createdTime", "createdTime desc,name", "modifiedTime", "folder,name desc",
+])
+def test_index_order_matches_drive(index, order_by):
+    q = "trashed = false"
+    assert select(index, q, order_by) == drive(q, order_by)
+
+
+def test_time_bounds_compare_instants_not_strings(index):
+    cutoff = main._utc_now().replace(microsecond=0)
+    # The same instant written with an offset and without fractional seconds
+    local = cutoff.astimezone(main.timezone(main.timedelta(hours=9))).isoformat()
+    q = f"modifiedTime >= '{local}'"
+    utc = f"modifiedTime >= '{cutoff.isoformat().replace('+00:00', 'Z')}'"
+    assert select(index, q) == drive(utc)
+
+
+def test_limit_applies_after_name_filters(index):
+    q = "name contains '문서 2'"
+    assert select(index, q, limit=5) == drive(q, limit=5)
+
+
+@pytest.mark.parametrize("q", [
+    "name = 'a' or name = 'b'",
+    "not trashed = true",
+    "(trashed = false)",
+    "fullText contains 'report'",
+    "'root' in parents",
+    "modifiedTime > 'yesterday'",
+    "name contains",
+    "trashed = false and",
+    "properties has { key='a' and value='b' }",
+])
+def test_unsupported_queries_fall_back_to_drive(q):
+    assert main.compile_drive_query(q) is None
+
+
+@pytest.mark.parametrize("order_by, expected", [
+    ("name", "name COLLATE NOCASE"),
+    ("modifiedTime desc, name", "modified_time DESC, name COLLATE NOCASE"),
+    ("folder", "mime_type != 'application/vnd.google-apps.folder'"),
+    ("", ""),
+    ("quotaBytesUsed", None),
+    ("name asc", None),
+])
+def test_compile_drive_order(order_by, expected):
+    assert main.compile_drive_order(order_by) == expected
+
+
+@pytest.mark.parametrize("fields, expected", [
+    ("files(id,name)", ["id", "name"]),
+    ("nextPageToken, files(id, mimeType)", ["id", "mimeType"]),
+    ("files(id),nextPageToken", ["id"]),
+    ("files(id,owners)", None),
+    ("files", None),
+    ("*", None),
+])
+def test_compile_drive_fields(fields, expected):
+    assert main.compile_drive_fields(fields) == expected
+
+
+def _stored(index, file_id):
+    row = main._sqlite_connect(index.path).execute(
+        "SELECT data FROM drive_files WHERE account = 'me' AND id = ?", (file_id,)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _stale(index):
+    _, synced_at, stale_at = index._state("me")
+    return stale_at >= synced_at
+
+
+def test_note_write_merges_into_the_indexed_file(index):
+    before = _stored(index, "file3")
+    index._note_write("me", [{"id": "file3", "name": "새 이름", "kind": "drive#file"}], [])
+    after = _stored(index, "file3")
+    assert after["name"] == "새 이름"
+    assert after["parents"] == before["parents"] and after["createdTime"] == before["createdTime"]
+    assert "kind" not in after
+    assert after["modifiedTime"] > before["modifiedTime"]
+    assert _stale(index)
+    # Renamed files are found by their new name right away
+    assert [f["id"] for f in select(index, "name contains '새'")] == ["file3"]
+
+
+def test_note_write_adds_new_files_and_drops_removed_ones(index):
+    index._note_write("me", [{"id": "new1", "name": "회의록", "mimeType": "application/pdf"}], ["file5"])
+    assert _stored(index, "file5") is None
+    created = _stored(index, "new1")
+    assert created["parents"] == [] and created["trashed"] is False
+    assert select(index, "name = '회의록' and trashed = false")[0]["id"] == "new1"
+    assert select(index, "")[0]["id"] == "new1"  # newest first
+
+
+def test_note_write_ignores_unseeded_accounts(index):
+    index._note_write("someone-else", [{"id": "x", "name": "x"}], [])
+    assert index._state("someone-else") is None
+    assert main._sqlite_connect(index.path).execute(
+        "SELECT COUNT(*) FROM drive_files WHERE account = 'someone-else'"
+    ).fetchone()[0] == 0
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+
+import main
+
+
+class _Stream:
+    def __init__(self, usage):
+        self.usage = usage
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    def text_stream(self):
+        async def chunks():
+            yield "{}"
+        return chunks()
+
+    async def get_final_message(self):
+        return SimpleNamespace(usage=self.usage, content=[SimpleNamespace(type="text", text="{}")])
+
+
+class _Messages:
+    def __init__(self, usage, prompt_tokens):
+        self.usage = usage
+        self.prompt_tokens = prompt_tokens
+        self.calls = []
+        self.counts = 0
+
+    async def count_tokens(self, **kwargs):
+        self.counts += 1
+        if isinstance(self.prompt_tokens, Exception):
+            raise self.prompt_tokens
+        return SimpleNamespace(input_tokens=self.prompt_tokens)
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        return _Stream(self.usage)
+
+
+def _engine(prompt_tokens=600, cache_read=0, cache_write=0):
+    engine = main.AnthropicSdkEngine()
+    messages = _Messages(SimpleNamespace(
+        input_tokens=200, output_tokens=10,
+        cache_read_input_tokens=cache_read, cache_creation_input_tokens=cache_write,
+    ), prompt_tokens)
+    engine.client = SimpleNamespace(messages=messages)
+    return engine, messages
+
+
+def test_short_prompt_is_sent_without_a_cache_breakpoint(capsys):
+    engine, messages = _engine(prompt_tokens=main.EVAL_CACHE_MIN_TOKENS - 1)
+    asyncio.run(engine.evaluate({}))
+    asyncio.run(engine.evaluate({}))
+    assert messages.counts == 1
+    assert messages.calls[0]["system"] == [{"type": "text", "text": main.EVAL_SYSTEM_PROMPT}]
+    # Not cached on purpose: no warning
+    assert "was not cached" not in capsys.readouterr().out
+
+
+def test_long_enough_prompt_is_cached_and_only_the_summary_varies():
+    engine, messages = _engine(prompt_tokens=main.EVAL_CACHE_MIN_TOKENS, cache_read=1500)
+    asyncio.run(engine.evaluate({"jobSearch": {"totalApplied": 3}}))
+    request = messages.calls[0]
+    assert request["system"] == [
+        {"type": "text", "text": main.EVAL_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+    ]
+    assert request["messages"] == [
+        {"role": "user", "content": main._evaluation_user_prompt({"jobSearch": {"totalApplied": 3}})},
+    ]
+
+
+def test_caching_stays_off_until_the_prompt_can_be_measured():
+    error = anthropic.APIConnectionError(request=httpx.Request("POST", "https://api.invalid/v1/messages/count_tokens"))
+    engine, messages = _engine(prompt_tokens=error)
+    asyncio.run(engine.evaluate({}))
+    assert "cache_control" not in messages.calls[0]["system"][0]
+
+    messages.prompt_tokens = 5000
+    asyncio.run(engine.evaluate({}))
+    assert "cache_control" in messages.calls[1]["system"][0]
+    assert messages.counts == 2
+
+
+def test_a_breakpoint_that_caches_nothing_is_reported_once(capsys):
+    engine, _ = _engine(prompt_tokens=5000)
+    asyncio.run(engine.evaluate({}))
+    asyncio.run(engine.evaluate({}))
+    assert capsys.readouterr().out.count("was not cached") == 1
+
+    engine, _ = _engine(prompt_tokens=5000, cache_write=2500)
+    asyncio.run(engine.evaluate({}))
+    assert "was not cached" not in capsys.readouterr().out
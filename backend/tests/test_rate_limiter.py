@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import main
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_burst_is_served_immediately_then_paced():
+    async def scenario():
+        limiter = main.AdaptiveRateLimiter("test", 20)
+        started = time.monotonic()
+        for _ in range(40):  # the burst: two seconds' worth
+            await limiter.acquire(main.PRIORITY_INTERACTIVE)
+        burst = time.monotonic() - started
+        for _ in range(4):
+            await limiter.acquire(main.PRIORITY_INTERACTIVE)
+        return burst, time.monotonic() - started
+
+    burst, total = run(scenario())
+    assert burst < 0.05
+    assert 0.15 <= total < 0.5  # four more tokens at 20/s
+
+
+def test_waiters_are_served_by_priority_then_fifo():
+    async def scenario():
+        limiter = main.AdaptiveRateLimiter("test", 50)
+        limiter.tokens = 0
+        served = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            served.append(name)
+
+        tasks = [asyncio.create_task(call(name, priority)) for name, priority in [
+            ("bulk-1", main.PRIORITY_BACKGROUND),
+            ("write", main.PRIORITY_WRITE),
+            ("bulk-2", main.PRIORITY_BACKGROUND),
+            ("read", main.PRIORITY_INTERACTIVE),
+        ]]
+        await asyncio.gather(*tasks)
+        return served
+
+    assert run(scenario()) == ["read", "write", "bulk-1", "bulk-2"]
+
+
+def test_cancelled_waiters_do_not_use_tokens():
+    async def scenario():
+        limiter = main.AdaptiveRateLimiter("test", 20)
+        limiter.tokens = 0
+        cancelled = asyncio.create_task(limiter.acquire(main.PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        started = time.monotonic()
+        await limiter.acquire(main.PRIORITY_BACKGROUND)
+        return time.monotonic() - started, limiter.stats()["waiting"]
+
+    waited, waiting = run(scenario())
+    assert waited < 0.09  # one token's worth (50ms), not two
+    assert waiting == 0
+
+
+def test_throttling_halves_the_rate_and_pauses():
+    async def scenario():
+        limiter = main.AdaptiveRateLimiter("test", 10)
+        limiter.throttled(retry_after=0.2)
+        assert limiter.rate == 5
+        started = time.monotonic()
+        await limiter.acquire(main.PRIORITY_INTERACTIVE)
+        return limiter, time.monotonic() - started
+
+    limiter, waited = run(scenario())
+    assert waited >= 0.19
+
+    for _ in range(10):
+        limiter.throttled(retry_after=0)
+    assert limiter.rate == main.AdaptiveRateLimiter.MIN_RATE
+
+    for _ in range(100):
+        limiter.succeeded()
+    assert limiter.rate == limiter.max_rate
+
+
+def test_a_batch_takes_one_token_per_request():
+    async def scenario():
+        limiter = main.AdaptiveRateLimiter("test", 100)  # burst 200
+        await limiter.acquire(main.PRIORITY_BACKGROUND, 180)
+        started = time.monotonic()
+        await limiter.acquire(main.PRIORITY_BACKGROUND, 40)  # 20 short
+        return time.monotonic() - started
+
+    assert 0.15 <= run(scenario()) < 0.5
+
+
+def test_a_batch_larger_than_the_burst_leaves_the_bucket_in_debt():
+    async def scenario():
+        limiter = main.AdaptiveRateLimiter("test", 10)  # burst 20
+        await asyncio.wait_for(limiter.acquire(main.PRIORITY_BACKGROUND, 50), 1)
+        return limiter.tokens
+
+    assert run(scenario()) < -29
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import HTTPException
+
+import main
+
+VALUES = [
+    ["날짜", "분류", "금액", "메모"],
+    ["2026-01-03", "식비", "12,000", "점심"],
+    ["2026-01-03", "교통", "1,450", ""],
+    ["2026-01-04", "식비", "₩8,500", "저녁"],
+    ["2026-01-05", "도서", "22000", "SQLD 교재"],
+    ["2026-01-05", "식비", "abc"],
+]
+
+
+def query(**fields):
+    return main.run_sheet_query(main.SheetTable(VALUES), main.SheetQueryRequest(range="Sheet1!A:D", **fields))
+
+
+def test_select_by_header_or_column_letter_pads_short_rows():
+    result = query(select=["분류", "D"])
+    assert result["columns"] == ["분류", "D"]
+    assert result["rows"][-1] == ["식비", ""]
+    assert result["total"] == 5
+
+
+@pytest.mark.parametrize("where, expected", [
+    ([{"column": "분류", "value": "식비"}], 3),
+    ([{"column": "분류", "op": "ne", "value": "식비"}], 2),
+    ([{"column": "메모", "op": "contains", "value": "sqld"}], 1),
+    ([{"column": "분류", "op": "in", "value": ["교통", "도서"]}], 2),
+    ([{"column": "메모", "op": "empty"}], 2),
+    ([{"column": "메모", "op": "not_empty"}], 3),
+    ([{"column": "금액", "op": "gte", "value": "10,000"}], 2),
+    ([{"column": "금액", "op": "lt", "value": 10000}], 2),  # "abc" is not a number
+    ([{"column": "날짜", "op": "gt", "value": "2026-01-03"}], 3),  # non-numeric: compared as text
+    ([{"column": "분류", "value": "식비"}, {"column": "금액", "op": "gt", "value": 10000}], 1),
+])
+def test_filters(where, expected):
+    assert query(where=where)["total"] == expected
+
+
+def test_group_by_with_aggregates():
+    result = query(
+        group_by=["분류"],
+        aggregates=[{"fn": "count"}, {"column": "금액", "fn": "sum", "alias": "합계"}, {"column": "금액", "fn": "avg"}],
+        order_by=[{"column": "합계", "desc": True}],
+    )
+    assert result["columns"] == ["분류", "count", "합계", "avg(금액)"]
+    assert result["rows"] == [
+        ["도서", 1, 22000.0, 22000.0],
+        ["식비", 3, 20500.0, 10250.0],
+        ["교통", 1, 1450.0, 1450.0],
+    ]
+
+
+def test_aggregates_without_group_by_cover_all_filtered_rows():
+    result = query(
+        where=[{"column": "분류", "value": "없음"}],
+        aggregates=[{"fn": "count"}, {"column": "금액", "fn": "sum"}, {"column": "금액", "fn": "max"}],
+    )
+    assert result["rows"] == [[0, 0, None]]
+
+
+def test_order_puts_numbers_before_text_and_pages_after_sorting():
+    result = query(select=["금액"], order_by=[{"column": "금액"}], offset=1, limit=2)
+    assert result["rows"] == [["₩8,500"], ["12,000"]]
+    assert result["total"] == 5
+    assert query(select=["금액"], order_by=[{"column": "금액"}])["rows"][-1] == ["abc"]
+
+
+def test_multi_key_order_is_stable():
+    result = query(select=["날짜", "금액"], order_by=[{"column": "날짜", "desc": True}, {"column": "금액"}])
+    assert result["rows"][:2] == [["2026-01-05", "22000"], ["2026-01-05", "abc"]]
+
+
+@pytest.mark.parametrize("fields", [
+    {"select": ["없는열"]},
+    {"where": [{"column": "금액", "op": "between", "value": 1}]},
+    {"aggregates": [{"fn": "sum"}]},
+    {"aggregates": [{"column": "금액", "fn": "median"}]},
+    {"select": ["분류"], "order_by": [{"column": "금액"}]},
+])
+def test_bad_queries_are_400(fields):
+    with pytest.raises(HTTPException) as raised:
+        query(**fields)
+    assert raised.value.status_code == 400
@@ -0,0 +1,113 @@
+import pytest
+
+import main
+
+
+def update(range_, values, option="USER_ENTERED", **extra):
+    return {"kind": "update", "range": range_, "values": values, "value_input_option": option, **extra}
+
+
+def append(range_, values, option="USER_ENTERED", insert="INSERT_ROWS"):
+    return {
+        "kind": "append", "range": range_, "values": values,
+        "value_input_option": option, "insert_data_option": insert,
+    }
+
+
+@pytest.mark.parametrize("range_, expected", [
+    ("A1", ("", 0, 0)),
+    ("Sheet1!B3", ("Sheet1", 2, 1)),
+    ("Sheet1!$C$10:$D$12", ("Sheet1", 9, 2)),
+    ("'My ''Data'' Sheet'!AA1:AB2", ("My 'Data' Sheet", 0, 26)),
+    ("'가계부 2026'!z100", ("가계부 2026", 99, 25)),
+    ("Sheet1!A:C", None),
+    ("Sheet1", None),
+    ("Sheet1!A1:C", None),
+    ("NamedRange", None),
+])
+def test_parse_a1_start(range_, expected):
+    assert main._parse_a1_start(range_) == expected
+
+
+@pytest.mark.parametrize("index, col", [(0, "A"), (25, "Z"), (26, "AA"), (51, "AZ"), (52, "BA"), (701, "ZZ"), (702, "AAA")])
+def test_column_letters_round_trip(index, col):
+    assert main._index_to_col(index) == col
+    assert main._col_to_index(col) == index
+    assert main._col_to_index(col.lower()) == index
+
+
+def test_a1_range_quotes_sheet_names():
+    assert main._a1_range("Sheet1", 0, 0, 1, 2) == "'Sheet1'!A1:C2"
+    assert main._a1_range("It's", 4, 26, 4, 26) == "'It''s'!AA5:AA5"
+    assert main._a1_range("", 0, 1, 0, 1) == "B1:B1"
+
+
+def test_merge_cells_folds_rows_into_rectangles():
+    cells = {("S", r, c): f"{r},{c}" for r in range(3) for c in range(2)}
+    assert main._merge_cells(cells) == [
+        {"range": "'S'!A1:B3", "majorDimension": "ROWS", "values": [["0,0", "0,1"], ["1,0", "1,1"], ["2,0", "2,1"]]},
+    ]
+
+
+def test_merge_cells_splits_gaps_and_sheets():
+    cells = {("S", 0, 0): 1, ("S", 0, 2): 2, ("S", 1, 0): 3, ("T", 0, 0): 4}
+    blocks = main._merge_cells(cells)
+    assert [(block["range"], block["values"]) for block in blocks] == [
+        ("'S'!A1:A1", [[1]]), ("'S'!C1:C1", [[2]]), ("'S'!A2:A2", [[3]]), ("'T'!A1:A1", [[4]]),
+    ]
+    # Rows of different widths are not folded together
+    cells = {("S", 0, 0): 1, ("S", 0, 1): 2, ("S", 1, 0): 3}
+    assert [block["range"] for block in main._merge_cells(cells)] == ["'S'!A1:B1", "'S'!A2:A2"]
+
+
+def test_overlapping_updates_keep_the_last_write_per_cell():
+    calls = main._plan_sheet_writes([
+        update("S!A1:B2", [[1, 2], [3, 4]]),
+        update("S!B2", [[40]]),
+        update("S!A3:B3", [[5, None]]),
+    ])
+    assert len(calls) == 1
+    assert calls[0]["data"] == [
+        {"range": "'S'!A1:B2", "majorDimension": "ROWS", "values": [[1, 2], [3, 40]]},
+        {"range": "'S'!A3:A3", "majorDimension": "ROWS", "values": [[5]]},
+    ]
+
+
+def test_column_major_updates_are_transposed():
+    calls = main._plan_sheet_writes([update("S!A1", [[1, 2], [3]], major_dimension="COLUMNS")])
+    assert calls[0]["data"] == [
+        {"range": "'S'!A1:B1", "majorDimension": "ROWS", "values": [[1, 3]]},
+        {"range": "'S'!A2:A2", "majorDimension": "ROWS", "values": [[2]]},
+    ]
+
+
+def test_plan_preserves_order_across_appends_and_options():
+    calls = main._plan_sheet_writes([
+        update("S!A1", [[1]]),
+        append("S!A:C", [["x"]]),
+        append("S!A:C", [["y"]]),
+        update("S!A1", [[2]]),
+        update("S!A2", [["=1+1"]], option="RAW"),
+        append("S!A:C", [["z"]], insert="OVERWRITE"),
+    ])
+    assert [(call["kind"], call.get("value_input_option")) for call in calls] == [
+        ("update", "USER_ENTERED"), ("append", None), ("update", "USER_ENTERED"), ("update", "RAW"), ("append", None),
+    ]
+    assert calls[1]["values"] == [["x"], ["y"]]
+    assert calls[2]["data"][0]["values"] == [[2]]
+    assert calls[4]["values"] == [["z"]]
+
+
+def test_unbounded_ranges_are_sent_as_is_in_order():
+    calls = main._plan_sheet_writes([
+        update("S!A1", [[1]]),
+        update("S!A:A", [["whole column"]]),
+        update("S!A1", [[2]]),
+    ])
+    assert len(calls) == 1
+    assert [entry["range"] for entry in calls[0]["data"]] == ["'S'!A1:A1", "S!A:A", "'S'!A1:A1"]
+    assert calls[0]["data"][2]["values"] == [[2]]
+
+
+def test_all_null_updates_send_nothing():
+    assert main._plan_sheet_writes([update("S!A1:B1", [[None, None]])]) == []
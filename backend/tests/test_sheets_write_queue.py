@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+import main
+
+SHEET = "sheet-1"
+KEY = (None, SHEET)
+
+
+def http_error(status, reason="badRequest"):
+    content = json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    queue = main.SheetsWriteQueue(str(tmp_path / "journal.jsonl"))
+    queue.sent = []
+    queue.failures = {}  # method -> list of errors to raise, one per call
+
+    async def execute(request, creds, idempotent=None):
+        method = request.methodId.rsplit(".", 1)[-1]
+        errors = queue.failures.get(method)
+        if errors:
+            raise errors.pop(0)
+        queue.sent.append((method, json.loads(request.body)))
+
+    async def get_credentials(account_id=None):
+        return object()
+
+    monkeypatch.setattr(main, "execute", execute)
+    monkeypatch.setattr(main, "get_credentials", get_credentials)
+    return queue
+
+
+def enqueue_three(queue):
+    """An update, an append and a RAW update: three calls"""
+    async def scenario():
+        await queue.enqueue(SHEET, "update", "S!A1", {"values": [[1]]}, value_input_option="USER_ENTERED")
+        await queue.enqueue(
+            SHEET, "append", "S!A:B", {"values": [["row"]]},
+            value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS",
+        )
+        await queue.enqueue(SHEET, "update", "S!B1", {"values": [[2]]}, value_input_option="RAW")
+    asyncio.run(scenario())
+
+
+def journaled(queue):
+    with open(queue.journal_path) as f:
+        return [json.loads(line)["kind"] for line in f if line.strip()]
+
+
+def test_calls_sent_before_a_failure_are_not_sent_again(queue):
+    enqueue_three(queue)
+    queue.failures["append"] = [http_error(503, "backendError")]
+    with pytest.raises(HttpError):
+        asyncio.run(queue.flush(SHEET))
+    assert [method for method, _ in queue.sent] == ["batchUpdate"]
+    assert [op["kind"] for op in queue._pending[KEY]] == ["append", "update"]
+    assert journaled(queue) == ["append", "update"]
+
+    result = asyncio.run(queue.flush(SHEET))
+    assert [method for method, _ in queue.sent] == ["batchUpdate", "append", "batchUpdate"]
+    assert queue.sent[2][1]["valueInputOption"] == "RAW"
+    assert result["ops"] == 2 and KEY not in queue._pending and journaled(queue) == []
+
+
+def test_rejected_writes_are_dead_lettered_and_the_rest_sent(queue):
+    enqueue_three(queue)
+    queue.failures["append"] = [http_error(400)]
+    result = asyncio.run(queue.flush(SHEET))
+    assert [method for method, _ in queue.sent] == ["batchUpdate", "batchUpdate"]
+    assert result["dropped"] == 1 and queue.stats()["dropped_ops"] == 1
+    assert "Dropped 1 writes" in queue.stats()["last_error"]
+    assert KEY not in queue._pending and journaled(queue) == []
+    with open(queue.dead_letter_path) as f:
+        dead = [json.loads(line) for line in f]
+    assert [(op["kind"], op["values"]) for op in dead] == [("append", [["row"]])]
+    assert "400" in dead[0]["error"] or "badRequest" in dead[0]["error"]
+
+
+@pytest.mark.parametrize("error", [http_error(429, "rateLimitExceeded"), http_error(403, "userRateLimitExceeded"), http_error(401, "authError")])
+def test_rate_limits_and_auth_errors_are_retried_not_dropped(queue, error):
+    enqueue_three(queue)
+    queue.failures["append"] = [error]
+    with pytest.raises(HttpError):
+        asyncio.run(queue.flush(SHEET))
+    assert queue.dropped_ops == 0 and len(queue._pending[KEY]) == 2
+
+
+def test_writes_are_dead_lettered_after_the_attempt_limit(queue, monkeypatch):
+    monkeypatch.setattr(main, "SHEETS_FLUSH_MAX_ATTEMPTS", 3)
+    enqueue_three(queue)
+    queue.failures["append"] = [http_error(503, "backendError")] * 3
+    for attempt in range(3):
+        with pytest.raises(HttpError):
+            asyncio.run(queue.flush(SHEET))
+    assert KEY not in queue._pending and journaled(queue) == []
+    assert queue.dropped_ops == 2
+    assert [method for method, _ in queue.sent] == ["batchUpdate"]
+
+
+def test_ops_queued_during_a_flush_stay_queued(queue, monkeypatch):
+    enqueue_three(queue)
+    execute = main.execute
+
+    async def execute_and_enqueue(request, creds, idempotent=None):
+        if not queue.sent:
+            await queue.enqueue(SHEET, "update", "S!C1", {"values": [[3]]}, value_input_option="RAW")
+        await execute(request, creds, idempotent)
+
+    monkeypatch.setattr(main, "execute", execute_and_enqueue)
+    asyncio.run(queue.flush(SHEET))
+    assert [op["range"] for op in queue._pending[KEY]] == ["S!C1"]
+    assert journaled(queue) == ["update"]
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+import main
+
+
+def _iso(dt):
+    return dt.isoformat()
+
+
+def _synced_mirror(window):
+    mirror = main.CalendarMirror("primary")
+    mirror.window_start, mirror.window_end = window
+    return mirror
+
+
+def test_calendar_mirror_covers_only_bounded_queries_inside_its_window():
+    start, end = main._calendar_window()
+    mirror = _synced_mirror((start, end))
+    assert mirror.covers(_iso(start + timedelta(days=1)), _iso(end - timedelta(days=1)))
+    assert not mirror.covers(_iso(start + timedelta(days=1)), None)
+    assert not mirror.covers(_iso(start - timedelta(days=1)), _iso(end - timedelta(days=1)))
+    assert not mirror.covers(_iso(start + timedelta(days=1)), _iso(end + timedelta(days=1)))
+
+
+def test_query_past_an_old_window_triggers_resync_only_within_reach():
+    start, end = main._calendar_window()
+    # Synced ten days ago: its window ends ten days earlier than a fresh one would
+    mirror = _synced_mirror((start - timedelta(days=10), end - timedelta(days=10)))
+    near_end = _iso(end - timedelta(days=2))
+    assert main.SyncEngine._drifted(mirror, _iso(start + timedelta(days=1)), near_end)
+    assert not main.SyncEngine._drifted(mirror, _iso(start), _iso(end + timedelta(days=30)))
+    assert not main.SyncEngine._drifted(mirror, _iso(start), _iso(start + timedelta(days=1)))
+
+
+def test_calendar_mirror_query_orders_by_start_and_filters_by_overlap():
+    mirror = _synced_mirror(main._calendar_window())
+    mirror.events = {
+        "b": {"id": "b", "start": {"dateTime": "2026-01-02T10:00:00Z"}, "end": {"dateTime": "2026-01-02T11:00:00Z"}},
+        "a": {"id": "a", "start": {"dateTime": "2026-01-01T23:00:00Z"}, "end": {"dateTime": "2026-01-02T01:00:00Z"}},
+        "c": {"id": "c", "start": {"dateTime": "2026-01-03T10:00:00Z"}, "end": {"dateTime": "2026-01-03T11:00:00Z"}},
+    }
+    result = mirror.query("2026-01-02T00:00:00Z", "2026-01-03T00:00:00Z", 10)
+    assert [event["id"] for event in result] == ["a", "b"]
+
+
+def test_task_list_mirror_keeps_api_order():
+    mirror = main.TaskListMirror("list")
+    for task_id, position in [("t2", "0002"), ("t1", "0001"), ("t3", "0000")]:
+        mirror.tasks[task_id] = {"id": task_id, "position": position}
+    mirror.tasks["t1"] = {"id": "t1", "position": "0009", "title": "updated"}
+    assert [task["id"] for task in mirror.query(None)] == ["t2", "t1", "t3"]
+    assert [task["id"] for task in mirror.query(2)] == ["t2", "t1"]
@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Two WorkerEvents sharing a state DB, as two worker processes would"""
+    monkeypatch.setattr(main, "WORKERS", 2)
+    monkeypatch.setattr(main, "LOCK_DIR", str(tmp_path / "locks"))
+    path = str(tmp_path / "state.db")
+    pair = []
+    for worker_id in ("worker-a", "worker-b"):
+        events = main.WorkerEvents(path)
+        events.start()
+        events.applied_events = []
+        events._apply = lambda kind, account, data, events=events: events.applied_events.append((kind, account, data))
+        events.worker_id = worker_id
+        pair.append(events)
+    return pair
+
+
+def as_worker(monkeypatch, events):
+    monkeypatch.setattr(main, "_WORKER_ID", events.worker_id)
+
+
+def test_single_worker_skips_the_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "WORKERS", 1)
+    events = main.WorkerEvents(str(tmp_path / "state.db"))
+    events.start()
+    events.publish("account", "me")
+    asyncio.run(events.catch_up())
+    assert events.published == 0
+    assert not os.path.exists(tmp_path / "state.db")
+
+
+def test_events_reach_other_workers_in_order(workers, monkeypatch):
+    a, b = workers
+
+    async def scenario():
+        as_worker(monkeypatch, a)
+        a.publish("cache", "me", [["tasks", "list-1"]])
+        a.publish("account", "me")
+        await a.drain()
+        await a.catch_up()
+        as_worker(monkeypatch, b)
+        await b.catch_up()
+
+    asyncio.run(scenario())
+    assert b.applied_events == [("cache", "me", [["tasks", "list-1"]]), ("account", "me", None)]
+    # The publisher doesn't apply (or even read back) its own events
+    assert a.applied_events == [] and a.last_seq == b.last_seq == 2
+
+
+def test_events_published_in_one_tick_are_written_together(workers, monkeypatch):
+    a, _ = workers
+    writes = []
+    write = a._write
+    a._write = lambda events: writes.append(len(events)) or write(events)
+
+    async def scenario():
+        as_worker(monkeypatch, a)
+        for i in range(5):
+            a.publish("stale", "me", ["tasks", f"list-{i}"])
+        await a.drain()
+
+    asyncio.run(scenario())
+    assert writes == [5] and a.published == 5
+
+
+def test_concurrent_catch_ups_share_one_read(workers, monkeypatch):
+    a, b = workers
+    reads = []
+    rows_after = b._rows_after
+    b._rows_after = lambda seq: reads.append(seq) or rows_after(seq)
+
+    async def scenario():
+        as_worker(monkeypatch, a)
+        a.publish("account", "me")
+        await a.drain()
+        as_worker(monkeypatch, b)
+        await asyncio.gather(*(b.catch_up() for _ in range(20)))
+        # Nothing new: no read at all
+        await b.catch_up()
+
+    asyncio.run(scenario())
+    assert reads == [0]
+    assert b.applied_events == [("account", "me", None)]
+
+
+def test_publish_outside_the_event_loop_writes_immediately(workers, monkeypatch):
+    a, b = workers
+    as_worker(monkeypatch, a)
+    a.publish("account", "me")
+    assert a.published == 1
+    as_worker(monkeypatch, b)
+    asyncio.run(b.catch_up())
+    assert b.applied_events == [("account", "me", None)]
+
+
+def test_stale_counter_is_reset_for_a_new_state_db(workers, tmp_path):
+    a, _ = workers
+    a.publish("account", "me")
+    fresh = main.WorkerEvents(str(tmp_path / "other.db"))
+    fresh.start()
+    # The shared counter file said 1, but the new DB has no events
+    assert fresh.last_seq == 0 and fresh._read_counter() == 0